@@ -17,6 +17,7 @@ import re
 import subprocess
 import time
 import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
 from .adb_manager import ADBManager
@@ -36,6 +37,71 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Separates getprop output from the wm queries in the batched property read
+_PROPS_MARKER = "__VM_WM__"
+_GETPROP_LINE = re.compile(r"^\[([^\]]+)\]:\s*\[(.*)\]\s*$")
+
+
+@dataclass
+class DeviceProperties:
+    """
+    Static device properties (constant while a device stays connected).
+
+    Filled by a single batched shell round-trip on connect and cached per
+    connection ID until the device disconnects or reconnects.
+    """
+
+    manufacturer: str = ""
+    model: str = ""
+    android_version: str = ""
+    sdk_version: Optional[int] = None
+    screen_width: Optional[int] = None
+    screen_height: Optional[int] = None
+    density: Optional[int] = None
+    props: Dict[str, str] = field(default_factory=dict)
+    fetched_at: float = 0.0
+
+    @property
+    def is_samsung(self) -> bool:
+        return "samsung" in self.manufacturer.lower()
+
+    def screen_size(self, default: tuple = (1920, 1200)) -> tuple:
+        """(width, height), or default if wm size could not be parsed"""
+        if self.screen_width and self.screen_height:
+            return self.screen_width, self.screen_height
+        return default
+
+    @classmethod
+    def parse(cls, output: str) -> "DeviceProperties":
+        """Parse the output of `getprop; echo marker; wm size; wm density`"""
+        getprop_out, _, wm_out = (output or "").partition(_PROPS_MARKER)
+
+        props: Dict[str, str] = {}
+        for line in getprop_out.splitlines():
+            match = _GETPROP_LINE.match(line.strip())
+            if match:
+                props[match.group(1)] = match.group(2)
+
+        sdk = props.get("ro.build.version.sdk", "").strip()
+        info = cls(
+            manufacturer=props.get("ro.product.manufacturer", "").strip(),
+            model=props.get("ro.product.model", "").strip(),
+            android_version=props.get("ro.build.version.release", "").strip(),
+            sdk_version=int(sdk) if sdk.isdigit() else None,
+            props=props,
+            fetched_at=time.time(),
+        )
+
+        # Same parsing as the previous per-call `wm size` lookups (first match)
+        size_match = re.search(r"(\d+)x(\d+)", wm_out)
+        if size_match:
+            info.screen_width = int(size_match.group(1))
+            info.screen_height = int(size_match.group(2))
+        density_match = re.search(r"density:\s*(\d+)", wm_out)
+        if density_match:
+            info.density = int(density_match.group(1))
+        return info
+
 
 class ADBBridge:
     """
@@ -115,6 +181,9 @@ class ADBBridge:
         # Stable device identifier cache (survives IP/port changes)
         self._device_serial_cache: Dict[str, str] = {}  # {device_id: serial_number}
 
+        # Static device properties (manufacturer, SDK, screen size, density)
+        self._device_properties: Dict[str, DeviceProperties] = {}  # {conn_id: props}
+
         # Initialize Play Store scraper for app name extraction
         self.playstore_scraper = PlayStoreIconScraper()
 
@@ -391,6 +460,9 @@ class ADBBridge:
         3. Build fingerprint hash (ro.build.fingerprint)
         4. Fallback: hash of model + manufacturer
 
+        Properties are taken from the cached DeviceProperties batch, so only
+        get-serialno and android_id cost extra round-trips.
+
         Args:
             device_id: Current device ID (IP:port or USB serial)
             force_refresh: If True, bypass cache and fetch fresh
@@ -412,41 +484,27 @@ class ADBBridge:
 
         serial = None
 
+        # getprop values come from the cached batch read (one round-trip)
+        properties = await self.get_device_properties(resolved_id)
+        props = properties.props if properties else {}
+
+        def _prop(name: str) -> Optional[str]:
+            value = props.get(name, "").strip()
+            if value and value not in ("unknown", "null"):
+                return value
+            return None
+
         # Method 1: Try hardware serial (ro.serialno) - MOST STABLE
         # This survives factory resets and is burned into hardware
-        try:
-            result = await asyncio.wait_for(
-                conn.shell("getprop ro.serialno"), timeout=3.0
-            )
-            if (
-                result
-                and result.strip()
-                and result.strip() not in ("unknown", "null", "")
-            ):
-                serial = result.strip()
-                logger.debug(
-                    f"[ADBBridge] Got serial via ro.serialno (hardware): {serial}"
-                )
-        except Exception as e:
-            logger.debug(f"[ADBBridge] ro.serialno failed: {e}")
+        serial = _prop("ro.serialno")
+        if serial:
+            logger.debug(f"[ADBBridge] Got serial via ro.serialno (hardware): {serial}")
 
         # Method 2: Try ro.boot.serialno (alternative hardware serial location)
         if not serial:
-            try:
-                result = await asyncio.wait_for(
-                    conn.shell("getprop ro.boot.serialno"), timeout=3.0
-                )
-                if (
-                    result
-                    and result.strip()
-                    and result.strip() not in ("unknown", "null", "")
-                ):
-                    serial = result.strip()
-                    logger.debug(
-                        f"[ADBBridge] Got serial via ro.boot.serialno: {serial}"
-                    )
-            except Exception as e:
-                logger.debug(f"[ADBBridge] ro.boot.serialno failed: {e}")
+            serial = _prop("ro.boot.serialno")
+            if serial:
+                logger.debug(f"[ADBBridge] Got serial via ro.boot.serialno: {serial}")
 
         # Method 3: Try adb get-serialno (skip if it looks like IP:port)
         if not serial:
@@ -489,37 +547,21 @@ class ADBBridge:
 
         # Method 5: Try build fingerprint
         if not serial:
-            try:
-                result = await asyncio.wait_for(
-                    conn.shell("getprop ro.build.fingerprint"), timeout=3.0
-                )
-                if result and result.strip():
-                    # Hash the fingerprint to get a shorter ID
-                    import hashlib
+            fingerprint = props.get("ro.build.fingerprint", "").strip()
+            if fingerprint:
+                # Hash the fingerprint to get a shorter ID
+                import hashlib
 
-                    serial = hashlib.md5(result.strip().encode()).hexdigest()[:16]
-                    logger.debug(
-                        f"[ADBBridge] Got serial via fingerprint hash: {serial}"
-                    )
-            except Exception as e:
-                logger.debug(f"[ADBBridge] fingerprint failed: {e}")
+                serial = hashlib.md5(fingerprint.encode()).hexdigest()[:16]
+                logger.debug(f"[ADBBridge] Got serial via fingerprint hash: {serial}")
 
         # Method 6: Fallback - hash of model + manufacturer (not unique per device)
-        if not serial:
-            try:
-                model = await asyncio.wait_for(
-                    conn.shell("getprop ro.product.model"), timeout=3.0
-                )
-                manufacturer = await asyncio.wait_for(
-                    conn.shell("getprop ro.product.manufacturer"), timeout=3.0
-                )
-                combo = f"{manufacturer.strip()}_{model.strip()}"
-                import hashlib
+        if not serial and properties:
+            combo = f"{properties.manufacturer}_{properties.model}"
+            import hashlib
 
-                serial = hashlib.md5(combo.encode()).hexdigest()[:16]
-                logger.debug(f"[ADBBridge] Got serial via model hash: {serial}")
-            except Exception as e:
-                logger.debug(f"[ADBBridge] model hash failed: {e}")
+            serial = hashlib.md5(combo.encode()).hexdigest()[:16]
+            logger.debug(f"[ADBBridge] Got serial via model hash: {serial}")
 
         # Final fallback: sanitized device_id
         if not serial:
@@ -550,6 +592,74 @@ class ADBBridge:
         self._device_serial_cache[device_id] = serial
         logger.debug(f"[ADBBridge] Manually cached serial for {device_id}: {serial}")
 
+    # === Static Device Properties ===
+
+    async def get_device_properties(
+        self, device_id: str, force_refresh: bool = False
+    ) -> Optional[DeviceProperties]:
+        """
+        Get cached static properties for a device.
+
+        The first call per connection reads everything in one shell round-trip
+        (getprop + wm size + wm density); later calls are served from memory
+        until the device disconnects or reconnects.
+
+        Args:
+            device_id: Connection ID or stable device ID
+            force_refresh: If True, re-read properties from the device
+
+        Returns:
+            DeviceProperties, or None if the device is not connected or the
+            read failed
+        """
+        conn, resolved_id = await self._resolve_device_connection(device_id)
+        if not conn:
+            return None
+
+        if not force_refresh:
+            cached = self._device_properties.get(resolved_id)
+            if cached is not None:
+                return cached
+
+        try:
+            output = await asyncio.wait_for(
+                conn.shell(
+                    f"getprop; echo {_PROPS_MARKER}; wm size; wm density"
+                ),
+                timeout=5.0,
+            )
+        except Exception as e:
+            logger.debug(f"[ADBBridge] Could not read device properties for {resolved_id}: {e}")
+            return None
+
+        properties = DeviceProperties.parse(output)
+        if not properties.props:
+            logger.debug(f"[ADBBridge] Empty getprop output for {resolved_id}, not caching")
+            return None
+
+        self._device_properties[resolved_id] = properties
+        logger.debug(
+            f"[ADBBridge] Cached properties for {resolved_id}: {properties.manufacturer} "
+            f"{properties.model}, SDK {properties.sdk_version}, "
+            f"{properties.screen_width}x{properties.screen_height}@{properties.density}"
+        )
+        return properties
+
+    def invalidate_device_properties(self, device_id: str):
+        """Drop cached static properties (called on disconnect/reconnect)"""
+        if self._device_properties.pop(device_id, None) is not None:
+            logger.debug(f"[ADBBridge] Cleared cached properties for {device_id}")
+
+    async def _get_manufacturer(self, device_id: str) -> str:
+        """Lower-cased manufacturer from the property cache ('' if unknown)"""
+        properties = await self.get_device_properties(device_id)
+        return properties.manufacturer.lower() if properties else ""
+
+    async def _get_screen_size(self, device_id: str) -> tuple:
+        """(width, height) from the property cache, tablet default if unknown"""
+        properties = await self.get_device_properties(device_id)
+        return properties.screen_size() if properties else (1920, 1200)
+
     def _get_cached_ui_elements(self, device_id: str) -> Optional[List[Dict]]:
         """Get cached UI elements if still valid"""
         if not self._ui_cache_enabled:
@@ -858,26 +968,22 @@ class ADBBridge:
             # Attempt connection
             if await conn.connect():
                 self.devices[device_id] = conn
+                self.invalidate_device_properties(device_id)
                 logger.info(f"[ADBBridge] Connected to {device_id}")
 
                 # Register device with identity resolver for stable ID mapping
                 try:
                     stable_id = await self.get_device_serial(device_id)
-                    model = await asyncio.wait_for(
-                        conn.shell("getprop ro.product.model"), timeout=3.0
-                    )
-                    manufacturer = await asyncio.wait_for(
-                        conn.shell("getprop ro.product.manufacturer"), timeout=3.0
-                    )
+                    properties = await self.get_device_properties(device_id)
 
                     data_dir = os.environ.get("DATA_DIR", "data")
                     resolver = get_device_identity_resolver(data_dir)
                     resolver.register_device(
                         connection_id=device_id,
                         stable_device_id=stable_id,
-                        device_model=model.strip() if model else None,
+                        device_model=(properties.model or None) if properties else None,
                         device_manufacturer=(
-                            manufacturer.strip() if manufacturer else None
+                            (properties.manufacturer or None) if properties else None
                         ),
                     )
                     logger.info(
@@ -904,6 +1010,8 @@ class ADBBridge:
         Args:
             device_id: Device identifier
         """
+        self.invalidate_device_properties(device_id)
+
         if device_id not in self.devices:
             logger.warning(f"[ADBBridge] Device {device_id} not found in active connections")
             # Still try to disconnect from ADB daemon in case it's a stale connection
@@ -1335,6 +1443,7 @@ class ADBBridge:
                             # Mark as already connected
                             conn._connected = True
                             self.devices[device_id] = conn
+                            self.invalidate_device_properties(device_id)
 
                             # Trigger device discovered callbacks with model info
                             for callback in self._device_discovered_callbacks:
@@ -2254,13 +2363,8 @@ class ADBBridge:
         if not conn:
             raise ValueError(f"Device not connected: {device_id}")
 
-        # Detect device manufacturer for routing
-        manufacturer = "unknown"
-        try:
-            mfr_output = await conn.shell("getprop ro.product.manufacturer")
-            manufacturer = mfr_output.strip().lower()
-        except Exception as e:
-            logger.debug(f"[ADBBridge] Could not get manufacturer: {e}")
+        # Detect device manufacturer for routing (cached per connection)
+        manufacturer = await self._get_manufacturer(resolved_id) or "unknown"
 
         is_samsung = "samsung" in manufacturer
 
@@ -2273,19 +2377,9 @@ class ADBBridge:
         try:
             logger.info(f"[ADBBridge] Unlocking screen on {resolved_id}")
 
-            # Get screen dimensions
-            try:
-                wm_output = await conn.shell("wm size")
-                match = re.search(r"(\d+)x(\d+)", wm_output)
-                if match:
-                    width, height = int(match.group(1)), int(match.group(2))
-                else:
-                    width, height = 1920, 1200  # Default for tablets
-                center_x = width // 2
-            except Exception as e:
-                logger.debug(f"[ADBBridge] Could not get screen size, using defaults: {e}")
-                width, height = 1920, 1200
-                center_x = width // 2
+            # Get screen dimensions (defaults to tablet size if unknown)
+            width, height = await self._get_screen_size(resolved_id)
+            center_x = width // 2
 
             # STEP 1: Wake the screen (critical for dreaming/locked state)
             logger.debug(f"[ADBBridge] Waking screen...")
@@ -2389,7 +2483,7 @@ class ADBBridge:
                         f"[ADBBridge] PIN lookup: found config for {lookup_id}, strategy={strategy}"
                     )
                     if strategy == LockStrategy.AUTO_UNLOCK.value:
-                        passcode = security_mgr.get_passcode(lookup_id)
+                        passcode = await security_mgr.get_passcode_async(lookup_id)
                         has_pin_configured = bool(passcode)
                         logger.info(
                             f"[ADBBridge] PIN lookup: passcode found={has_pin_configured}"
@@ -2413,16 +2507,8 @@ class ADBBridge:
         logger.info(f"[ADBBridge] Samsung unlock sequence starting for {device_id}")
 
         # Get screen dimensions once
-        try:
-            wm_output = await conn.shell("wm size")
-            match = re.search(r"(\d+)x(\d+)", wm_output)
-            width, height = (
-                (int(match.group(1)), int(match.group(2))) if match else (1920, 1200)
-            )
-            center_x = width // 2
-        except Exception as e:
-            logger.debug(f"[ADBBridge] Could not get Samsung screen size: {e}")
-            width, height, center_x = 1920, 1200, 960
+        width, height = await self._get_screen_size(device_id)
+        center_x = width // 2
 
         for retry in range(max_retries):
             retry_delay = retry * 0.5  # Progressive delay: 0, 0.5, 1.0 seconds
@@ -2771,14 +2857,9 @@ class ADBBridge:
                 f"[ADBBridge] Unlocking device {device_id} (tracking as {tracking_id})"
             )
 
-            # Detect device manufacturer
-            manufacturer = "unknown"
-            try:
-                mfr_output = await conn.shell("getprop ro.product.manufacturer")
-                manufacturer = mfr_output.strip().lower()
-                logger.info(f"[ADBBridge] Device manufacturer: {manufacturer}")
-            except Exception as e:
-                logger.debug(f"[ADBBridge] Could not get manufacturer for unlock: {e}")
+            # Detect device manufacturer (cached per connection)
+            manufacturer = await self._get_manufacturer(device_id) or "unknown"
+            logger.info(f"[ADBBridge] Device manufacturer: {manufacturer}")
 
             # Check screen state: dumpsys power | grep mWakefulness or mScreenOn
             async def is_screen_on():
@@ -2798,17 +2879,7 @@ class ADBBridge:
                 return True
 
             # Get screen dimensions
-            try:
-                wm_output = await conn.shell("wm size")
-                match = re.search(r"(\d+)x(\d+)", wm_output)
-                width, height = (
-                    (int(match.group(1)), int(match.group(2)))
-                    if match
-                    else (1920, 1200)
-                )
-            except Exception as e:
-                logger.debug(f"[ADBBridge] Could not get screen size for unlock: {e}")
-                width, height = 1920, 1200
+            width, height = await self._get_screen_size(device_id)
             center_x = width // 2
             logger.debug(f"[ADBBridge] Screen dimensions: {width}x{height}")
 
@@ -2936,15 +3007,8 @@ class ADBBridge:
             return True  # Can't check - assume locked for safety
 
         try:
-            # Detect manufacturer for device-specific handling
-            manufacturer = ""
-            try:
-                mfr = await asyncio.wait_for(
-                    conn.shell("getprop ro.product.manufacturer"), timeout=2.0
-                )
-                manufacturer = mfr.strip().lower()
-            except Exception as e:
-                logger.debug(f"[ADBBridge] Could not get manufacturer for lock check: {e}")
+            # Detect manufacturer for device-specific handling (cached per connection)
+            manufacturer = await self._get_manufacturer(resolved_id)
 
             is_samsung = "samsung" in manufacturer
 
@@ -3767,11 +3831,11 @@ class ADBBridge:
                                 and config.get("strategy")
                                 == LockStrategy.AUTO_UNLOCK.value
                             ):
-                                passcode = security_mgr.get_passcode(device_id)
+                                passcode = await security_mgr.get_passcode_async(device_id)
                                 if not passcode:
                                     stable_id = await self.get_device_serial(device_id)
                                     if stable_id:
-                                        passcode = security_mgr.get_passcode(stable_id)
+                                        passcode = await security_mgr.get_passcode_async(stable_id)
 
                                 if passcode:
                                     logger.info(
@@ -14,6 +14,8 @@ from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
 
+from utils.element_finder import ElementIndex
+
 logger = logging.getLogger(__name__)
 
 
@@ -552,6 +554,8 @@ class ADBMaintenance:
         logger.info(f"[ADBMaintenance] Resetting display on {device_id}")
         await self._run_shell_command(device_id, "wm size reset")
         await self._run_shell_command(device_id, "wm density reset")
+        # Cached DeviceProperties hold the pre-reset size and density
+        self.adb_bridge.invalidate_device_properties(device_id)
         return {"success": True, "message": "Display settings reset"}
 
     # === Full Optimization ===
@@ -653,34 +657,51 @@ class ADBHelpers:
         """
         try:
             elements = await self.adb_bridge.get_ui_elements(device_id)
+            # ElementIndex reads resource_id/content_desc (what get_ui_elements
+            # emits) as well as raw resource-id/content-desc attributes
+            index = ElementIndex(elements or [])
+
+            # Narrow candidates with exact-match tables before substring checks
+            candidates = None
+            if class_name is not None:
+                candidates = index.by_class.get(class_name, [])
+            if text is not None and exact_match:
+                by_text = index.by_text.get(text, [])
+                candidates = (
+                    by_text
+                    if candidates is None
+                    else sorted(set(candidates).intersection(by_text))
+                )
+            if candidates is None:
+                candidates = range(len(index))
+
+            text_lower = text.lower() if text is not None else None
+            desc_lower = content_desc.lower() if content_desc is not None else None
+
+            for i in candidates:
+                element = index.elements[i]
 
-            for element in elements:
                 # Check text match
                 if text is not None:
-                    element_text = element.get("text", "")
                     if exact_match:
-                        if element_text != text:
-                            continue
-                    else:
-                        if text.lower() not in element_text.lower():
+                        if element.get("text", "") != text:
                             continue
+                    elif text_lower not in index.text_lower[i]:
+                        continue
 
                 # Check resource-id match
                 if resource_id is not None:
-                    element_id = element.get("resource-id", "")
-                    if resource_id not in element_id:
+                    if resource_id not in index.resource_ids[i]:
                         continue
 
                 # Check class match
                 if class_name is not None:
-                    element_class = element.get("class", "")
-                    if class_name != element_class:
+                    if class_name != element.get("class", ""):
                         continue
 
                 # Check content-desc match
-                if content_desc is not None:
-                    element_desc = element.get("content-desc", "")
-                    if content_desc.lower() not in element_desc.lower():
+                if desc_lower is not None:
+                    if desc_lower not in index.content_desc_lower[i]:
                         continue
 
                 # Found matching element
@@ -5,9 +5,16 @@ Intelligent flow consolidation for reduced redundant operations
 This module detects when multiple flows target the same apps/screens and
 batches them to reduce redundant operations (app launches, navigation, unlocks).
 
+Flows of one device and app are inserted into a trie keyed by step
+signatures. The planner walks the trie and, at every branching point, either
+keeps a branch in the current batch (reached again with go_back) or splits it
+into its own batch, whichever is estimated to be faster. The result is a
+nested plan that executes the deepest shared navigation once.
+
 Feature Flag: FLOW_CONSOLIDATION=true
 """
 
+import json
 import logging
 import uuid
 from typing import List, Dict, Optional, Tuple, Set
@@ -19,6 +26,20 @@ from .flow_models import SensorCollectionFlow, FlowStep, FlowStepType
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class ConsolidationNode:
+    """
+    Node of a nested consolidated plan
+
+    Runs `steps` once, then each branch in order, backtracking with go_back
+    to this node's screen between branches.
+    """
+
+    steps: List[FlowStep]
+    branches: List["ConsolidationNode"] = field(default_factory=list)
+    flow_ids: List[str] = field(default_factory=list)  # Flows ending in this node
+
+
 @dataclass
 class ConsolidationGroup:
     """Group of flows that can be consolidated"""
@@ -31,6 +52,7 @@ class ConsolidationGroup:
     total_sensors: int
     estimated_savings_seconds: float
     created_at: datetime = field(default_factory=datetime.now)
+    plan: Optional[ConsolidationNode] = None  # Nested plan (root steps = prefix)
 
     def __post_init__(self):
         if not self.group_id:
@@ -67,13 +89,35 @@ class ConsolidationStats:
     last_consolidation: Optional[datetime] = None
 
 
+class _StepTrieNode:
+    """Trie node: one step shared by every flow passing through it"""
+
+    __slots__ = ("step", "children", "ending")
+
+    def __init__(self, step: Optional[FlowStep] = None):
+        self.step = step
+        self.children: Dict[tuple, "_StepTrieNode"] = {}
+        self.ending: List[SensorCollectionFlow] = []  # Flows whose last step is here
+
+
+@dataclass
+class _SubtreePlan:
+    """Planner result for a trie node whose step has just been executed"""
+
+    cost: float  # Seconds for everything below, including split-off batches
+    tail_navigation: int  # Navigation steps from this node to where the plan ends
+    node: ConsolidationNode
+    flows: List[SensorCollectionFlow]  # Flows kept in the current batch
+    split: List[Tuple[ConsolidationNode, List[SensorCollectionFlow]]]
+
+
 class FlowConsolidator:
     """
     Manages flow consolidation for optimized execution
 
     Features:
     - Detects consolidation opportunities (same device, same app)
-    - Finds longest common navigation prefix (LCP)
+    - Plans nested batches over a trie of step signatures
     - Generates optimized execution plans
     - Tracks consolidation statistics
     """
@@ -84,6 +128,7 @@ class FlowConsolidator:
     LOCK_TIME = 1.0
     NAVIGATION_STEP_TIME = 1.5
     CAPTURE_STEP_TIME = 2.0
+    BACKTRACK_WAIT_MS = 500
 
     def __init__(
         self,
@@ -140,6 +185,8 @@ class FlowConsolidator:
         # Group by device_id
         device_groups = self._group_by(flows, key=lambda f: f.device_id)
         consolidation_groups = []
+        max_batch = max(2, self.config.get("max_batch_size", 10))
+        min_threshold = self.config.get("minimum_savings_threshold", 5)
 
         for device_id, device_flows in device_groups.items():
             if len(device_flows) < 2:
@@ -157,40 +204,47 @@ class FlowConsolidator:
                 if len(app_flows) < 2:
                     continue
 
-                # Apply max batch size limit
-                max_batch = self.config.get("max_batch_size", 10)
-                if len(app_flows) > max_batch:
-                    app_flows = app_flows[:max_batch]
+                # Batches larger than max_batch_size are split along the trie
+                # (DFS order keeps flows with shared navigation together)
+                ordered = self._trie_order(self._build_step_trie(app_flows))
+                for start in range(0, len(ordered), max_batch):
+                    batch = ordered[start : start + max_batch]
+                    if len(batch) < 2:
+                        continue
 
-                # Find common navigation prefix (LCP algorithm)
-                common_prefix = self._find_longest_common_prefix(app_flows)
+                    for plan, plan_flows in self._plan_batches(
+                        self._build_step_trie(batch)
+                    ):
+                        if len(plan_flows) < 2:
+                            continue
 
-                # Calculate savings
-                savings = self._estimate_savings(app_flows, common_prefix)
+                        savings = self._estimate_plan_savings(plan_flows, plan)
+                        if savings < min_threshold:
+                            continue
 
-                min_threshold = self.config.get("minimum_savings_threshold", 5)
-                if savings >= min_threshold:
-                    # Count total sensors
-                    total_sensors = sum(
-                        self._count_sensors_in_flow(f) for f in app_flows
-                    )
+                        # Count total sensors
+                        total_sensors = sum(
+                            self._count_sensors_in_flow(f) for f in plan_flows
+                        )
 
-                    group = ConsolidationGroup(
-                        group_id=f"cg_{uuid.uuid4().hex[:8]}",
-                        device_id=device_id,
-                        app_package=app_package,
-                        flows=app_flows,
-                        shared_navigation_prefix=common_prefix,
-                        total_sensors=total_sensors,
-                        estimated_savings_seconds=savings,
-                    )
-                    consolidation_groups.append(group)
+                        group = ConsolidationGroup(
+                            group_id=f"cg_{uuid.uuid4().hex[:8]}",
+                            device_id=device_id,
+                            app_package=app_package,
+                            flows=plan_flows,
+                            shared_navigation_prefix=list(plan.steps),
+                            total_sensors=total_sensors,
+                            estimated_savings_seconds=savings,
+                            plan=plan,
+                        )
+                        consolidation_groups.append(group)
 
-                    logger.info(
-                        f"[FlowConsolidator] Found consolidation opportunity: "
-                        f"{len(app_flows)} flows for {app_package}, "
-                        f"savings={savings:.1f}s, sensors={total_sensors}"
-                    )
+                        logger.info(
+                            f"[FlowConsolidator] Found consolidation opportunity: "
+                            f"{len(plan_flows)} flows for {app_package}, "
+                            f"shared prefix={len(plan.steps)} steps, "
+                            f"savings={savings:.1f}s, sensors={total_sensors}"
+                        )
 
         return consolidation_groups
 
@@ -219,13 +273,8 @@ class FlowConsolidator:
             for flow in group.flows:
                 total_original_steps += len(flow.steps)
 
-            # Consolidated: prefix once + divergent steps
-            total_consolidated_steps += len(group.shared_navigation_prefix)
-
-            # Add divergent steps for each flow (steps after prefix)
-            for flow in group.flows:
-                prefix_len = len(group.shared_navigation_prefix)
-                total_consolidated_steps += len(flow.steps) - prefix_len
+            # Consolidated: shared steps once + branches + backtracking
+            total_consolidated_steps += len(self.build_consolidated_steps(group))
 
             estimated_savings += group.estimated_savings_seconds
 
@@ -270,6 +319,9 @@ class FlowConsolidator:
         if not group.flows:
             return []
 
+        if group.plan is not None:
+            return self._emit_plan(group.plan)
+
         consolidated_steps = []
 
         # Start with shared navigation prefix
@@ -286,6 +338,43 @@ class FlowConsolidator:
 
         return consolidated_steps
 
+    def _emit_plan(self, node: ConsolidationNode) -> List[FlowStep]:
+        """Flatten a nested plan, backtracking to each node between its branches"""
+        steps = list(node.steps)
+        last = len(node.branches) - 1
+        for i, branch in enumerate(node.branches):
+            steps.extend(self._emit_plan(branch))
+            if i < last:
+                steps.extend(self._backtrack_steps(self._plan_tail_navigation(branch)))
+        return steps
+
+    def _plan_tail_navigation(self, node: ConsolidationNode) -> int:
+        """Navigation steps between a node's entry and where its plan ends"""
+        count = self._count_navigation_steps(node.steps)
+        if node.branches:
+            count += self._plan_tail_navigation(node.branches[-1])
+        return count
+
+    def _backtrack_steps(self, navigation_steps: int) -> List[FlowStep]:
+        if navigation_steps <= 0:
+            return []
+        steps = [
+            FlowStep(
+                step_type=FlowStepType.GO_BACK,
+                description="Backtrack for consolidated navigation",
+            )
+            for _ in range(navigation_steps)
+        ]
+        # Small wait after backtracking
+        steps.append(
+            FlowStep(
+                step_type=FlowStepType.WAIT,
+                duration=self.BACKTRACK_WAIT_MS,
+                description="Wait after backtrack",
+            )
+        )
+        return steps
+
     def _extract_divergent_branches(
         self, flows: List[SensorCollectionFlow], prefix_len: int
     ) -> List[List[FlowStep]]:
@@ -396,146 +485,222 @@ class FlowConsolidator:
                 return step.package
         return None
 
-    def _find_longest_common_prefix(
-        self, flows: List[SensorCollectionFlow]
-    ) -> List[FlowStep]:
-        """
-        Find the longest common prefix of navigation steps
-
-        Compares steps by type and key properties (package, x, y, etc.)
-
-        Args:
-            flows: List of flows to compare
-
-        Returns:
-            List of common FlowStep objects
-        """
-        if not flows:
-            return []
-
-        if len(flows) == 1:
-            return flows[0].steps.copy()
-
-        # Get step lists
-        step_lists = [f.steps for f in flows]
-
-        # Find minimum length
-        min_len = min(len(s) for s in step_lists)
-        if min_len == 0:
-            return []
-
-        # Compare step by step
-        common_prefix = []
-        for i in range(min_len):
-            # Get step at position i from all flows
-            steps_at_i = [s[i] for s in step_lists]
-
-            # Check if all steps are equivalent
-            if self._steps_are_equivalent(steps_at_i):
-                common_prefix.append(steps_at_i[0])
-            else:
-                # Divergence found
-                break
-
-        return common_prefix
-
-    def _steps_are_equivalent(self, steps: List[FlowStep]) -> bool:
+    def _step_signature(self, step: FlowStep) -> tuple:
         """
-        Check if all steps are functionally equivalent
+        Hashable key under which steps count as functionally equivalent
 
         Compares:
         - step_type
         - package (for launch_app)
-        - x, y coordinates (for tap)
-        - element properties (for tap with element)
-        - duration (for wait)
-        """
-        if not steps:
-            return True
+        - element resource_id/text (for element taps), else x, y (for tap)
+        - start/end coordinates (for swipe)
+        - nothing else for wait (different durations are still equivalent)
+        - all other step types must match field for field (e.g. sensor_ids
+          of capture_sensors), so sharing them never drops work
+        """
+        step_type = step.step_type
+
+        if step_type == FlowStepType.LAUNCH_APP:
+            return (step_type, step.package)
+        if step_type == FlowStepType.TAP:
+            if step.element:
+                return (
+                    step_type,
+                    "element",
+                    step.element.get("resource_id"),
+                    step.element.get("text"),
+                )
+            return (step_type, step.x, step.y)
+        if step_type == FlowStepType.SWIPE:
+            return (step_type, step.start_x, step.start_y, step.end_x, step.end_y)
+        if step_type in (FlowStepType.WAIT, FlowStepType.GO_BACK, FlowStepType.GO_HOME):
+            return (step_type,)
 
-        first = steps[0]
+        fields = step.model_dump(exclude={"description"}, exclude_none=True)
+        return (step_type, json.dumps(fields, sort_keys=True, default=str))
 
-        for step in steps[1:]:
-            if step.step_type != first.step_type:
-                return False
+    def _steps_are_equivalent(self, steps: List[FlowStep]) -> bool:
+        """Check if all steps are functionally equivalent (same signature)"""
+        if not steps:
+            return True
+        first = self._step_signature(steps[0])
+        return all(self._step_signature(step) == first for step in steps[1:])
+
+    def _step_time(self, step: FlowStep) -> float:
+        """Estimated seconds to execute a step"""
+        if step.step_type == FlowStepType.WAIT:
+            return (step.duration or 1000) / 1000.0
+        if step.step_type in (FlowStepType.TAP, FlowStepType.SWIPE, FlowStepType.GO_BACK):
+            return self.NAVIGATION_STEP_TIME
+        if step.step_type == FlowStepType.LAUNCH_APP:
+            return self.APP_LAUNCH_TIME
+        if step.step_type == FlowStepType.CAPTURE_SENSORS:
+            return self.CAPTURE_STEP_TIME
+        return 0.0
+
+    def _backtrack_time(self, navigation_steps: int) -> float:
+        if navigation_steps <= 0:
+            return 0.0
+        return (
+            navigation_steps * self.NAVIGATION_STEP_TIME
+            + self.BACKTRACK_WAIT_MS / 1000.0
+        )
 
-            # Type-specific comparisons
-            if first.step_type == FlowStepType.LAUNCH_APP:
-                if step.package != first.package:
-                    return False
+    def _build_step_trie(self, flows: List[SensorCollectionFlow]) -> _StepTrieNode:
+        """Insert each flow's steps into a trie keyed by step signature"""
+        root = _StepTrieNode()
+        for flow in flows:
+            node = root
+            for step in flow.steps:
+                signature = self._step_signature(step)
+                child = node.children.get(signature)
+                if child is None:
+                    child = node.children[signature] = _StepTrieNode(step)
+                node = child
+            node.ending.append(flow)
+        return root
+
+    def _trie_order(self, root: _StepTrieNode) -> List[SensorCollectionFlow]:
+        """Flows in depth-first order (flows sharing navigation are adjacent)"""
+        ordered = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            ordered.extend(node.ending)
+            stack.extend(reversed(list(node.children.values())))
+        return ordered
+
+    def _plan_batches(
+        self, root: _StepTrieNode
+    ) -> List[Tuple[ConsolidationNode, List[SensorCollectionFlow]]]:
+        """
+        Plan a trie into batches: (nested plan, flows) per batch
+
+        Each first step starts its own batch (there is no shared screen to
+        backtrack to); below it, _plan_subtree decides which branches stay.
+        """
+        batches = []
+        for child in root.children.values():
+            sub = self._plan_subtree(child, [child.step], self._step_time(child.step))
+            batches.append((sub.node, sub.flows))
+            batches.extend(sub.split)
+        return batches
+
+    def _plan_subtree(
+        self, trie_node: _StepTrieNode, path: List[FlowStep], path_time: float
+    ) -> _SubtreePlan:
+        """
+        Cheapest plan below a trie node whose step has just been executed
+
+        For each child branch, compare keeping it in this batch (its steps
+        plus go_back to this screen afterwards) with running it as its own
+        batch (unlock + the path to here again). The branch whose backtrack
+        saves the most runs last, where no backtrack is needed.
 
-            elif first.step_type == FlowStepType.TAP:
-                # Compare coordinates or element
-                if step.element and first.element:
-                    # Compare element identifiers
-                    if step.element.get("resource_id") != first.element.get(
-                        "resource_id"
-                    ):
-                        return False
-                    if step.element.get("text") != first.element.get("text"):
-                        return False
-                elif step.x != first.x or step.y != first.y:
-                    return False
-
-            elif first.step_type == FlowStepType.WAIT:
-                # Waits with different durations are still "equivalent" for prefix purposes
-                pass
-
-            elif first.step_type == FlowStepType.SWIPE:
-                if (
-                    step.start_x != first.start_x
-                    or step.start_y != first.start_y
-                    or step.end_x != first.end_x
-                    or step.end_y != first.end_y
-                ):
-                    return False
+        Args:
+            trie_node: Node just executed
+            path: Steps from the batch root to trie_node (inclusive)
+            path_time: Estimated seconds for path
+        """
+        options = []
+        for child in trie_node.children.values():
+            edge = self._step_time(child.step)
+            sub = self._plan_subtree(child, path + [child.step], path_time + edge)
+            tail = self._count_navigation_steps([child.step]) + sub.tail_navigation
+            inline = edge + sub.cost
+            separate = self.UNLOCK_TIME + self.LOCK_TIME + path_time + inline
+            options.append((child, sub, tail, inline, self._backtrack_time(tail), separate))
+
+        # Pick the branch that gains most from running last (no backtrack)
+        last_index, best_gain = None, 0.0
+        for i, (_, _, _, inline, backtrack, separate) in enumerate(options):
+            gain = min(inline + backtrack, separate) - min(inline, separate)
+            if gain > best_gain:
+                last_index, best_gain = i, gain
+        if last_index is not None:
+            options.append(options.pop(last_index))
+
+        cost = 0.0
+        tail_navigation = 0
+        node = ConsolidationNode(
+            steps=[trie_node.step], flow_ids=[f.flow_id for f in trie_node.ending]
+        )
+        flows = list(trie_node.ending)
+        split = []
+        for i, (child, sub, tail, inline, backtrack, separate) in enumerate(options):
+            is_last = last_index is not None and i == len(options) - 1
+            inline_cost = inline if is_last else inline + backtrack
+            if inline_cost <= separate:
+                cost += inline_cost
+                node.branches.append(sub.node)
+                flows.extend(sub.flows)
+                if is_last:
+                    tail_navigation = tail
+            else:
+                cost += separate
+                split.append(
+                    (
+                        self._compress_plan(
+                            ConsolidationNode(
+                                steps=path + sub.node.steps,
+                                branches=sub.node.branches,
+                                flow_ids=sub.node.flow_ids,
+                            )
+                        ),
+                        sub.flows,
+                    )
+                )
+            split.extend(sub.split)
+
+        return _SubtreePlan(
+            cost=cost,
+            tail_navigation=tail_navigation,
+            node=self._compress_plan(node),
+            flows=flows,
+            split=split,
+        )
 
-        return True
+    def _compress_plan(self, node: ConsolidationNode) -> ConsolidationNode:
+        """Merge single-branch chains into one node (steps run back to back)"""
+        while len(node.branches) == 1:
+            child = node.branches[0]
+            node = ConsolidationNode(
+                steps=node.steps + child.steps,
+                branches=child.branches,
+                flow_ids=node.flow_ids + child.flow_ids,
+            )
+        return node
 
-    def _estimate_savings(
-        self, flows: List[SensorCollectionFlow], common_prefix: List[FlowStep]
+    def _estimate_plan_savings(
+        self, flows: List[SensorCollectionFlow], plan: ConsolidationNode
     ) -> float:
         """
-        Estimate time savings from consolidation
+        Estimate time savings of running flows as one consolidated plan
 
         Savings come from:
-        - (N-1) app launches avoided
         - (N-1) unlock cycles avoided
-        - Shared navigation prefix executed once instead of N times
+        - Shared steps (app launch, navigation) executed once instead of per flow
+        - minus the go_back/wait steps needed to backtrack between branches
 
         Args:
-            flows: Flows being consolidated
-            common_prefix: Common navigation prefix
+            flows: Flows in the plan
+            plan: Nested consolidated plan
 
         Returns:
             Estimated savings in seconds
         """
-        n = len(flows)
-        if n < 2:
+        if len(flows) < 2:
             return 0.0
 
-        # App launch savings: (N-1) launches avoided
-        app_launch_savings = (n - 1) * self.APP_LAUNCH_TIME
-
-        # Unlock/lock savings: (N-1) cycles avoided
-        unlock_savings = (n - 1) * (self.UNLOCK_TIME + self.LOCK_TIME)
-
-        # Navigation prefix savings: (N-1) times the prefix
-        prefix_time = 0.0
-        for step in common_prefix:
-            if step.step_type == FlowStepType.WAIT:
-                prefix_time += (step.duration or 1000) / 1000.0
-            elif step.step_type in [FlowStepType.TAP, FlowStepType.SWIPE]:
-                prefix_time += self.NAVIGATION_STEP_TIME
-            elif step.step_type == FlowStepType.LAUNCH_APP:
-                # Already counted above
-                pass
-
-        nav_savings = (n - 1) * prefix_time
-
-        total_savings = app_launch_savings + unlock_savings + nav_savings
-
-        return total_savings
+        unlock_cycle = self.UNLOCK_TIME + self.LOCK_TIME
+        separate = sum(
+            unlock_cycle + sum(self._step_time(step) for step in flow.steps)
+            for flow in flows
+        )
+        consolidated = unlock_cycle + sum(
+            self._step_time(step) for step in self._emit_plan(plan)
+        )
+        return separate - consolidated
 
     def _count_sensors_in_flow(self, flow: SensorCollectionFlow) -> int:
         """Count total sensors captured in a flow"""
@@ -24,8 +24,9 @@ from .flow_models import (
     FlowExecutionResult,
     StepResult,
 )
-from utils.element_finder import SmartElementFinder, ElementMatch
+from utils.element_finder import ElementIndex, SmartElementFinder, ElementMatch
 from utils.device_security import DeviceSecurityManager, LockStrategy
+from utils.screen_fingerprint import ScreenFingerprint, compute_fingerprint
 from .flow_execution_history import FlowExecutionHistory, FlowExecutionLog, FlowStepLog
 from core.navigation_manager import NavigationManager
 from ml_components.navigation_models import compute_screen_id, extract_ui_landmarks
@@ -126,6 +127,10 @@ class FlowExecutor:
         # Track sensors skipped due to interval (for logging)
         self._sensors_skipped_by_interval: Dict[str, float] = {}
 
+        # Fingerprints of expected screenshots that were saved without one
+        # (keyed by the base64 string, so each screenshot is decoded once)
+        self._expected_fingerprints: Dict[str, ScreenFingerprint] = {}
+
         logger.info("[FlowExecutor] Initialized")
 
     def _analyze_skippable_steps(self, flow: SensorCollectionFlow) -> set[int]:
@@ -284,14 +289,14 @@ class FlowExecutor:
         # Get passcode if AUTO_UNLOCK configured
         passcode = None
         if has_auto_unlock:
-            passcode = self.security_manager.get_passcode(device_id)
+            passcode = await self.security_manager.get_passcode_async(device_id)
             logger.info(f"[FlowExecutor] Passcode for {device_id}: {'found' if passcode else 'NOT FOUND'}")
             if not passcode:
                 try:
                     stable_id = await self.adb_bridge.get_device_serial(device_id)
                     logger.info(f"[FlowExecutor] Trying passcode via stable_id: {stable_id}")
                     if stable_id and stable_id != device_id:
-                        passcode = self.security_manager.get_passcode(stable_id)
+                        passcode = await self.security_manager.get_passcode_async(stable_id)
                         logger.info(f"[FlowExecutor] Passcode via stable_id: {'found' if passcode else 'NOT FOUND'}")
                 except Exception as e:
                     logger.warning(f"[FlowExecutor] Could not get passcode via stable_id: {e}")
@@ -1288,6 +1293,18 @@ class FlowExecutor:
                 learned_from="learn_mode",
             )
 
+            # Fingerprint each screen once (not on every visit) for visual
+            # identification; a frame the step just captured is reused from
+            # the screenshot cache.
+            if screen and not screen.fingerprint:
+                try:
+                    fingerprint = await self._capture_live_fingerprint(device_id)
+                    self.navigation_manager.set_screen_fingerprint(
+                        current_package, screen.screen_id, fingerprint
+                    )
+                except Exception as e:
+                    logger.debug(f"  [Learn Mode] Screen fingerprint skipped: {e}")
+
             return {
                 "package": current_package,
                 "activity": current_activity,
@@ -2474,10 +2491,13 @@ class FlowExecutor:
             ui_elements = await self.adb_bridge.get_ui_elements(
                 device_id, bounds_only=False
             )
+            # Indexed once, shared by every sensor lookup below
+            element_index = ElementIndex(ui_elements or [])
 
             # 3. Extract each sensor and collect for batch publishing
             # Only process sensors that need updating (filtered by interval above)
             sensor_updates = []  # List of (sensor, value) tuples for batch publishing
+            located = []  # (sensor_id, sensor, raw_text) awaiting batch extraction
             cached_count = 0
             interval_skipped_count = len(step.sensor_ids) - len(sensors_to_capture)
             for sensor_id in sensors_to_capture:
@@ -2511,7 +2531,7 @@ class FlowExecutor:
                         }
 
                     match = self.element_finder.find_element(
-                        ui_elements=ui_elements,
+                        ui_elements=element_index,
                         resource_id=sensor.source.element_resource_id,
                         element_text=sensor.source.element_text,
                         element_class=sensor.source.element_class,
@@ -2533,30 +2553,9 @@ class FlowExecutor:
                     # Use found bounds for extraction
                     extraction_bounds = match.bounds
 
-                    # Extract value from element's text using extraction rule
+                    # Value is extracted for all located sensors in one batch below
                     raw_text = match.element.get("text", "") if match.element else ""
-                    if raw_text:
-                        value = self.text_extractor.extract(
-                            raw_text, sensor.extraction_rule
-                        )
-                    else:
-                        logger.warning(
-                            f"  Element has no text for {sensor.friendly_name}"
-                        )
-                        value = (
-                            sensor.extraction_rule.fallback_value
-                            if sensor.extraction_rule
-                            else None
-                        )
-
-                    # Store in result and session cache
-                    result.captured_sensors[sensor_id] = value
-                    self._session_captured_sensors[sensor_id] = value  # Cache for dedup
-
-                    logger.debug(f"  Captured {sensor.friendly_name}: {value}")
-
-                    # Collect for batch publishing (20-30% faster than individual)
-                    sensor_updates.append((sensor, value))
+                    located.append((sensor_id, sensor, raw_text))
 
                     # Check if element moved significantly from stored position
                     if (
@@ -2604,6 +2603,36 @@ class FlowExecutor:
                     logger.error(f"  Failed to extract sensor {sensor_id}: {e}")
                     # Continue with other sensors (don't fail entire step)
 
+            # Extract all located sensors at once (rules compiled once per capture)
+            extract_items = [
+                (sensor.extraction_rule, raw_text)
+                for _, sensor, raw_text in located
+                if raw_text and sensor.extraction_rule
+            ]
+            extracted_values = iter(self.text_extractor.extract_many(extract_items))
+
+            for sensor_id, sensor, raw_text in located:
+                if raw_text and sensor.extraction_rule:
+                    value = next(extracted_values)
+                else:
+                    logger.warning(
+                        f"  Element has no text for {sensor.friendly_name}"
+                    )
+                    value = (
+                        sensor.extraction_rule.fallback_value
+                        if sensor.extraction_rule
+                        else None
+                    )
+
+                # Store in result and session cache
+                result.captured_sensors[sensor_id] = value
+                self._session_captured_sensors[sensor_id] = value  # Cache for dedup
+
+                logger.debug(f"  Captured {sensor.friendly_name}: {value}")
+
+                # Collect for batch publishing (20-30% faster than individual)
+                sensor_updates.append((sensor, value))
+
             # 4. Ensure MQTT discovery is published before state (auto-recreates deleted entities)
             if sensor_updates:
                 for sensor, _ in sensor_updates:
@@ -2621,12 +2650,12 @@ class FlowExecutor:
                     f"  Batch published {batch_result['success']}/{len(sensor_updates)} sensors to MQTT"
                 )
 
-                # 6. Persist captured sensor values to disk (fixes stale current_value issue)
+                # 6. Record captured sensor values (snapshotted to disk periodically)
                 for sensor, value in sensor_updates:
-                    sensor.current_value = str(value) if value is not None else None
-                    sensor.last_updated = datetime.now(timezone.utc)
-                    self.sensor_manager.update_sensor(sensor)
-                    logger.debug(f"  Persisted {sensor.friendly_name} = {value}")
+                    self.sensor_manager.runtime_state.record_value(
+                        sensor.sensor_id, str(value) if value is not None else None
+                    )
+                    logger.debug(f"  Recorded {sensor.friendly_name} = {value}")
 
             # Log capture results
             fresh_count = len(sensor_updates)
@@ -3010,7 +3039,8 @@ class FlowExecutor:
         Hybrid validation strategy (in order of preference):
         1. XML UI Elements - Most reliable
         2. Activity Name - Fast and accurate
-        3. Screenshot Similarity - Fallback only
+        3. Screenshot Similarity - Fallback only (expected screenshot, else
+           the fingerprint of the expected navigation screen)
 
         Args:
             device_id: Device ID
@@ -3174,8 +3204,10 @@ class FlowExecutor:
         # Strategy 3: Screenshot Similarity (Fallback)
         if step.expected_screenshot:
             try:
-                screenshot_match_score = await self._compare_screenshots(
-                    device_id, step.expected_screenshot
+                screenshot_match_score = await self._calculate_screenshot_similarity(
+                    device_id,
+                    step.expected_screenshot,
+                    step.expected_screenshot_fingerprint,
                 )
                 confidence_scores.append(screenshot_match_score)
 
@@ -3186,6 +3218,25 @@ class FlowExecutor:
             except Exception as e:
                 logger.debug(f"  [StateValidation] Screenshot check failed: {e}")
 
+        # Strategy 4: Learned screen fingerprint (navigation graph)
+        elif step.expected_screen_id:
+            package = (
+                step.package
+                or step.screen_package
+                or getattr(step, "_package_context", None)
+            )
+            try:
+                screen_match_score = await self._calculate_screen_node_similarity(
+                    device_id, package, step.expected_screen_id
+                )
+                if screen_match_score is not None:
+                    confidence_scores.append(screen_match_score)
+                    logger.debug(
+                        f"  [StateValidation] Learned screen similarity: {screen_match_score:.2f}"
+                    )
+            except Exception as e:
+                logger.debug(f"  [StateValidation] Learned screen check failed: {e}")
+
         # Calculate overall confidence
         if len(confidence_scores) == 0:
             logger.warning(f"  [StateValidation] No validation criteria available")
@@ -3196,100 +3247,85 @@ class FlowExecutor:
 
         return (is_valid, avg_score)
 
+    def _get_expected_fingerprint(
+        self, expected_screenshot_b64: str, expected_fingerprint: Optional[str]
+    ) -> ScreenFingerprint:
+        """Resolve the fingerprint of an expected screenshot, computing it at most once"""
+        if expected_fingerprint:
+            try:
+                return ScreenFingerprint.from_string(expected_fingerprint)
+            except Exception as e:
+                logger.debug(f"  [StateValidation] Bad stored fingerprint: {e}")
+
+        fingerprint = self._expected_fingerprints.get(expected_screenshot_b64)
+        if fingerprint is None:
+            fingerprint = compute_fingerprint(expected_screenshot_b64)
+            if len(self._expected_fingerprints) >= 128:
+                self._expected_fingerprints.pop(next(iter(self._expected_fingerprints)))
+            self._expected_fingerprints[expected_screenshot_b64] = fingerprint
+        return fingerprint
+
+    async def _capture_live_fingerprint(self, device_id: str) -> ScreenFingerprint:
+        """Capture the current frame and fingerprint it off the event loop"""
+        screenshot_bytes = await self.adb_bridge.capture_screenshot(device_id)
+        return await asyncio.to_thread(compute_fingerprint, screenshot_bytes)
+
+    async def _calculate_screen_node_similarity(
+        self, device_id: str, package: Optional[str], screen_id: str
+    ) -> Optional[float]:
+        """
+        Score the current frame against a learned navigation screen.
+
+        The frame is looked up among all fingerprinted screens of the
+        package; the expected screen scores its similarity if it is one of
+        the nearest matches, and 0.0 if other screens look closer.
+
+        Returns:
+            Similarity score (0.0-1.0), or None if the screen has no fingerprint
+        """
+        if not package:
+            return None
+        screen = self.navigation_manager.get_screen(package, screen_id)
+        if not screen or not screen.fingerprint:
+            return None
+
+        current = await self._capture_live_fingerprint(device_id)
+        for match, _, similarity in self.navigation_manager.find_screens_by_fingerprint(
+            package, current, k=3
+        ):
+            if match.screen_id == screen_id:
+                return float(similarity)
+        return 0.0
+
     async def _calculate_screenshot_similarity(
-        self, device_id: str, expected_screenshot_b64: str
+        self,
+        device_id: str,
+        expected_screenshot_b64: str,
+        expected_fingerprint: Optional[str] = None,
     ) -> float:
         """
         Calculate similarity score between current screen and expected screenshot.
-        Uses OpenCV histogram comparison if available, falls back to PIL histogram.
+        Compares perceptual fingerprints (dHash/pHash + thumbnail); the live
+        frame is fingerprinted once in a worker thread.
 
         Args:
             device_id: Device ID
             expected_screenshot_b64: Base64 encoded expected screenshot
+            expected_fingerprint: Precomputed fingerprint of the expected screenshot
 
         Returns:
             Similarity score (0.0-1.0)
         """
         try:
-            import base64
-            import numpy as np
-            from PIL import Image, ImageStat
-            import io
-            from services.feature_manager import get_feature_manager
-
-            feature_manager = get_feature_manager()
-            cv2_available = feature_manager.is_enabled("real_icons_enabled")
-
-            # Capture current screenshot
-            current_screenshot = await self.adb_bridge.capture_screenshot(device_id)
-
-            # Decode expected screenshot
-            expected_bytes = base64.b64decode(expected_screenshot_b64)
-            expected_image = Image.open(io.BytesIO(expected_bytes))
-
-            # Resize if dimensions don't match
-            if current_screenshot.size != expected_image.size:
-                expected_image = expected_image.resize(current_screenshot.size)
-
-            if cv2_available:
-                try:
-                    import cv2
-
-                    # Convert to OpenCV format (BGR)
-                    current_np = cv2.cvtColor(
-                        np.array(current_screenshot), cv2.COLOR_RGB2BGR
-                    )
-                    expected_np = cv2.cvtColor(
-                        np.array(expected_image), cv2.COLOR_RGB2BGR
-                    )
-
-                    # Calculate histograms
-                    current_hist = cv2.calcHist(
-                        [current_np],
-                        [0, 1, 2],
-                        None,
-                        [8, 8, 8],
-                        [0, 256, 0, 256, 0, 256],
-                    )
-                    expected_hist = cv2.calcHist(
-                        [expected_np],
-                        [0, 1, 2],
-                        None,
-                        [8, 8, 8],
-                        [0, 256, 0, 256, 0, 256],
-                    )
-
-                    # Normalize histograms
-                    cv2.normalize(current_hist, current_hist)
-                    cv2.normalize(expected_hist, expected_hist)
-
-                    # Compare histograms using correlation method
-                    similarity_score = cv2.compareHist(
-                        current_hist, expected_hist, cv2.HISTCMP_CORREL
-                    )
-
-                    # Correlation returns -1 to 1, normalize to 0 to 1
-                    normalized_score = (similarity_score + 1) / 2.0
-                    return float(normalized_score)
-                except Exception as e:
-                    logger.warning(
-                        f"  [StateValidation] OpenCV comparison failed, falling back to PIL: {e}"
-                    )
-
-            # PIL Fallback: Mean squared error of histograms
-            # This is simpler but effective for basic "is it the same screen" checks
-            h1 = current_screenshot.histogram()
-            h2 = expected_image.histogram()
-
-            # Root mean square error
-            from math import sqrt
+            expected = await asyncio.to_thread(
+                self._get_expected_fingerprint,
+                expected_screenshot_b64,
+                expected_fingerprint,
+            )
 
-            rms = sqrt(sum((a - b) ** 2 for a, b in zip(h1, h2)) / len(h1))
+            current = await self._capture_live_fingerprint(device_id)
 
-            # Normalize to 0-1 (heuristic: 0 is identical, >30 is very different)
-            # This is a rough approximation
-            normalized_score = max(0.0, 1.0 - (rms / 1000.0))
-            return float(normalized_score)
+            return float(current.similarity(expected))
 
         except Exception as e:
             logger.error(f"  [StateValidation] Screenshot comparison failed: {e}")
@@ -3455,6 +3491,22 @@ class FlowExecutor:
                 current_activity.get("activity", ""), landmarks
             )
 
+            # Landmarks changed (dynamic content)? Recognise the screen visually
+            graph = self.navigation_manager.get_graph(package)
+            if graph and current_screen_id not in graph.screens:
+                try:
+                    fingerprint = await self._capture_live_fingerprint(device_id)
+                    screen = self.navigation_manager.identify_current_screen(
+                        package,
+                        current_activity.get("activity", ""),
+                        ui_elements,
+                        fingerprint=fingerprint,
+                    )
+                    if screen:
+                        current_screen_id = screen.screen_id
+                except Exception as e:
+                    logger.debug(f"[Navigation] Visual screen match failed: {e}")
+
             # Already on target screen?
             if current_screen_id == target_screen_id:
                 logger.info("[Navigation] Already on target screen")
@@ -14,6 +14,7 @@ from pathlib import Path
 
 from .flow_models import SensorCollectionFlow, FlowList, sensor_to_simple_flow
 from services.device_identity import get_device_identity_resolver
+from utils.screen_fingerprint import fingerprint_to_string
 
 logger = logging.getLogger(__name__)
 
@@ -118,6 +119,21 @@ class FlowManager:
         except Exception as e:
             logger.error(f"[FlowManager] Failed to save flows for {device_id}: {e}")
 
+    def _fingerprint_expected_screens(self, steps) -> None:
+        """
+        Precompute perceptual fingerprints for steps with expected screenshots,
+        so state validation never has to decode the stored screenshot.
+        """
+        for step in steps or []:
+            if step.expected_screenshot:
+                step.expected_screenshot_fingerprint = fingerprint_to_string(
+                    step.expected_screenshot
+                )
+            else:
+                step.expected_screenshot_fingerprint = None
+            for nested in (step.true_steps, step.false_steps, step.loop_steps):
+                self._fingerprint_expected_screens(nested)
+
     def create_flow(self, flow: SensorCollectionFlow) -> bool:
         """Create a new flow"""
         try:
@@ -133,6 +149,7 @@ class FlowManager:
                 return False
 
             # Add flow
+            self._fingerprint_expected_screens(flow.steps)
             flow_list.flows.append(flow)
 
             # Save
@@ -247,6 +264,7 @@ class FlowManager:
             # Find and replace
             for i, f in enumerate(flow_list.flows):
                 if f.flow_id == flow.flow_id:
+                    self._fingerprint_expected_screens(flow.steps)
                     flow_list.flows[i] = flow
                     self._save_flows(flow.device_id, flow_list)
                     logger.info(f"[FlowManager] Updated flow {flow.flow_id}")
@@ -385,6 +403,9 @@ class FlowManager:
                 )
                 flow_list.device_id = device_id
 
+            for flow in flow_list.flows:
+                self._fingerprint_expected_screens(flow.steps)
+
             # Save
             self._flows[device_id] = flow_list
             self._save_flows(device_id, flow_list)
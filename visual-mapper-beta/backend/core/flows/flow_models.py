@@ -138,8 +138,12 @@ class FlowStep(BaseModel):
     expected_screenshot: Optional[str] = Field(
         None, description="Base64 encoded screenshot (fallback validation)"
     )
+    expected_screenshot_fingerprint: Optional[str] = Field(
+        None,
+        description="Perceptual fingerprint of expected_screenshot (filled in on save)",
+    )
     state_match_threshold: float = Field(
-        0.80,
+        0.90,
         ge=0.0,
         le=1.0,
         description="Similarity threshold for state matching (0.0-1.0)",
@@ -2,6 +2,9 @@
 MQTT Manager for Visual Mapper
 Handles Home Assistant MQTT discovery and sensor state publishing
 Cross-platform: Uses aiomqtt on Linux, paho-mqtt on Windows
+
+Inbound messages from both backends go through one TopicRouter, which hands
+them to the handlers registered with the set_*_callback methods.
 """
 
 import asyncio
@@ -9,8 +12,9 @@ import json
 import logging
 import os
 import sys
+import uuid
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 
 from core.sensors.sensor_models import (
@@ -19,6 +23,11 @@ from core.sensors.sensor_models import (
     SensorStateUpdate,
 )
 from utils.version import APP_VERSION
+from core.mqtt.topic_router import (
+    TopicRouter,
+    InboundMessage,
+    POLICY_DROP_OLDEST,
+)
 
 # Import ActionDefinition for action discovery
 try:
@@ -43,6 +52,16 @@ else:
 
     logger.info("[MQTTManager] Using aiomqtt (Linux async mode)")
 
+# Inbound topic filters (levels[1] is always the sanitized device id)
+FLOW_RESULT_TOPIC_FILTER = "visual_mapper/+/flow/+/result"
+UI_RESPONSE_TOPIC_FILTER = "visual_mapper/+/ui/response"
+ACTION_COMMAND_TOPIC_FILTER = "visual_mapper/+/action/+/execute"
+COMPANION_STATUS_TOPIC_FILTER = "visual_mapper/+/status"
+GESTURE_RESULT_TOPIC_FILTER = "visual_mapper/+/gesture/result"
+NAVIGATION_LEARN_TOPIC_FILTER = "visual_mapper/+/navigation/learn"
+GENERATED_FLOWS_TOPIC = "visualmapper/flows/generated"
+DEVICE_ANNOUNCE_TOPIC = "visualmapper/devices/announce"
+
 
 class MQTTManager:
     """Manages MQTT connection and publishes sensor data to Home Assistant"""
@@ -79,6 +98,24 @@ class MQTTManager:
         # Standard capabilities: CAP_OVERLAY_V2, CAP_CLIENT_OCR, CAP_INTENT_PREVIEW
         self._device_capabilities: Dict[str, list] = {}
 
+        # Flow executions awaiting a companion result: request_id -> Future
+        self._pending_flow_results: Dict[str, asyncio.Future] = {}
+        self._flow_result_callbacks: List[Callable] = []
+        # UI tree requests awaiting a companion response: request_id -> Future
+        self._pending_ui_requests: Dict[str, asyncio.Future] = {}
+
+        # Inbound dispatch: one consumer per connection feeds the router
+        self.router = TopicRouter()
+        self._message_task: Optional[asyncio.Task] = None
+        # (kind, callback) -> route name; every set_*_callback caller gets a route
+        self._callback_routes: Dict[Tuple[str, Callable], str] = {}
+        self.router.add_route(
+            "flow_result", FLOW_RESULT_TOPIC_FILTER, self._handle_flow_result_message
+        )
+        self.router.add_route(
+            "ui_response", UI_RESPONSE_TOPIC_FILTER, self._handle_ui_response_message
+        )
+
         logger.info(
             f"[MQTTManager] Initialized with broker={broker}:{port} (Platform: {'Windows' if IS_WINDOWS else 'Linux'})"
         )
@@ -265,8 +302,14 @@ class MQTTManager:
                 logger.info(f"[MQTTManager] Disconnected from broker (code {rc})")
                 self._connected = False
 
+            # The paho network thread is the single consumer of inbound messages
+            def on_message(client, userdata, message):
+                self.router.dispatch_threadsafe(message.topic, message.payload)
+
             self.client.on_connect = on_connect
             self.client.on_disconnect = on_disconnect
+            self.client.on_message = on_message
+            self.router.start()
 
             # Connect
             self.client.connect(self.broker, self.port, keepalive=60)
@@ -317,6 +360,8 @@ class MQTTManager:
 
             await self.client.__aenter__()
             self._connected = True
+            self.router.start()
+            self._message_task = asyncio.create_task(self._message_loop())
             logger.info(f"[MQTTManager] Connected to {self.broker}:{self.port}")
             return True
 
@@ -331,10 +376,14 @@ class MQTTManager:
             return
 
         try:
+            self.router.stop()
             if IS_WINDOWS:
                 self.client.loop_stop()
                 self.client.disconnect()
             else:
+                if self._message_task:
+                    self._message_task.cancel()
+                    self._message_task = None
                 await self.client.__aexit__(None, None, None)
 
             self._connected = False
@@ -342,6 +391,16 @@ class MQTTManager:
         except Exception as e:
             logger.error(f"[MQTTManager] Error disconnecting: {e}")
 
+    async def _message_loop(self):
+        """Linux: the single consumer of inbound messages for this connection"""
+        try:
+            async for message in self.client.messages:
+                await self.router.dispatch(str(message.topic), message.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[MQTTManager] Message loop stopped: {e}")
+
     @property
     def is_connected(self) -> bool:
         """Check if connected to broker"""
@@ -976,59 +1035,57 @@ class MQTTManager:
             )
             return False
 
+    def _add_callback_route(
+        self,
+        kind: str,
+        callback: Callable,
+        topic_filter: str,
+        handler: Callable,
+        **route_options,
+    ):
+        """
+        Route messages for a set_*_callback registration
+
+        Each distinct callback gets its own route (and queue), so several
+        components can listen to the same topic. Registering the same
+        callback again replaces its route.
+        """
+        key = (kind, callback)
+        name = self._callback_routes.get(key)
+        if name is None:
+            label = getattr(callback, "__qualname__", type(callback).__name__)
+            name = f"{kind}:{label}"
+            taken = set(self._callback_routes.values())
+            suffix = 2
+            while name in taken:
+                name = f"{kind}:{label}#{suffix}"
+                suffix += 1
+            self._callback_routes[key] = name
+        self.router.add_route(name, topic_filter, handler, **route_options)
+
     def set_action_command_callback(self, callback):
         """Set callback function to handle action execution commands from MQTT"""
-        if not self.client:
-            logger.error("[MQTTManager] Client not initialized")
-            return
 
-        async def on_message_async(client, userdata, msg):
-            """Async wrapper for message callback"""
-            try:
-                # Extract action_id from topic: visual_mapper/{device_id}/action/{action_id}/execute
-                topic_parts = msg.topic.split("/")
-                if len(topic_parts) >= 4 and topic_parts[2] == "action":
-                    action_id = topic_parts[3]
-                    device_id_sanitized = topic_parts[1]
+        async def on_action_command(message: InboundMessage):
+            # Topic: visual_mapper/{device_id}/action/{action_id}/execute
+            device_id_sanitized, action_id = message.levels[1], message.levels[3]
 
-                    # De-sanitize device_id (reverse the sanitization)
-                    # This is a simple approach - may need enhancement for complex IDs
-                    device_id = device_id_sanitized.replace("_", ":")
+            # De-sanitize device_id (reverse the sanitization)
+            # This is a simple approach - may need enhancement for complex IDs
+            device_id = device_id_sanitized.replace("_", ":")
 
-                    payload = msg.payload.decode()
-                    logger.info(
-                        f"[MQTTManager] Received action command: {device_id}/{action_id} payload={payload}"
-                    )
+            payload = message.text
+            logger.info(
+                f"[MQTTManager] Received action command: {device_id}/{action_id} payload={payload}"
+            )
 
-                    if payload == "EXECUTE":
-                        await callback(device_id, action_id)
-            except Exception as e:
-                logger.error(f"[MQTTManager] Error handling action command: {e}")
+            if payload == "EXECUTE":
+                await callback(device_id, action_id)
 
-        if IS_WINDOWS:
-            # Windows: paho-mqtt synchronous callback
-            def on_message_sync(client, userdata, msg):
-                """Sync wrapper for Windows"""
-                try:
-                    # Run async callback in event loop (thread-safe)
-                    if self._event_loop:
-                        asyncio.run_coroutine_threadsafe(
-                            on_message_async(client, userdata, msg), self._event_loop
-                        )
-                    else:
-                        logger.error(
-                            "[MQTTManager] Event loop not available for async callback"
-                        )
-                except Exception as e:
-                    logger.error(f"[MQTTManager] Error in sync message handler: {e}")
-
-            self.client.on_message = on_message_sync
-            logger.info("[MQTTManager] Action command callback registered (Windows)")
-        else:
-            # Linux: aiomqtt async callback handled differently
-            # Store callback for manual message loop processing
-            self._action_callback = callback
-            logger.info("[MQTTManager] Action command callback registered (Linux)")
+        self._add_callback_route(
+            "action_command", callback, ACTION_COMMAND_TOPIC_FILTER, on_action_command
+        )
+        logger.info("[MQTTManager] Action command callback registered")
 
     # ========== Companion App Communication Methods ==========
 
@@ -1098,31 +1155,19 @@ class MQTTManager:
         Args:
             callback: Function to call when status update received
         """
-        if IS_WINDOWS:
 
-            def on_message_sync(client, userdata, message):
-                import re
-
-                topic = message.topic
-                # Match: visual_mapper/{device_id}/status
-                match = re.match(r"visual_mapper/([^/]+)/status", topic)
-                if match:
-                    device_id = match.group(1)
-                    try:
-                        status_data = json.loads(message.payload.decode())
-                        callback(device_id, status_data)
-                    except Exception as e:
-                        logger.error(
-                            f"[MQTTManager] Error processing companion status: {e}"
-                        )
+        def on_status(message: InboundMessage):
+            return callback(message.levels[1], message.json())
 
-            # Replace existing on_message handler or chain them
-            self.client.on_message = on_message_sync
-            logger.info("[MQTTManager] Companion status callback registered (Windows)")
-        else:
-            # Linux: Store callback for manual message loop processing
-            self._companion_status_callback = callback
-            logger.info("[MQTTManager] Companion status callback registered (Linux)")
+        # Only the latest status matters - drop stale ones under load
+        self._add_callback_route(
+            "companion_status",
+            callback,
+            COMPANION_STATUS_TOPIC_FILTER,
+            on_status,
+            policy=POLICY_DROP_OLDEST,
+        )
+        logger.info("[MQTTManager] Companion status callback registered")
 
     def set_flow_result_callback(self, callback):
         """
@@ -1140,28 +1185,36 @@ class MQTTManager:
         Args:
             callback: Function to call when flow result received
         """
-        if IS_WINDOWS:
+        # Results are routed by _handle_flow_result_message
+        if callback not in self._flow_result_callbacks:
+            self._flow_result_callbacks.append(callback)
+        logger.info("[MQTTManager] Flow result callback registered")
 
-            def on_message_sync(client, userdata, message):
-                import re
-
-                topic = message.topic
-                # Match: visual_mapper/{device_id}/flow/{flow_id}/result
-                match = re.match(r"visual_mapper/([^/]+)/flow/([^/]+)/result", topic)
-                if match:
-                    device_id = match.group(1)
-                    flow_id = match.group(2)
-                    try:
-                        result_data = json.loads(message.payload.decode())
-                        callback(device_id, flow_id, result_data)
-                    except Exception as e:
-                        logger.error(f"[MQTTManager] Error processing flow result: {e}")
-
-            self.client.on_message = on_message_sync
-            logger.info("[MQTTManager] Flow result callback registered (Windows)")
-        else:
-            self._flow_result_callback = callback
-            logger.info("[MQTTManager] Flow result callback registered (Linux)")
+    def _handle_flow_result_message(self, message: InboundMessage):
+        """Resolve the waiting execute_flow_and_wait() call, then notify the callback"""
+        device_id, flow_id = message.levels[1], message.levels[3]
+
+        try:
+            result_data = message.json()
+        except Exception as e:
+            logger.error(f"[MQTTManager] Error processing flow result: {e}")
+            return
+        if not isinstance(result_data, dict):
+            logger.error(
+                f"[MQTTManager] Ignoring non-object flow result on {message.topic}"
+            )
+            return
+
+        request_id = result_data.get("request_id")
+        future = self._pending_flow_results.get(request_id) if request_id else None
+        if future and not future.done():
+            future.set_result(result_data)
+
+        for callback in self._flow_result_callbacks:
+            try:
+                callback(device_id, flow_id, result_data)
+            except Exception as e:
+                logger.error(f"[MQTTManager] Flow result callback error: {e}")
 
     def set_gesture_result_callback(self, callback):
         """
@@ -1178,29 +1231,14 @@ class MQTTManager:
         Args:
             callback: Function to call when gesture result received
         """
-        if IS_WINDOWS:
 
-            def on_message_sync(client, userdata, message):
-                import re
-
-                topic = message.topic
-                # Match: visual_mapper/{device_id}/gesture/result
-                match = re.match(r"visual_mapper/([^/]+)/gesture/result", topic)
-                if match:
-                    device_id = match.group(1)
-                    try:
-                        result_data = json.loads(message.payload.decode())
-                        callback(device_id, result_data)
-                    except Exception as e:
-                        logger.error(
-                            f"[MQTTManager] Error processing gesture result: {e}"
-                        )
+        def on_gesture_result(message: InboundMessage):
+            return callback(message.levels[1], message.json())
 
-            self.client.on_message = on_message_sync
-            logger.info("[MQTTManager] Gesture result callback registered (Windows)")
-        else:
-            self._gesture_result_callback = callback
-            logger.info("[MQTTManager] Gesture result callback registered (Linux)")
+        self._add_callback_route(
+            "gesture_result", callback, GESTURE_RESULT_TOPIC_FILTER, on_gesture_result
+        )
+        logger.info("[MQTTManager] Gesture result callback registered")
 
     def set_navigation_learn_callback(self, callback):
         """
@@ -1214,39 +1252,20 @@ class MQTTManager:
         Args:
             callback: Async function to call when navigation learn message received
         """
-        if IS_WINDOWS:
 
-            def on_message_sync(client, userdata, message):
-                import re
-
-                topic = message.topic
-                # Match: visual_mapper/{device_id}/navigation/learn
-                match = re.match(r"visual_mapper/([^/]+)/navigation/learn", topic)
-                if match:
-                    device_id = match.group(1)
-                    try:
-                        payload = message.payload.decode()
-                        # Run async callback in event loop (thread-safe)
-                        if self._event_loop:
-                            import asyncio
-
-                            asyncio.run_coroutine_threadsafe(
-                                callback(device_id, payload), self._event_loop
-                            )
-                        else:
-                            logger.error(
-                                "[MQTTManager] Event loop not available for navigation learn callback"
-                            )
-                    except Exception as e:
-                        logger.error(
-                            f"[MQTTManager] Error processing navigation learn message: {e}"
-                        )
-
-            self.client.on_message = on_message_sync
-            logger.info("[MQTTManager] Navigation learn callback registered (Windows)")
-        else:
-            self._navigation_learn_callback = callback
-            logger.info("[MQTTManager] Navigation learn callback registered (Linux)")
+        async def on_navigation_learn(message: InboundMessage):
+            await callback(message.levels[1], message.text)
+
+        # Learning data is best effort - drop the oldest under sustained load
+        self._add_callback_route(
+            "navigation_learn",
+            callback,
+            NAVIGATION_LEARN_TOPIC_FILTER,
+            on_navigation_learn,
+            maxsize=500,
+            policy=POLICY_DROP_OLDEST,
+        )
+        logger.info("[MQTTManager] Navigation learn callback registered")
 
     async def subscribe_to_generated_flows(self) -> bool:
         """
@@ -1260,7 +1279,7 @@ class MQTTManager:
             return False
 
         try:
-            topic = "visualmapper/flows/generated"
+            topic = GENERATED_FLOWS_TOPIC
 
             if IS_WINDOWS:
                 self.client.subscribe(topic)
@@ -1286,27 +1305,18 @@ class MQTTManager:
         Args:
             callback: Function to call when a generated flow is received
         """
-        if IS_WINDOWS:
 
-            def on_message_sync(client, userdata, message):
-                topic = message.topic
-                if topic == "visualmapper/flows/generated":
-                    try:
-                        flow_data = json.loads(message.payload.decode())
-                        logger.info(
-                            f"[MQTTManager] Received generated flow: {flow_data.get('flow_id', 'unknown')}"
-                        )
-                        callback(flow_data)
-                    except Exception as e:
-                        logger.error(
-                            f"[MQTTManager] Error processing generated flow: {e}"
-                        )
+        def on_generated_flow(message: InboundMessage):
+            flow_data = message.json()
+            logger.info(
+                f"[MQTTManager] Received generated flow: {flow_data.get('flow_id', 'unknown')}"
+            )
+            return callback(flow_data)
 
-            self.client.on_message = on_message_sync
-            logger.info("[MQTTManager] Generated flow callback registered (Windows)")
-        else:
-            self._generated_flow_callback = callback
-            logger.info("[MQTTManager] Generated flow callback registered (Linux)")
+        self._add_callback_route(
+            "generated_flow", callback, GENERATED_FLOWS_TOPIC, on_generated_flow
+        )
+        logger.info("[MQTTManager] Generated flow callback registered")
 
     async def publish_flow_command(
         self, device_id: str, flow_id: str, payload: dict
@@ -1348,6 +1358,53 @@ class MQTTManager:
             logger.error(f"[MQTTManager] Failed to publish flow command: {e}")
             return False
 
+    async def execute_flow_and_wait(
+        self, device_id: str, flow_id: str, payload: dict, timeout: float
+    ) -> Dict[str, Any]:
+        """
+        Send a flow to the companion app and wait for its result.
+
+        A unique request_id is added to the payload; the companion echoes it
+        in the result so concurrent executions (same or different devices)
+        are matched to the right caller.
+
+        Args:
+            device_id: Android device ID
+            flow_id: Flow ID to execute
+            payload: Flow execution parameters (dict)
+            timeout: Maximum seconds to wait for the result
+
+        Returns:
+            Result dict published by the companion app
+
+        Raises:
+            ConnectionError: If the command could not be published
+            asyncio.TimeoutError: If no result arrived within timeout
+        """
+        if not self._connected or not self.client:
+            raise ConnectionError("Not connected to MQTT broker")
+
+        request_id = str(uuid.uuid4())
+        future = asyncio.get_running_loop().create_future()
+        self._pending_flow_results[request_id] = future
+
+        try:
+            sanitized_device = self._sanitize_device_id(device_id)
+            result_topic = f"visual_mapper/{sanitized_device}/flow/{flow_id}/result"
+            if IS_WINDOWS:
+                self.client.subscribe(result_topic)
+            else:
+                await self.client.subscribe(result_topic)
+
+            if not await self.publish_flow_command(
+                device_id, flow_id, {**payload, "request_id": request_id}
+            ):
+                raise ConnectionError(f"Failed to publish flow command for {flow_id}")
+
+            return await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            self._pending_flow_results.pop(request_id, None)
+
     async def publish_gesture_command(
         self, device_id: str, gesture_type: str, params: dict
     ) -> bool:
@@ -1434,16 +1491,10 @@ class MQTTManager:
             )
             return None
 
-        import uuid
-
         request_id = str(uuid.uuid4())
 
-        # Create a Future to wait for the response
-        response_future = asyncio.Future()
-
-        # Store pending request
-        if not hasattr(self, "_pending_ui_requests"):
-            self._pending_ui_requests = {}
+        # Create a Future to wait for the response (resolved by the router)
+        response_future = asyncio.get_running_loop().create_future()
         self._pending_ui_requests[request_id] = response_future
 
         try:
@@ -1500,52 +1551,20 @@ class MQTTManager:
             # Clean up pending request
             self._pending_ui_requests.pop(request_id, None)
 
-    def _setup_ui_response_handler(self):
-        """
-        Setup handler for UI tree responses from companion app.
-        Called once during initialization or first UI request.
-        """
-        if hasattr(self, "_ui_response_handler_setup"):
+    def _handle_ui_response_message(self, message: InboundMessage):
+        """Resolve the waiting request_ui_tree() call"""
+        try:
+            response_data = message.json()
+        except Exception as e:
+            logger.error(f"[MQTTManager] Error processing UI response: {e}")
+            return
+        if not isinstance(response_data, dict):
             return
 
-        if IS_WINDOWS:
-            # Store the original callback if any
-            original_callback = getattr(self.client, "on_message", None)
-
-            def on_message_with_ui(client, userdata, message):
-                import re
-
-                topic = message.topic
-
-                # Check for UI response
-                match = re.match(r"visual_mapper/([^/]+)/ui/response", topic)
-                if match:
-                    try:
-                        response_data = json.loads(message.payload.decode())
-                        request_id = response_data.get("request_id")
-
-                        if request_id and hasattr(self, "_pending_ui_requests"):
-                            future = self._pending_ui_requests.get(request_id)
-                            if future and not future.done():
-                                # Set result in the event loop thread
-                                if self._event_loop:
-                                    self._event_loop.call_soon_threadsafe(
-                                        future.set_result, response_data
-                                    )
-                    except Exception as e:
-                        logger.error(f"[MQTTManager] Error processing UI response: {e}")
-
-                # Call original callback if exists
-                if original_callback:
-                    original_callback(client, userdata, message)
-
-            self.client.on_message = on_message_with_ui
-            self._ui_response_handler_setup = True
-            logger.info("[MQTTManager] UI response handler registered (Windows)")
-        else:
-            # Linux: Store for manual message loop
-            self._ui_response_handler_setup = True
-            logger.info("[MQTTManager] UI response handler registered (Linux)")
+        request_id = response_data.get("request_id")
+        future = self._pending_ui_requests.get(request_id) if request_id else None
+        if future and not future.done():
+            future.set_result(response_data)
 
     async def subscribe_ui_topics(self, device_id: str) -> bool:
         """
@@ -1565,9 +1584,6 @@ class MQTTManager:
             return False
 
         try:
-            # Setup response handler first
-            self._setup_ui_response_handler()
-
             sanitized_device = self._sanitize_device_id(device_id)
             topic = f"visual_mapper/{sanitized_device}/ui/response"
 
@@ -1619,58 +1635,23 @@ class MQTTManager:
             return False
 
         try:
-            topic = "visualmapper/devices/announce"
+            topic = DEVICE_ANNOUNCE_TOPIC
 
-            if IS_WINDOWS:
-
-                def on_announcement(client, userdata, message):
-                    try:
-                        payload = message.payload.decode()
-                        if not payload or payload.strip() == "":
-                            # Empty payload = device withdrew announcement
-                            logger.info("[MQTTManager] Device withdrew announcement")
-                            return
-
-                        announcement = json.loads(payload)
-                        device_id = (
-                            announcement.get("device_id")
-                            or f"{announcement.get('ip')}:{announcement.get('adb_port')}"
-                        )
-                        logger.info(
-                            f"[MQTTManager] Device announced: {device_id} ({announcement.get('model')})"
-                        )
-
-                        # Extract and store device capabilities (Capability Handshake)
-                        # Android companion app sends capabilities list in announcement
-                        capabilities = announcement.get("capabilities", [])
-                        if capabilities:
-                            self.set_device_capabilities(device_id, capabilities)
-                            logger.info(
-                                f"[MQTTManager] Device {device_id} capabilities: {capabilities}"
-                            )
-
-                        # Store announced device for API access
-                        if not hasattr(self, "_announced_devices"):
-                            self._announced_devices = {}
-                        self._announced_devices[device_id] = announcement
-
-                        callback(announcement)
-                    except Exception as e:
-                        logger.error(
-                            f"[MQTTManager] Error processing device announcement: {e}"
-                        )
+            async def on_announcement(message: InboundMessage):
+                announcement = self._handle_device_announcement(message)
+                if announcement is not None:
+                    result = callback(announcement)
+                    if asyncio.iscoroutine(result):
+                        await result
 
+            self._add_callback_route(
+                "device_announcement", callback, topic, on_announcement
+            )
+            if IS_WINDOWS:
                 self.client.subscribe(topic)
-                self.client.message_callback_add(topic, on_announcement)
-                logger.info(
-                    f"[MQTTManager] Subscribed to device announcements: {topic} (Windows)"
-                )
             else:
                 await self.client.subscribe(topic)
-                self._device_announcement_callback = callback
-                logger.info(
-                    f"[MQTTManager] Subscribed to device announcements: {topic} (Linux)"
-                )
+            logger.info(f"[MQTTManager] Subscribed to device announcements: {topic}")
 
             return True
 
@@ -1680,6 +1661,39 @@ class MQTTManager:
             )
             return False
 
+    def _handle_device_announcement(
+        self, message: InboundMessage
+    ) -> Optional[Dict[str, Any]]:
+        """Record an announcement (device info, capabilities); None if withdrawn"""
+        if not message.text.strip():
+            # Empty payload = device withdrew announcement
+            logger.info("[MQTTManager] Device withdrew announcement")
+            return None
+
+        announcement = message.json()
+        device_id = (
+            announcement.get("device_id")
+            or f"{announcement.get('ip')}:{announcement.get('adb_port')}"
+        )
+        logger.info(
+            f"[MQTTManager] Device announced: {device_id} ({announcement.get('model')})"
+        )
+
+        # Extract and store device capabilities (Capability Handshake)
+        # Android companion app sends capabilities list in announcement
+        capabilities = announcement.get("capabilities", [])
+        if capabilities:
+            self.set_device_capabilities(device_id, capabilities)
+            logger.info(
+                f"[MQTTManager] Device {device_id} capabilities: {capabilities}"
+            )
+
+        # Store announced device for API access
+        if not hasattr(self, "_announced_devices"):
+            self._announced_devices = {}
+        self._announced_devices[device_id] = announcement
+        return announcement
+
     def get_announced_devices(self) -> list:
         """
         Get list of devices that have announced themselves.
@@ -0,0 +1,349 @@
+"""
+Topic Router - Single-consumer dispatch of inbound MQTT messages
+
+One consumer per connection (the aiomqtt message loop on Linux, the paho
+network thread on Windows) hands every message to TopicRouter.dispatch. Routes
+register against MQTT wildcard filters ("+", "#") stored in a topic trie, so
+matching costs one walk over the topic levels no matter how many routes
+exist. Each route has a bounded queue drained by its own worker task, with a
+per-route overflow policy:
+
+- block: the consumer waits for space (backpressure, nothing is lost)
+- drop_oldest: the oldest queued message is discarded (latest state wins)
+- drop_newest: the incoming message is discarded
+
+Payloads are decoded (UTF-8 / JSON) at most once per message, however many
+routes receive it.
+"""
+
+import asyncio
+import concurrent.futures
+import inspect
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+POLICY_BLOCK = "block"
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_DROP_NEWEST = "drop_newest"
+
+# Latency samples kept per route for percentile stats
+LATENCY_SAMPLES = 1024
+
+
+class InboundMessage:
+    """A received message, shared (read-only) by every route it matches"""
+
+    __slots__ = ("topic", "payload", "received_at", "_levels", "_text", "_json")
+
+    _UNSET = object()
+
+    def __init__(self, topic: str, payload: Union[bytes, bytearray, str, None]):
+        self.topic = topic
+        self.payload = payload if payload is not None else b""
+        self.received_at = time.perf_counter()
+        self._levels: Optional[List[str]] = None
+        self._text: Optional[str] = None
+        self._json: Any = self._UNSET
+
+    @property
+    def levels(self) -> List[str]:
+        """Topic split on '/' (e.g. levels[1] is the device in visual_mapper/{device}/...)"""
+        if self._levels is None:
+            self._levels = self.topic.split("/")
+        return self._levels
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            payload = self.payload
+            self._text = (
+                payload if isinstance(payload, str) else bytes(payload).decode()
+            )
+        return self._text
+
+    def json(self) -> Any:
+        """Decoded JSON payload; decoded once, errors are re-raised on each call"""
+        if self._json is self._UNSET:
+            try:
+                self._json = json.loads(self.text)
+            except Exception as e:
+                self._json = e
+        if isinstance(self._json, Exception):
+            raise self._json
+        return self._json
+
+
+MessageHandler = Callable[[InboundMessage], Optional[Awaitable[None]]]
+
+
+class _Route:
+    """A handler, its bounded queue and delivery stats"""
+
+    def __init__(
+        self,
+        name: str,
+        topic_filter: str,
+        handler: MessageHandler,
+        maxsize: int,
+        policy: str,
+    ):
+        if policy not in (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_DROP_NEWEST):
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.name = name
+        self.topic_filter = topic_filter
+        self.handler = handler
+        self.maxsize = maxsize
+        self.policy = policy
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+
+        self.delivered = 0
+        self.handled = 0
+        self.dropped = 0
+        self.errors = 0
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._max_latency = 0.0
+
+    def start(self):
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+        self.task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+        self.task = None
+        self.queue = None
+
+    async def put(self, message: InboundMessage):
+        queue = self.queue
+        if queue is None:
+            return
+        self.delivered += 1
+        if self.policy == POLICY_BLOCK:
+            await queue.put(message)
+            return
+        if queue.full():
+            self.dropped += 1
+            if self.policy == POLICY_DROP_NEWEST:
+                return
+            queue.get_nowait()
+            queue.task_done()
+        queue.put_nowait(message)
+
+    async def _run(self):
+        queue = self.queue
+        while True:
+            message = await queue.get()
+            try:
+                result = self.handler(message)
+                if inspect.isawaitable(result):
+                    await result
+                self.handled += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(
+                    f"[TopicRouter] Handler '{self.name}' failed on {message.topic}: {e}"
+                )
+            finally:
+                queue.task_done()
+            latency = time.perf_counter() - message.received_at
+            self._latencies.append(latency)
+            if latency > self._max_latency:
+                self._max_latency = latency
+
+    def get_stats(self) -> Dict[str, Any]:
+        samples = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            if not samples:
+                return 0.0
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 3)
+
+        return {
+            "filter": self.topic_filter,
+            "policy": self.policy,
+            "queued": self.queue.qsize() if self.queue else 0,
+            "maxsize": self.maxsize,
+            "delivered": self.delivered,
+            "handled": self.handled,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "latency_ms": {
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": round(self._max_latency * 1000, 3),
+            },
+        }
+
+
+class _TopicTrieNode:
+    __slots__ = ("children", "routes", "multi_level_routes")
+
+    def __init__(self):
+        self.children: Dict[str, "_TopicTrieNode"] = {}
+        self.routes: List[_Route] = []  # Filter ends at this level
+        self.multi_level_routes: List[_Route] = []  # Filter ends with "#" here
+
+
+class TopicRouter:
+    """
+    Routes inbound messages to handlers registered on MQTT topic filters
+
+    Routes are keyed by name; adding a route with an existing name replaces
+    it (set_*_callback style registration). Must be used from one event loop.
+    """
+
+    def __init__(self):
+        self._root = _TopicTrieNode()
+        self._routes: Dict[str, _Route] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.messages_received = 0
+        self.messages_unrouted = 0
+
+    def add_route(
+        self,
+        name: str,
+        topic_filter: str,
+        handler: MessageHandler,
+        maxsize: int = 100,
+        policy: str = POLICY_BLOCK,
+    ):
+        """
+        Register handler(message) for topics matching topic_filter.
+
+        Args:
+            name: Route name (replaces an existing route of that name)
+            topic_filter: MQTT filter, may contain "+" and a trailing "#"
+            handler: Sync or async callable taking an InboundMessage
+            maxsize: Queue capacity
+            policy: POLICY_BLOCK, POLICY_DROP_OLDEST or POLICY_DROP_NEWEST
+        """
+        self.remove_route(name)
+        route = _Route(name, topic_filter, handler, maxsize, policy)
+
+        levels = topic_filter.split("/")
+        node = self._root
+        for i, level in enumerate(levels):
+            if level == "#":
+                if i != len(levels) - 1:
+                    raise ValueError(f"'#' must be the last level: {topic_filter}")
+                node.multi_level_routes.append(route)
+                break
+            node = node.children.setdefault(level, _TopicTrieNode())
+        else:
+            node.routes.append(route)
+
+        self._routes[name] = route
+        if self._loop is not None:
+            route.start()
+        logger.debug(f"[TopicRouter] Route '{name}' -> {topic_filter} ({policy})")
+
+    def remove_route(self, name: str) -> bool:
+        route = self._routes.pop(name, None)
+        if route is None:
+            return False
+        route.stop()
+        self._unlink(self._root, route.topic_filter.split("/"), route)
+        return True
+
+    def _unlink(self, node: _TopicTrieNode, levels: List[str], route: _Route):
+        if levels == ["#"]:
+            node.multi_level_routes.remove(route)
+            return
+        if not levels:
+            node.routes.remove(route)
+            return
+        child = node.children[levels[0]]
+        self._unlink(child, levels[1:], route)
+        if not (child.children or child.routes or child.multi_level_routes):
+            del node.children[levels[0]]
+
+    def match(self, topic: str) -> List[_Route]:
+        """Routes whose filter matches topic (each route at most once)"""
+        levels = topic.split("/")
+        matched: List[_Route] = []
+        # Wildcards at the first level don't match $-topics (e.g. $SYS)
+        skip_wildcards = topic.startswith("$")
+        nodes = [self._root]
+        for i, level in enumerate(levels):
+            next_nodes = []
+            for node in nodes:
+                if not (skip_wildcards and i == 0):
+                    matched.extend(node.multi_level_routes)
+                    child = node.children.get("+")
+                    if child is not None:
+                        next_nodes.append(child)
+                child = node.children.get(level)
+                if child is not None:
+                    next_nodes.append(child)
+            nodes = next_nodes
+            if not nodes:
+                return matched
+        for node in nodes:
+            matched.extend(node.routes)
+            # "a/#" also matches "a"
+            matched.extend(node.multi_level_routes)
+        return matched
+
+    def start(self):
+        """Start route workers on the running event loop"""
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        for route in self._routes.values():
+            route.start()
+
+    def stop(self):
+        """Stop route workers (routes stay registered for the next start)"""
+        for route in self._routes.values():
+            route.stop()
+        self._loop = None
+
+    async def dispatch(self, topic: str, payload) -> int:
+        """Queue a message for every matching route; returns the match count"""
+        self.messages_received += 1
+        routes = self.match(topic)
+        if not routes:
+            self.messages_unrouted += 1
+            return 0
+        message = InboundMessage(topic, payload)
+        for route in routes:
+            await route.put(message)
+        return len(routes)
+
+    def dispatch_threadsafe(self, topic: str, payload):
+        """
+        Dispatch from a foreign thread (paho network thread).
+
+        Waits until every route has accepted the message, so block-policy
+        routes push back on the network thread instead of piling up.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            logger.warning(f"[TopicRouter] Not started, dropping message on {topic}")
+            return
+        future = asyncio.run_coroutine_threadsafe(self.dispatch(topic, payload), loop)
+        while True:
+            try:
+                future.result(timeout=1.0)
+                return
+            except concurrent.futures.TimeoutError:
+                # Don't hold the network thread forever once the router stops
+                if self._loop is None:
+                    future.cancel()
+                    return
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "messages_received": self.messages_received,
+            "messages_unrouted": self.messages_unrouted,
+            "routes": {name: route.get_stats() for name, route in self._routes.items()},
+        }
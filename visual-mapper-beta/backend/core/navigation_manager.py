@@ -5,7 +5,7 @@ Core manager for app navigation graphs
 Handles:
 - CRUD operations for navigation graphs
 - Screen identification and matching
-- Pathfinding (Dijkstra's algorithm)
+- Pathfinding (Dijkstra's algorithm over a cached, compiled graph)
 - Learning from recordings and mining
 """
 
@@ -13,7 +13,8 @@ import os
 import json
 import hashlib
 import logging
-from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from datetime import datetime
 from pathlib import Path
 import heapq
@@ -29,9 +30,176 @@ from ml_components.navigation_models import (
     extract_ui_landmarks,
     generate_transition_id,
 )
+from utils.screen_fingerprint import FingerprintIndex, ScreenFingerprint
 
 logger = logging.getLogger(__name__)
 
+# Shortest-path trees kept per package (one per source screen)
+MAX_CACHED_PATH_TREES = 64
+
+_INF = float("inf")
+
+
+class _RoutingIndex:
+    """
+    Compiled form of one navigation graph for pathfinding and screen lookup
+
+    Screens get integer node ids in insertion order and every transition is
+    an edge with parallel endpoint/cost lists. Shortest-path trees are cached
+    per source screen (LRU) and only dropped when an edge change could alter
+    them, so repeated find_path calls are a walk up a predecessor list.
+    """
+
+    def __init__(
+        self,
+        graph: NavigationGraph,
+        cost_fn: Callable[[ScreenTransition], float],
+        max_trees: int = MAX_CACHED_PATH_TREES,
+    ):
+        self.graph = graph
+        self._cost_fn = cost_fn
+        self.max_trees = max_trees
+
+        self.screen_ids: List[str] = []
+        self.node_ids: Dict[str, int] = {}
+        self.by_activity: Dict[str, str] = {}  # activity -> first screen_id
+        self.adjacency: List[List[int]] = []  # node -> edge ids, graph order
+
+        self.edges: List[Optional[ScreenTransition]] = []
+        self.edge_source: List[int] = []
+        self.edge_target: List[int] = []
+        self.edge_cost: List[float] = []
+        self.edge_ids: Dict[str, int] = {}  # transition_id -> first edge id
+
+        # Screens referenced by transitions that are not in graph.screens
+        self.dangling: Set[str] = set()
+
+        # source node -> (distances, predecessor edge per node)
+        self._trees: "OrderedDict[int, Tuple[List[float], List[int]]]" = OrderedDict()
+
+        for screen_id, screen in graph.screens.items():
+            self.add_node(screen_id, screen.activity)
+        for transition in graph.transitions:
+            self.add_edge(transition)
+
+    def add_node(self, screen_id: str, activity: str):
+        """Register a new screen (isolated nodes cannot change cached trees)"""
+        if screen_id in self.node_ids:
+            return
+        self.node_ids[screen_id] = len(self.screen_ids)
+        self.screen_ids.append(screen_id)
+        self.adjacency.append([])
+        self.by_activity.setdefault(activity, screen_id)
+
+    def add_edge(self, transition: ScreenTransition):
+        """Register a new transition and drop trees it could shorten"""
+        u = self.node_ids.get(transition.source_screen_id)
+        v = self.node_ids.get(transition.target_screen_id)
+        if u is None or v is None:
+            if u is None:
+                self.dangling.add(transition.source_screen_id)
+            if v is None:
+                self.dangling.add(transition.target_screen_id)
+            return
+
+        edge = len(self.edges)
+        cost = self._cost_fn(transition)
+        self.edges.append(transition)
+        self.edge_source.append(u)
+        self.edge_target.append(v)
+        self.edge_cost.append(cost)
+        self.edge_ids.setdefault(transition.transition_id, edge)
+        self.adjacency[u].append(edge)
+
+        self._drop_trees(lambda dist, pred: self._improves(dist, u, v, cost))
+
+    def reweight_edge(self, transition_id: str):
+        """Recompute an edge cost after its statistics changed"""
+        edge = self.edge_ids.get(transition_id)
+        if edge is None:
+            return
+        cost = self._cost_fn(self.edges[edge])
+        if cost == self.edge_cost[edge]:
+            return
+        self.edge_cost[edge] = cost
+        u, v = self.edge_source[edge], self.edge_target[edge]
+
+        self._drop_trees(
+            lambda dist, pred: (v < len(pred) and pred[v] == edge)
+            or self._improves(dist, u, v, cost)
+        )
+
+    def remove_edges(self, transition_id: str):
+        """Remove every edge for a transition and drop trees that used one"""
+        removed = set()
+        for edge, transition in enumerate(self.edges):
+            if transition is not None and transition.transition_id == transition_id:
+                self.adjacency[self.edge_source[edge]].remove(edge)
+                self.edges[edge] = None
+                removed.add(edge)
+        if not removed:
+            return
+        self.edge_ids.pop(transition_id, None)
+
+        targets = {self.edge_target[edge] for edge in removed}
+        self._drop_trees(
+            lambda dist, pred: any(
+                v < len(pred) and pred[v] in removed for v in targets
+            )
+        )
+
+    @staticmethod
+    def _improves(dist: List[float], u: int, v: int, cost: float) -> bool:
+        # <= because an equal-cost alternative can change tie-breaking
+        du = dist[u] if u < len(dist) else _INF
+        dv = dist[v] if v < len(dist) else _INF
+        return du + cost <= dv
+
+    def _drop_trees(self, affected: Callable[[List[float], List[int]], bool]):
+        stale = [
+            source
+            for source, (dist, pred) in self._trees.items()
+            if affected(dist, pred)
+        ]
+        for source in stale:
+            del self._trees[source]
+
+    def shortest_path_tree(self, source: int) -> Tuple[List[float], List[int]]:
+        """Distances and predecessor edges from a source node (cached)"""
+        tree = self._trees.get(source)
+        if tree is not None:
+            self._trees.move_to_end(source)
+            return tree
+
+        screen_ids = self.screen_ids
+        adjacency = self.adjacency
+        edge_target = self.edge_target
+        edge_cost = self.edge_cost
+
+        dist = [_INF] * len(screen_ids)
+        pred = [-1] * len(screen_ids)
+        dist[source] = 0
+
+        # Screen id as tie-breaker keeps the same pop order as string-keyed Dijkstra
+        pq = [(0, screen_ids[source], source)]
+        while pq:
+            current_dist, _, current = heapq.heappop(pq)
+            if current_dist > dist[current]:
+                continue
+            for edge in adjacency[current]:
+                neighbor = edge_target[edge]
+                distance = current_dist + edge_cost[edge]
+                if distance < dist[neighbor]:
+                    dist[neighbor] = distance
+                    pred[neighbor] = edge
+                    heapq.heappush(pq, (distance, screen_ids[neighbor], neighbor))
+
+        tree = (dist, pred)
+        self._trees[source] = tree
+        if len(self._trees) > self.max_trees:
+            self._trees.popitem(last=False)
+        return tree
+
 
 class NavigationManager:
     """
@@ -54,6 +222,13 @@ class NavigationManager:
         # In-memory cache of loaded graphs
         self._graph_cache: Dict[str, NavigationGraph] = {}
 
+        # Per-package screen fingerprint indexes (updated in place by
+        # add_screen/set_screen_fingerprint, rebuilt lazily after save_graph)
+        self._fingerprint_indexes: Dict[str, FingerprintIndex] = {}
+
+        # Per-package compiled graphs for pathfinding and screen lookup
+        self._routing_indexes: Dict[str, _RoutingIndex] = {}
+
         logger.info(
             f"[NavigationManager] Initialized with config_dir: {self.config_dir}"
         )
@@ -167,15 +342,41 @@ class NavigationManager:
         """
         Save navigation graph
 
+        The graph may have been edited arbitrarily, so its routing index is
+        rebuilt on next use.
+
         Args:
             graph: NavigationGraph to save
 
         Returns:
             True if successful
         """
+        self._routing_indexes.pop(graph.package, None)
+        self._fingerprint_indexes.pop(graph.package, None)
+        return self._persist_graph(graph)
+
+    def _persist_graph(self, graph: NavigationGraph) -> bool:
+        """Cache and save a graph whose routing and fingerprint indexes are up to date"""
         self._graph_cache[graph.package] = graph
         return self._save_graph_to_file(graph)
 
+    def _get_routing_index(self, graph: NavigationGraph) -> _RoutingIndex:
+        """Get (or compile) the routing index for a graph"""
+        index = self._routing_indexes.get(graph.package)
+        if index is None or index.graph is not graph:
+            index = _RoutingIndex(graph, self._calculate_transition_cost)
+            self._routing_indexes[graph.package] = index
+        return index
+
+    def _cached_routing_index(
+        self, graph: NavigationGraph
+    ) -> Optional[_RoutingIndex]:
+        """Routing index for a graph if one is compiled (for incremental updates)"""
+        index = self._routing_indexes.get(graph.package)
+        if index is not None and index.graph is graph:
+            return index
+        return None
+
     def delete_graph(self, package: str) -> bool:
         """
         Delete navigation graph
@@ -189,6 +390,8 @@ class NavigationManager:
         # Remove from cache
         if package in self._graph_cache:
             del self._graph_cache[package]
+        self._fingerprint_indexes.pop(package, None)
+        self._routing_indexes.pop(package, None)
 
         # Delete file
         path = self._get_graph_path(package)
@@ -234,6 +437,7 @@ class NavigationManager:
         display_name: str = None,
         learned_from: str = "recording",
         is_home_screen: bool = False,
+        fingerprint: str = None,
     ) -> ScreenNode:
         """
         Add or update a screen in the navigation graph
@@ -245,6 +449,7 @@ class NavigationManager:
             display_name: Human-readable name
             learned_from: How screen was discovered
             is_home_screen: Is this the app's home screen?
+            fingerprint: Serialized ScreenFingerprint of the screen, if captured
 
         Returns:
             The created/updated ScreenNode
@@ -272,6 +477,9 @@ class NavigationManager:
             screen.visit_count += 1
             if display_name:
                 screen.display_name = display_name
+            if fingerprint:
+                screen.fingerprint = fingerprint
+                self._index_fingerprint(package, screen_id, fingerprint)
             if is_home_screen:
                 screen.is_home_screen = True
                 graph.home_screen_id = screen_id
@@ -284,20 +492,31 @@ class NavigationManager:
                 display_name=display_name
                 or activity.split(".")[-1],  # Use class name as default
                 ui_landmarks=landmarks,
+                fingerprint=fingerprint,
                 learned_from=learned_from,
                 is_home_screen=is_home_screen,
                 visit_count=1,
             )
             graph.screens[screen_id] = screen
+            if fingerprint:
+                self._index_fingerprint(package, screen_id, fingerprint)
 
             if is_home_screen:
                 graph.home_screen_id = screen_id
 
+            index = self._cached_routing_index(graph)
+            if index is not None:
+                if screen_id in index.dangling:
+                    # Existing transitions now resolve; recompile on next use
+                    self._routing_indexes.pop(package, None)
+                else:
+                    index.add_node(screen_id, activity)
+
             logger.info(
                 f"[NavigationManager] Added screen: {screen.display_name} ({screen_id[:8]}...)"
             )
 
-        self.save_graph(graph)
+        self._persist_graph(graph)
         return screen
 
     def get_screen(self, package: str, screen_id: str) -> Optional[ScreenNode]:
@@ -307,8 +526,102 @@ class NavigationManager:
             return None
         return graph.screens.get(screen_id)
 
+    def set_screen_fingerprint(
+        self, package: str, screen_id: str, fingerprint: ScreenFingerprint
+    ) -> bool:
+        """
+        Store the fingerprint of a known screen
+
+        Args:
+            package: App package name
+            screen_id: Screen ID
+            fingerprint: Fingerprint of a frame showing the screen
+
+        Returns:
+            True if the screen exists and was updated
+        """
+        graph = self.get_graph(package)
+        if not graph or screen_id not in graph.screens:
+            return False
+
+        graph.screens[screen_id].fingerprint = fingerprint.to_string()
+        index = self._fingerprint_indexes.get(package)
+        if index is not None:
+            index.add(screen_id, fingerprint)
+        self._persist_graph(graph)
+        return True
+
+    def _index_fingerprint(self, package: str, screen_id: str, fingerprint: str):
+        """Add a serialized fingerprint to the package's index, if one is built"""
+        index = self._fingerprint_indexes.get(package)
+        if index is None:
+            return
+        try:
+            index.add(screen_id, ScreenFingerprint.from_string(fingerprint))
+        except Exception as e:
+            logger.debug(f"[NavigationManager] Bad fingerprint on {screen_id[:8]}: {e}")
+
+    def _get_fingerprint_index(self, package: str) -> Optional[FingerprintIndex]:
+        """Get (or build) the fingerprint index for a package's screens"""
+        index = self._fingerprint_indexes.get(package)
+        if index is not None:
+            return index
+
+        graph = self.get_graph(package)
+        if not graph:
+            return None
+
+        index = FingerprintIndex()
+        for screen_id, screen in graph.screens.items():
+            if not screen.fingerprint:
+                continue
+            try:
+                index.add(screen_id, ScreenFingerprint.from_string(screen.fingerprint))
+            except Exception as e:
+                logger.debug(
+                    f"[NavigationManager] Bad fingerprint on {screen_id[:8]}: {e}"
+                )
+        self._fingerprint_indexes[package] = index
+        return index
+
+    def find_screens_by_fingerprint(
+        self,
+        package: str,
+        fingerprint: ScreenFingerprint,
+        k: int = 1,
+        max_distance: Optional[int] = None,
+    ) -> List[Tuple[ScreenNode, int, float]]:
+        """
+        Find the known screens that look most like a fingerprinted frame
+
+        Args:
+            package: App package name
+            fingerprint: Fingerprint of the current frame
+            k: Maximum number of matches
+            max_distance: Optional Hamming distance cut-off (0-128)
+
+        Returns:
+            List of (ScreenNode, hamming_distance, similarity), closest first
+        """
+        index = self._get_fingerprint_index(package)
+        if not index:
+            return []
+
+        graph = self.get_graph(package)
+        return [
+            (graph.screens[screen_id], distance, similarity)
+            for screen_id, distance, similarity in index.nearest(
+                fingerprint, k=k, max_distance=max_distance
+            )
+            if screen_id in graph.screens
+        ]
+
     def identify_current_screen(
-        self, package: str, activity: str, ui_elements: List[Dict] = None
+        self,
+        package: str,
+        activity: str,
+        ui_elements: List[Dict] = None,
+        fingerprint: Optional[ScreenFingerprint] = None,
     ) -> Optional[ScreenNode]:
         """
         Identify which known screen matches the current state
@@ -317,6 +630,7 @@ class NavigationManager:
             package: App package name
             activity: Current activity name
             ui_elements: Current UI elements
+            fingerprint: Optional fingerprint of the current frame
 
         Returns:
             Matching ScreenNode or None
@@ -333,10 +647,18 @@ class NavigationManager:
         if screen_id in graph.screens:
             return graph.screens[screen_id]
 
+        # Visually closest screen of the same activity
+        if fingerprint is not None:
+            for screen, distance, _ in self.find_screens_by_fingerprint(
+                package, fingerprint, k=5, max_distance=24
+            ):
+                if screen.activity == activity:
+                    return screen
+
         # Try matching by activity alone (less precise)
-        for screen in graph.screens.values():
-            if screen.activity == activity:
-                return screen
+        fallback_id = self._get_routing_index(graph).by_activity.get(activity)
+        if fallback_id is not None:
+            return graph.screens.get(fallback_id)
 
         return None
 
@@ -383,6 +705,9 @@ class NavigationManager:
             # Update existing transition
             existing.usage_count += 1
             existing.last_used = datetime.now()
+            index = self._cached_routing_index(graph)
+            if index is not None:
+                index.reweight_edge(transition_id)
             logger.debug(
                 f"[NavigationManager] Updated transition: {transition_id[:8]}... (count: {existing.usage_count})"
             )
@@ -398,13 +723,46 @@ class NavigationManager:
             )
             graph.transitions.append(transition)
             existing = transition
+            index = self._cached_routing_index(graph)
+            if index is not None:
+                index.add_edge(transition)
             logger.info(
                 f"[NavigationManager] Added transition: {source_screen_id[:8]}... -> {target_screen_id[:8]}..."
             )
 
-        self.save_graph(graph)
+        self._persist_graph(graph)
         return existing
 
+    def remove_transition(self, package: str, transition_id: str) -> bool:
+        """
+        Remove a transition from the navigation graph
+
+        Args:
+            package: App package name
+            transition_id: Transition ID
+
+        Returns:
+            True if a transition was removed
+        """
+        graph = self.get_graph(package)
+        if not graph:
+            return False
+
+        original_count = len(graph.transitions)
+        graph.transitions = [
+            t for t in graph.transitions if t.transition_id != transition_id
+        ]
+        if len(graph.transitions) == original_count:
+            return False
+
+        index = self._cached_routing_index(graph)
+        if index is not None:
+            index.remove_edges(transition_id)
+
+        self._persist_graph(graph)
+        logger.info(f"[NavigationManager] Removed transition: {transition_id[:8]}...")
+        return True
+
     def get_transitions_from(
         self, package: str, screen_id: str
     ) -> List[ScreenTransition]:
@@ -457,7 +815,11 @@ class NavigationManager:
                         alpha * time_ms + (1 - alpha) * t.avg_transition_time_ms
                     )
 
-                self.save_graph(graph)
+                index = self._cached_routing_index(graph)
+                if index is not None:
+                    index.reweight_edge(transition_id)
+
+                self._persist_graph(graph)
                 return
 
     # =========================================================================
@@ -470,7 +832,7 @@ class NavigationManager:
         """
         Find the best path from one screen to another
 
-        Uses Dijkstra's algorithm weighted by:
+        Uses Dijkstra's algorithm (shortest-path trees cached per source) weighted by:
         - Success rate (higher = lower cost)
         - Average transition time (lower = lower cost)
         - Usage count (higher = lower cost, more proven)
@@ -498,36 +860,20 @@ class NavigationManager:
                 estimated_time_ms=0,
             )
 
-        # Build adjacency list
-        adjacency: Dict[str, List[Tuple[str, ScreenTransition, float]]] = {}
-        for screen_id in graph.screens:
-            adjacency[screen_id] = []
-
-        for t in graph.transitions:
-            if t.source_screen_id in adjacency:
-                # Calculate edge cost (lower is better)
-                cost = self._calculate_transition_cost(t)
-                adjacency[t.source_screen_id].append((t.target_screen_id, t, cost))
+        index = self._get_routing_index(graph)
+        source = index.node_ids.get(from_screen_id)
+        target = index.node_ids.get(to_screen_id)
 
-        # Dijkstra's algorithm
-        distances = {screen_id: float("inf") for screen_id in graph.screens}
-        distances[from_screen_id] = 0
-        predecessors: Dict[str, Tuple[str, ScreenTransition]] = {}
-
-        # Priority queue: (distance, screen_id)
-        pq = [(0, from_screen_id)]
-
-        while pq:
-            current_dist, current = heapq.heappop(pq)
-
-            if current == to_screen_id:
+        if source is not None and target is not None:
+            distances, predecessors = index.shortest_path_tree(source)
+            if target < len(distances) and distances[target] < _INF:
                 # Found path! Reconstruct it
                 path_transitions = []
-                node = to_screen_id
-                while node in predecessors:
-                    prev_node, transition = predecessors[node]
-                    path_transitions.append(transition)
-                    node = prev_node
+                node = target
+                while predecessors[node] >= 0:
+                    edge = predecessors[node]
+                    path_transitions.append(index.edges[edge])
+                    node = index.edge_source[edge]
                 path_transitions.reverse()
 
                 total_time = sum(t.avg_transition_time_ms for t in path_transitions)
@@ -536,20 +882,10 @@ class NavigationManager:
                     from_screen_id=from_screen_id,
                     to_screen_id=to_screen_id,
                     transitions=path_transitions,
-                    total_cost=current_dist,
+                    total_cost=distances[target],
                     estimated_time_ms=total_time,
                 )
 
-            if current_dist > distances[current]:
-                continue  # Already processed with better distance
-
-            for neighbor, transition, cost in adjacency.get(current, []):
-                distance = current_dist + cost
-                if distance < distances[neighbor]:
-                    distances[neighbor] = distance
-                    predecessors[neighbor] = (current, transition)
-                    heapq.heappush(pq, (distance, neighbor))
-
         logger.warning(
             f"[NavigationManager] No path found from {from_screen_id[:8]}... to {to_screen_id[:8]}..."
         )
@@ -676,7 +1012,7 @@ class NavigationManager:
 
         # Ensure graph home_screen_id is set
         graph.home_screen_id = screen.screen_id
-        self.save_graph(graph)
+        self._persist_graph(graph)
 
         logger.info(
             f"[NavigationManager] Set home screen for {package}: {screen.display_name}"
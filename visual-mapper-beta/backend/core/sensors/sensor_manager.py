@@ -12,15 +12,26 @@ import json
 import os
 import uuid
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Callable, List, Optional, Dict
 from datetime import datetime, timezone
 import logging
 
 from .sensor_models import SensorDefinition, SensorList
+from .sensor_state import SensorStateStore
 from services.device_identity import get_device_identity_resolver
 
 logger = logging.getLogger(__name__)
 
+# Change events passed to listeners: (event, sensor)
+SENSOR_SAVED = "saved"  # created or updated; sensor is the new definition
+SENSOR_DELETED = "deleted"  # sensor is the removed definition
+SENSORS_RELOADED = "reloaded"  # definitions may have changed on disk; sensor is None
+
+SensorChangeListener = Callable[[str, Optional[SensorDefinition]], None]
+
+# Fields that change with every extraction, not with the definition
+RUNTIME_FIELDS = {"current_value", "last_updated", "error_message", "updated_at"}
+
 
 class SensorManager:
     """Manages sensor definitions for devices"""
@@ -34,16 +45,40 @@ class SensorManager:
         """
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._change_listeners: List[SensorChangeListener] = []
+        # Extraction results, kept out of the definition files
+        self.runtime_state = SensorStateStore(self.data_dir / "sensor_state.json")
         logger.info(f"[SensorManager] Initialized with data_dir={self.data_dir}")
 
+    def add_change_listener(self, listener: SensorChangeListener):
+        """
+        Register a callback for sensor definition changes.
+
+        Called synchronously as listener(event, sensor) after every successful
+        save (SENSOR_SAVED), delete (SENSOR_DELETED) or reload (SENSORS_RELOADED),
+        so consumers like SensorUpdater can keep in-memory state current
+        without re-reading the sensor files.
+        """
+        self._change_listeners.append(listener)
+
+    def _notify(self, event: str, sensor: Optional[SensorDefinition] = None):
+        if event == SENSOR_DELETED:
+            self.runtime_state.discard(sensor.sensor_id)
+        for listener in self._change_listeners:
+            try:
+                listener(event, sensor)
+            except Exception as e:
+                logger.error(f"[SensorManager] Change listener error: {e}")
+
     def _load_all_sensors(self):
         """
         Reload sensors from disk.
 
-        SensorManager doesn't cache, so this is a no-op.
-        Called after device migration for consistency with FlowManager.
+        SensorManager doesn't cache, so this only tells change listeners to
+        resync. Called after device migration for consistency with FlowManager.
         """
-        logger.info("[SensorManager] Reload requested (no-op, sensors load fresh each time)")
+        logger.info("[SensorManager] Reload requested (sensors load fresh each time)")
+        self._notify(SENSORS_RELOADED)
 
     def _get_sensor_file(self, device_id: str) -> Path:
         """
@@ -56,6 +91,13 @@ class SensorManager:
         safe_device_id = resolver.sanitize_for_filename(device_id)
         return self.data_dir / f"sensors_{safe_device_id}.json"
 
+    def _parse_sensor_list(self, data: Dict) -> SensorList:
+        """Build a SensorList from file data, with current runtime values"""
+        sensor_list = SensorList(**data)
+        for sensor in sensor_list.sensors:
+            self.runtime_state.apply(sensor)
+        return sensor_list
+
     def _load_sensor_list(self, device_id: str) -> SensorList:
         """Load sensor list from file"""
         sensor_file = self._get_sensor_file(device_id)
@@ -69,7 +111,7 @@ class SensorManager:
         try:
             with open(sensor_file, "r", encoding="utf-8") as f:
                 data = json.load(f)
-                return SensorList(**data)
+                return self._parse_sensor_list(data)
         except Exception as e:
             logger.error(f"[SensorManager] Failed to load sensors for {device_id}: {e}")
             return SensorList(device_id=device_id, sensors=[])
@@ -138,6 +180,7 @@ class SensorManager:
         logger.info(
             f"[SensorManager] Created sensor {sensor.sensor_id} for device {sensor.device_id}"
         )
+        self._notify(SENSOR_SAVED, sensor)
         return sensor
 
     def get_sensor(self, device_id: str, sensor_id: str) -> Optional[SensorDefinition]:
@@ -158,7 +201,7 @@ class SensorManager:
             try:
                 with open(sensor_file, "r", encoding="utf-8") as f:
                     data = json.load(f)
-                    file_sensor_list = SensorList(**data)
+                    file_sensor_list = self._parse_sensor_list(data)
                     for sensor in file_sensor_list.sensors:
                         if sensor.sensor_id == sensor_id:
                             # Also check device_id or stable_device_id matches
@@ -194,7 +237,7 @@ class SensorManager:
                 try:
                     with open(sensor_file, "r", encoding="utf-8") as f:
                         data = json.load(f)
-                        file_sensor_list = SensorList(**data)
+                        file_sensor_list = self._parse_sensor_list(data)
                         all_sensors.extend(file_sensor_list.sensors)
                 except Exception as e:
                     logger.error(f"[SensorManager] Failed to load {sensor_file}: {e}")
@@ -219,7 +262,7 @@ class SensorManager:
             try:
                 with open(sensor_file, "r", encoding="utf-8") as f:
                     data = json.load(f)
-                    file_sensor_list = SensorList(**data)
+                    file_sensor_list = self._parse_sensor_list(data)
                     # Check each sensor's device_id and stable_device_id
                     for sensor in file_sensor_list.sensors:
                         if sensor.sensor_id not in seen_sensor_ids:
@@ -249,10 +292,21 @@ class SensorManager:
         """
         sensor_list = self._load_sensor_list(sensor.device_id)
 
+        # Runtime values come from the state store, not from the caller
+        self.runtime_state.apply(sensor)
+
         # Find and update sensor
         found = False
         for i, s in enumerate(sensor_list.sensors):
             if s.sensor_id == sensor.sensor_id:
+                if s.model_dump(exclude=RUNTIME_FIELDS) == sensor.model_dump(
+                    exclude=RUNTIME_FIELDS
+                ):
+                    # Definition unchanged - nothing to write or announce
+                    logger.debug(
+                        f"[SensorManager] Sensor {sensor.sensor_id} unchanged, not saved"
+                    )
+                    return sensor
                 sensor.updated_at = datetime.now(timezone.utc)
                 sensor_list.sensors[i] = sensor
                 found = True
@@ -268,6 +322,7 @@ class SensorManager:
             raise RuntimeError(f"Failed to update sensor {sensor.sensor_id}")
 
         logger.info(f"[SensorManager] Updated sensor {sensor.sensor_id}")
+        self._notify(SENSOR_SAVED, sensor)
         return sensor
 
     def delete_sensor(self, device_id: str, sensor_id: str) -> bool:
@@ -288,16 +343,17 @@ class SensorManager:
         sensor_list = self._load_sensor_list(device_id)
 
         # Find and remove sensor
-        original_count = len(sensor_list.sensors)
+        removed = [s for s in sensor_list.sensors if s.sensor_id == sensor_id]
         sensor_list.sensors = [
             s for s in sensor_list.sensors if s.sensor_id != sensor_id
         ]
 
-        if len(sensor_list.sensors) < original_count:
+        if removed:
             # Found and removed - save
             if not self._save_sensor_list(sensor_list):
                 raise RuntimeError(f"Failed to delete sensor {sensor_id}")
             logger.info(f"[SensorManager] Deleted sensor {sensor_id}")
+            self._notify(SENSOR_DELETED, removed[0])
             return True
 
         # If not found in direct file, search all sensor files
@@ -305,7 +361,7 @@ class SensorManager:
             try:
                 with open(sensor_file, "r", encoding="utf-8") as f:
                     data = json.load(f)
-                    file_sensor_list = SensorList(**data)
+                    file_sensor_list = self._parse_sensor_list(data)
 
                 # Check if sensor exists in this file with matching device/stable ID
                 matching_sensor = None
@@ -331,6 +387,7 @@ class SensorManager:
                         logger.info(
                             f"[SensorManager] Deleted sensor {sensor_id} from {sensor_file.name}"
                         )
+                        self._notify(SENSOR_DELETED, matching_sensor)
                         return True
 
             except Exception as e:
@@ -347,12 +404,15 @@ class SensorManager:
             Number of sensors deleted
         """
         sensor_list = self._load_sensor_list(device_id)
-        count = len(sensor_list.sensors)
+        removed = sensor_list.sensors
+        count = len(removed)
 
         sensor_list.sensors = []
         self._save_sensor_list(sensor_list)
 
         logger.info(f"[SensorManager] Deleted {count} sensors for device {device_id}")
+        for sensor in removed:
+            self._notify(SENSOR_DELETED, sensor)
         return count
 
     def get_device_list(self) -> List[str]:
@@ -397,8 +457,16 @@ class SensorManager:
 
             if replace:
                 # Replace all sensors
+                previous = self._load_sensor_list(imported_list.device_id).sensors
                 self._save_sensor_list(imported_list)
                 count = len(imported_list.sensors)
+
+                imported_ids = {s.sensor_id for s in imported_list.sensors}
+                for sensor in previous:
+                    if sensor.sensor_id not in imported_ids:
+                        self._notify(SENSOR_DELETED, sensor)
+                for sensor in imported_list.sensors:
+                    self._notify(SENSOR_SAVED, sensor)
             else:
                 # Merge with existing sensors
                 existing_list = self._load_sensor_list(imported_list.device_id)
@@ -406,13 +474,17 @@ class SensorManager:
                 # Add new sensors (skip duplicates)
                 existing_ids = {s.sensor_id for s in existing_list.sensors}
                 added = 0
+                new_sensors = []
                 for sensor in imported_list.sensors:
                     if sensor.sensor_id not in existing_ids:
                         existing_list.sensors.append(sensor)
+                        new_sensors.append(sensor)
                         added += 1
 
                 self._save_sensor_list(existing_list)
                 count = added
+                for sensor in new_sensors:
+                    self._notify(SENSOR_SAVED, sensor)
 
             logger.info(
                 f"[SensorManager] Imported {count} sensors for device {imported_list.device_id}"
@@ -0,0 +1,186 @@
+"""
+Visual Mapper - Sensor Runtime State
+
+Keeps the values that change on every extraction (current value, last
+updated, last error) in memory, separate from the sensor definition files.
+Definition files are only rewritten when a definition changes; runtime state
+is snapshotted to one file periodically and on shutdown.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+from .sensor_models import SensorDefinition
+
+logger = logging.getLogger(__name__)
+
+# Seconds between runtime state snapshots
+DEFAULT_SNAPSHOT_INTERVAL = 60.0
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+@dataclass
+class SensorRuntimeState:
+    """Latest extraction result of one sensor"""
+
+    current_value: Optional[str] = None
+    last_updated: Optional[datetime] = None
+    last_error: Optional[str] = None
+    last_error_at: Optional[datetime] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "current_value": self.current_value,
+            "last_updated": self.last_updated.isoformat() if self.last_updated else None,
+            "last_error": self.last_error,
+            "last_error_at": (
+                self.last_error_at.isoformat() if self.last_error_at else None
+            ),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SensorRuntimeState":
+        return cls(
+            current_value=data.get("current_value"),
+            last_updated=_parse_datetime(data.get("last_updated")),
+            last_error=data.get("last_error"),
+            last_error_at=_parse_datetime(data.get("last_error_at")),
+        )
+
+
+class SensorStateStore:
+    """
+    sensor_id -> SensorRuntimeState, persisted as a single snapshot file
+
+    Thread-safe: values are recorded from the event loop and from flow
+    execution, snapshots run in an executor thread.
+    """
+
+    def __init__(self, state_file: Path):
+        self.state_file = Path(state_file)
+        self._states: Dict[str, SensorRuntimeState] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.snapshots_written = 0
+        self._load()
+
+    def _load(self):
+        if not self.state_file.exists():
+            return
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._states = {
+                sensor_id: SensorRuntimeState.from_dict(state)
+                for sensor_id, state in data.get("sensors", {}).items()
+            }
+            logger.info(
+                f"[SensorStateStore] Loaded runtime state for {len(self._states)} sensors"
+            )
+        except Exception as e:
+            logger.error(f"[SensorStateStore] Failed to load {self.state_file}: {e}")
+
+    def record_value(self, sensor_id: str, value: Optional[str]) -> SensorRuntimeState:
+        """Store a freshly extracted value (clears the last error)"""
+        with self._lock:
+            state = self._states.setdefault(sensor_id, SensorRuntimeState())
+            state.current_value = value
+            state.last_updated = datetime.now(timezone.utc)
+            state.last_error = None
+            state.last_error_at = None
+            self._dirty = True
+            return state
+
+    def record_error(self, sensor_id: str, error: str) -> SensorRuntimeState:
+        """Store a failed extraction (the last good value is kept)"""
+        with self._lock:
+            state = self._states.setdefault(sensor_id, SensorRuntimeState())
+            if state.last_error != error:
+                state.last_error = error
+                self._dirty = True
+            state.last_error_at = datetime.now(timezone.utc)
+            return state
+
+    def discard(self, sensor_id: str):
+        with self._lock:
+            if self._states.pop(sensor_id, None) is not None:
+                self._dirty = True
+
+    def get(self, sensor_id: str) -> Optional[SensorRuntimeState]:
+        with self._lock:
+            return self._states.get(sensor_id)
+
+    def apply(self, sensor: SensorDefinition) -> SensorDefinition:
+        """Overlay runtime values onto a definition loaded from disk"""
+        state = self.get(sensor.sensor_id)
+        if state is None:
+            return sensor
+        if state.last_updated is not None:
+            sensor.current_value = state.current_value
+            sensor.last_updated = state.last_updated
+        sensor.error_message = state.last_error
+        return sensor
+
+    def snapshot(self) -> bool:
+        """Write the state file if anything changed since the last snapshot"""
+        with self._lock:
+            if not self._dirty:
+                return False
+            data = {
+                "saved_at": datetime.now(timezone.utc).isoformat(),
+                "sensors": {
+                    sensor_id: state.to_dict()
+                    for sensor_id, state in self._states.items()
+                },
+            }
+            self._dirty = False
+
+        try:
+            fd, temp_path = tempfile.mkstemp(
+                suffix=".tmp",
+                prefix=self.state_file.stem + "_",
+                dir=self.state_file.parent,
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(temp_path, self.state_file)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except Exception as e:
+            with self._lock:
+                self._dirty = True  # Retry on the next snapshot
+            logger.error(f"[SensorStateStore] Failed to write {self.state_file}: {e}")
+            return False
+
+        self.snapshots_written += 1
+        logger.debug(
+            f"[SensorStateStore] Snapshot saved ({len(data['sensors'])} sensors)"
+        )
+        return True
+
+    async def run_periodic_snapshots(
+        self, interval: float = DEFAULT_SNAPSHOT_INTERVAL
+    ):
+        """Snapshot every `interval` seconds until cancelled"""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            await loop.run_in_executor(None, self.snapshot)
@@ -1,17 +1,32 @@
 """
 Sensor Updater for Visual Mapper
 Manages background tasks that periodically update sensor values from device screenshots
+
+Each device keeps a due-time schedule of its enabled sensors, so a sensor is
+only extracted and published at its own update_interval_seconds, and the
+device is only captured when at least one sensor is due. Each capture fetches
+only the data the due sensors read (UI tree and/or screenshot). Extracted
+values and errors go to the sensor manager's runtime state store, so the
+definition files are not rewritten on every update.
 """
 
 import asyncio
+import heapq
 import logging
-from typing import Dict, Set, Optional
+from typing import Dict, FrozenSet, List, Set, Optional, Tuple
 from datetime import datetime
 
 from core.adb.adb_bridge import ADBBridge
-from .sensor_manager import SensorManager
+from .sensor_manager import (
+    SensorManager,
+    SENSOR_SAVED,
+    SENSOR_DELETED,
+    SENSORS_RELOADED,
+)
+from .sensor_models import SensorDefinition
 from .text_extractor import TextExtractor
 from core.mqtt.mqtt_manager import MQTTManager
+from utils.element_finder import ElementIndex
 
 logger = logging.getLogger(__name__)
 
@@ -21,14 +36,123 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from core.flows.flow_manager import FlowManager
 
+# (due, version, sensor) popped from a schedule
+DueSensor = Tuple[float, int, SensorDefinition]
+
+# Device data a sensor source reads
+NEEDS_UI_TREE = "ui_tree"
+NEEDS_PIXELS = "pixels"
+
+# Sources not listed here are unsupported by the updater and fetch nothing
+SOURCE_REQUIREMENTS: Dict[str, FrozenSet[str]] = {
+    "element": frozenset({NEEDS_UI_TREE}),
+}
+
+
+class _SensorSchedule:
+    """
+    Min-heap of (next_due, version, sensor_id) for one device's enabled sensors
+
+    Edits bump the sensor's version instead of searching the heap; entries
+    whose version no longer matches are dropped when they reach the top.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, str]] = []
+        self._sensors: Dict[str, SensorDefinition] = {}
+        self._versions: Dict[str, int] = {}
+        self._counter = 0
+        # Set when definitions must be re-read (e.g. after device migration)
+        self.needs_reload = True
+
+    def __len__(self) -> int:
+        return len(self._sensors)
+
+    def __contains__(self, sensor_id: str) -> bool:
+        return sensor_id in self._sensors
+
+    def clear(self):
+        self._heap.clear()
+        self._sensors.clear()
+        self._versions.clear()
+
+    def _push(self, sensor: SensorDefinition, due: float):
+        self._counter += 1
+        self._versions[sensor.sensor_id] = self._counter
+        self._sensors[sensor.sensor_id] = sensor
+        heapq.heappush(self._heap, (due, self._counter, sensor.sensor_id))
+
+    def upsert(self, sensor: SensorDefinition, now: float) -> bool:
+        """
+        Add or refresh a sensor definition.
+
+        New sensors and sensors whose interval changed are due immediately;
+        otherwise the existing due time is kept. Returns True if the schedule
+        changed (the loop may need to wake up earlier).
+        """
+        if not sensor.enabled:
+            return self.remove(sensor.sensor_id)
+
+        current = self._sensors.get(sensor.sensor_id)
+        if (
+            current is not None
+            and current.update_interval_seconds == sensor.update_interval_seconds
+        ):
+            self._sensors[sensor.sensor_id] = sensor
+            return False
+
+        self._push(sensor, now)
+        return True
+
+    def remove(self, sensor_id: str) -> bool:
+        if self._sensors.pop(sensor_id, None) is None:
+            return False
+        # Heap entry goes stale and is discarded lazily
+        self._versions.pop(sensor_id, None)
+        return True
+
+    def _drop_stale(self):
+        heap = self._heap
+        while heap and self._versions.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+
+    def next_due(self) -> Optional[float]:
+        """Earliest due time, or None if no sensors are scheduled"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> List[DueSensor]:
+        """Remove and return every sensor due at `now` (earliest first)"""
+        due: List[DueSensor] = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return due
+            when, version, sensor_id = heapq.heappop(self._heap)
+            due.append((when, version, self._sensors[sensor_id]))
+
+    def reschedule(self, entry: DueSensor, now: float):
+        """Queue a popped sensor for its next run (unless edited meanwhile)"""
+        when, version, sensor = entry
+        sensor_id = sensor.sensor_id
+        if self._versions.get(sensor_id) != version:
+            return  # Deleted, disabled or re-scheduled by an edit
+
+        # Keep a fixed cadence, but don't burst to catch up after a stall
+        interval = self._sensors[sensor_id].update_interval_seconds
+        next_due = when + interval
+        if next_due <= now:
+            next_due = now + interval
+        heapq.heappush(self._heap, (next_due, version, sensor_id))
+
 
 class SensorUpdater:
     """
     Manages sensor update loops for all devices
     Each device has its own background task that:
-    1. Captures screenshot periodically
-    2. Extracts UI elements
-    3. Updates all enabled sensors for that device
+    1. Sleeps until the next sensor is due (or sensors change)
+    2. Fetches the UI elements and/or screenshot the due sensors need
+    3. Updates only the sensors that are due
     4. Publishes to MQTT
     """
 
@@ -53,6 +177,12 @@ class SensorUpdater:
             set()
         )  # NEW: Devices with paused sensor updates
 
+        # Per-device due-time schedules, kept current by sensor_manager events
+        self._schedules: Dict[str, _SensorSchedule] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        sensor_manager.add_change_listener(self._on_sensor_change)
+
         logger.info("[SensorUpdater] Initialized")
 
     def set_flow_manager(self, flow_manager: "FlowManager"):
@@ -71,6 +201,51 @@ class SensorUpdater:
                 return sensor.stable_device_id
         return None
 
+    def _on_sensor_change(self, event: str, sensor: Optional[SensorDefinition]):
+        """Apply a sensor definition change to the running schedules"""
+        if not self._schedules:
+            return
+
+        loop = self._loop
+        try:
+            on_loop = asyncio.get_running_loop() is loop
+        except RuntimeError:
+            on_loop = False
+        if loop is not None and not on_loop:
+            # Sensor saved from a worker thread - apply on the event loop
+            loop.call_soon_threadsafe(self._on_sensor_change, event, sensor)
+            return
+
+        now = loop.time() if loop else 0.0
+        for device_id, schedule in self._schedules.items():
+            if event == SENSORS_RELOADED:
+                changed = schedule.needs_reload = True
+            elif event == SENSOR_DELETED:
+                changed = schedule.remove(sensor.sensor_id)
+            elif event == SENSOR_SAVED:
+                if device_id in (sensor.device_id, sensor.stable_device_id):
+                    changed = schedule.upsert(sensor, now)
+                else:
+                    # Sensor moved to another device (or never belonged here)
+                    changed = schedule.remove(sensor.sensor_id)
+            else:
+                continue
+
+            if changed:
+                wakeup = self._wakeups.get(device_id)
+                if wakeup:
+                    wakeup.set()
+
+    def _load_schedule(self, device_id: str, schedule: _SensorSchedule, now: float):
+        """(Re)build a device schedule from the stored sensor definitions"""
+        schedule.clear()
+        for sensor in self.sensor_manager.get_all_sensors(device_id):
+            schedule.upsert(sensor, now)
+        schedule.needs_reload = False
+        logger.debug(
+            f"[SensorUpdater] {device_id}: Scheduled {len(schedule)} enabled sensors"
+        )
+
     async def start_device_updates(self, device_id: str) -> bool:
         """Start sensor update loop for a device"""
         if device_id in self._running_devices:
@@ -89,6 +264,9 @@ class SensorUpdater:
             )
 
             # Start background task
+            self._loop = asyncio.get_running_loop()
+            self._schedules[device_id] = _SensorSchedule()
+            self._wakeups[device_id] = asyncio.Event()
             task = asyncio.create_task(self._device_update_loop(device_id))
             self._update_tasks[device_id] = task
             self._running_devices.add(device_id)
@@ -121,6 +299,8 @@ class SensorUpdater:
             # Cleanup
             self._update_tasks.pop(device_id, None)
             self._running_devices.discard(device_id)
+            self._schedules.pop(device_id, None)
+            self._wakeups.pop(device_id, None)
 
             # Get stable_device_id from sensors if available
             stable_device_id = self._get_stable_device_id(device_id)
@@ -232,65 +412,61 @@ class SensorUpdater:
                     await asyncio.sleep(30)  # Check again in 30s in case flows are disabled
                     continue
 
-                # Load enabled sensors for this device
-                sensors = self.sensor_manager.get_all_sensors(device_id)
-                enabled_sensors = [s for s in sensors if s.enabled]
-
-                if not enabled_sensors:
-                    logger.debug(
-                        f"[SensorUpdater] No enabled sensors for {device_id}, waiting..."
+                schedule = self._schedules[device_id]
+                loop = asyncio.get_running_loop()
+                now = loop.time()
+                if schedule.needs_reload:
+                    self._load_schedule(device_id, schedule, now)
+
+                # Sleep until the next sensor is due; sensor edits wake us early
+                next_due = schedule.next_due()
+                if next_due is None or next_due > now:
+                    if next_due is None:
+                        logger.debug(
+                            f"[SensorUpdater] No enabled sensors for {device_id}, waiting..."
+                        )
+                    await self._wait_for_wakeup(
+                        device_id, None if next_due is None else next_due - now
                     )
-                    await asyncio.sleep(30)  # Check every 30s if sensors are added
                     continue
 
-                # Find minimum update interval
-                min_interval = min(s.update_interval_seconds for s in enabled_sensors)
+                due_sensors = schedule.pop_due(now)
                 logger.debug(
-                    f"[SensorUpdater] {device_id}: {len(enabled_sensors)} enabled sensors, update interval={min_interval}s"
+                    f"[SensorUpdater] {device_id}: {len(due_sensors)}/{len(schedule)} sensors due"
                 )
 
-                # Capture screenshot
                 try:
-                    screenshot_bytes = await self.adb_bridge.capture_screenshot(
-                        device_id
-                    )
-                    logger.debug(
-                        f"[SensorUpdater] {device_id}: Screenshot captured ({len(screenshot_bytes)} bytes)"
-                    )
-                except Exception as e:
-                    logger.error(
-                        f"[SensorUpdater] {device_id}: Failed to capture screenshot: {e}"
-                    )
-                    await asyncio.sleep(min_interval)
-                    continue
-
-                # Extract UI elements (bounds_only=True for 30-40% faster parsing)
-                try:
-                    ui_elements = await self.adb_bridge.get_ui_elements(
-                        device_id, bounds_only=True
-                    )
-                    logger.debug(
-                        f"[SensorUpdater] {device_id}: Extracted {len(ui_elements)} UI elements (fast mode)"
-                    )
-                except Exception as e:
-                    logger.error(
-                        f"[SensorUpdater] {device_id}: Failed to extract UI elements: {e}"
-                    )
-                    await asyncio.sleep(min_interval)
-                    continue
-
-                # Update each sensor
-                for sensor in enabled_sensors:
                     try:
-                        await self._update_sensor(sensor, screenshot_bytes, ui_elements)
-                    except Exception as e:
-                        logger.error(
-                            f"[SensorUpdater] {device_id}: Failed to update sensor {sensor.sensor_id}: {e}"
+                        screenshot_bytes, element_index = await self._fetch_device_data(
+                            device_id, [sensor for _, _, sensor in due_sensors]
                         )
-                        # Continue with other sensors even if one fails
-
-                # Wait until next update
-                await asyncio.sleep(min_interval)
+                    except Exception as e:
+                        logger.error(f"[SensorUpdater] {device_id}: {e}")
+                        for _, _, sensor in due_sensors:
+                            self.sensor_manager.runtime_state.record_error(
+                                sensor.sensor_id, str(e)
+                            )
+                        continue
+
+                    # Update each due sensor
+                    for _, _, sensor in due_sensors:
+                        try:
+                            await self._update_sensor(
+                                sensor, screenshot_bytes, element_index
+                            )
+                        except Exception as e:
+                            logger.error(
+                                f"[SensorUpdater] {device_id}: Failed to update sensor {sensor.sensor_id}: {e}"
+                            )
+                            self.sensor_manager.runtime_state.record_error(
+                                sensor.sensor_id, str(e)
+                            )
+                            # Continue with other sensors even if one fails
+                finally:
+                    # Failed captures retry at the sensor's next due time
+                    now = loop.time()
+                    for entry in due_sensors:
+                        schedule.reschedule(entry, now)
 
             except asyncio.CancelledError:
                 logger.info(f"[SensorUpdater] Update loop cancelled for {device_id}")
@@ -301,20 +477,81 @@ class SensorUpdater:
                 )
                 await asyncio.sleep(30)  # Wait before retrying
 
-    async def _update_sensor(self, sensor, screenshot_bytes, ui_elements):
+    async def _wait_for_wakeup(self, device_id: str, timeout: Optional[float]):
+        """Sleep up to `timeout` seconds (forever if None) or until woken"""
+        wakeup = self._wakeups[device_id]
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        wakeup.clear()
+
+    async def _fetch_device_data(
+        self, device_id: str, sensors: List[SensorDefinition]
+    ) -> Tuple[Optional[bytes], Optional[ElementIndex]]:
+        """
+        Fetch only the device data the given sensors read.
+
+        Returns (screenshot_bytes, element_index); either is None if
+        no sensor needs it. The screenshot and UI dump run concurrently when
+        both are needed.
+
+        Raises:
+            RuntimeError: If a needed fetch fails
+        """
+        needs: Set[str] = set()
+        for sensor in sensors:
+            needs |= SOURCE_REQUIREMENTS.get(sensor.source.source_type, frozenset())
+
+        fetches = {}
+        if NEEDS_PIXELS in needs:
+            fetches[NEEDS_PIXELS] = self.adb_bridge.capture_screenshot(device_id)
+        if NEEDS_UI_TREE in needs:
+            # bounds_only=True for 30-40% faster parsing
+            fetches[NEEDS_UI_TREE] = self.adb_bridge.get_ui_elements(
+                device_id, bounds_only=True
+            )
+        if not fetches:
+            return None, None
+
+        results = dict(
+            zip(
+                fetches,
+                await asyncio.gather(*fetches.values(), return_exceptions=True),
+            )
+        )
+
+        screenshot_bytes = results.get(NEEDS_PIXELS)
+        if isinstance(screenshot_bytes, BaseException):
+            raise RuntimeError(f"Failed to capture screenshot: {screenshot_bytes}")
+        if screenshot_bytes is not None:
+            logger.debug(
+                f"[SensorUpdater] {device_id}: Screenshot captured ({len(screenshot_bytes)} bytes)"
+            )
+
+        ui_elements = results.get(NEEDS_UI_TREE)
+        if isinstance(ui_elements, BaseException):
+            raise RuntimeError(f"Failed to extract UI elements: {ui_elements}")
+        element_index = None
+        if ui_elements is not None:
+            element_index = ElementIndex(ui_elements)
+            logger.debug(
+                f"[SensorUpdater] {device_id}: Extracted {len(ui_elements)} UI elements (fast mode)"
+            )
+
+        return screenshot_bytes, element_index
+
+    async def _update_sensor(self, sensor, screenshot_bytes, element_index):
         """Update a single sensor and publish to MQTT"""
         try:
             # Extract value based on sensor source type
             if sensor.source.source_type == "element":
                 # Extract text from element
-                element = next(
-                    (
-                        el
-                        for el in ui_elements
-                        if el.get("resource_id") == sensor.source.element_resource_id
-                    ),
-                    None,
+                # First element with the id, in hierarchy order
+                positions = element_index.by_resource_id.get(
+                    sensor.source.element_resource_id
                 )
+                element = element_index.elements[positions[0]] if positions else None
                 if not element:
                     # Use DEBUG level - this is expected when screen is off or app isn't on right screen
                     logger.debug(
@@ -324,6 +561,9 @@ class SensorUpdater:
                     if sensor.extraction_rule.fallback_value:
                         extracted_value = sensor.extraction_rule.fallback_value
                     else:
+                        self.sensor_manager.runtime_state.record_error(
+                            sensor.sensor_id, "Element not found"
+                        )
                         return  # Skip update
 
                 else:
@@ -361,10 +601,11 @@ class SensorUpdater:
                 sensor, str(extracted_value), attributes
             )
 
-            # Update sensor's current_value and last_updated in memory (for API)
-            sensor.current_value = str(extracted_value)
-            sensor.last_updated = datetime.now()
-            self.sensor_manager.update_sensor(sensor)
+            # Record current_value/last_updated in memory (for API); the
+            # definition file is left alone and the state is snapshotted later
+            self.sensor_manager.runtime_state.record_value(
+                sensor.sensor_id, str(extracted_value)
+            )
 
             logger.debug(
                 f"[SensorUpdater] Updated {sensor.sensor_id}: {extracted_value}"
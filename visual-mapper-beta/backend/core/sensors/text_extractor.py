@@ -5,18 +5,81 @@ Version: 0.0.4 (Phase 3)
 Extracts and parses text from UI elements using various methods.
 """
 
+import json
 import re
 import logging
-from typing import Optional, List, Dict, Any
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterable, Optional, List, Dict, Any, Tuple
 
 from .sensor_models import TextExtractionRule, ExtractionMethod
 
 logger = logging.getLogger(__name__)
 
+# Integer or decimal number (with optional negative sign)
+_NUMERIC_PATTERN = re.compile(r"-?\d+\.?\d*")
+# Leading number, used to strip unit suffixes
+_UNIT_PATTERN = re.compile(r"(-?\d+\.?\d*)")
+
+# Upper bound on distinct compiled rules kept by one extractor
+_MAX_COMPILED_RULES = 1024
+
+
+@lru_cache(maxsize=1024)
+def _compile_regex(pattern: str) -> Optional[re.Pattern]:
+    """Compile a user regex once; None if the pattern is invalid"""
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        logger.error(f"[TextExtractor] Invalid regex pattern '{pattern}': {e}")
+        return None
+
+
+def _rule_signature(rule: TextExtractionRule) -> tuple:
+    """Hashable key covering every field that affects extraction"""
+    pipeline = (
+        json.dumps(rule.pipeline, sort_keys=True, default=str)
+        if rule.pipeline
+        else None
+    )
+    return (
+        rule.method,
+        rule.regex_pattern,
+        rule.before_text,
+        rule.after_text,
+        rule.between_start,
+        rule.between_end,
+        rule.extract_numeric,
+        rule.remove_unit,
+        rule.fallback_value,
+        pipeline,
+    )
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """
+    Extraction rule resolved into step callables with regexes precompiled.
+
+    steps holds (method_name, func, args) tuples applied in order. If error
+    is set the rule can never produce a value and extraction returns the
+    fallback straight away.
+    """
+
+    steps: Tuple[Tuple[str, Callable, tuple], ...]
+    is_pipeline: bool
+    extract_numeric: bool
+    remove_unit: bool
+    fallback_value: Optional[str]
+    error: Optional[str] = None
+
 
 class TextExtractor:
     """Extract and parse text from UI elements"""
 
+    def __init__(self):
+        self._compiled_rules: Dict[tuple, CompiledRule] = {}
+
     def extract(self, text: str, rule: TextExtractionRule) -> Optional[str]:
         """
         Extract text using extraction rule
@@ -28,107 +91,175 @@ class TextExtractor:
         Returns:
             Extracted text or None if extraction failed
         """
-        if not text:
-            logger.warning("[TextExtractor] Empty source text")
-            return rule.fallback_value
-
         try:
-            # If pipeline is defined, use multi-step extraction
-            if rule.pipeline:
-                return self._extract_pipeline(text, rule.pipeline, rule.fallback_value)
-
-            # Otherwise, use single-step extraction
-            # Apply extraction method
-            if rule.method == ExtractionMethod.EXACT:
-                result = self._extract_exact(text)
-            elif rule.method == ExtractionMethod.REGEX:
-                result = self._extract_regex(text, rule.regex_pattern)
-            elif rule.method == ExtractionMethod.NUMERIC:
-                result = self._extract_numeric(text)
-            elif rule.method == ExtractionMethod.BEFORE:
-                result = self._extract_before(text, rule.before_text)
-            elif rule.method == ExtractionMethod.AFTER:
-                result = self._extract_after(text, rule.after_text)
-            elif rule.method == ExtractionMethod.BETWEEN:
-                result = self._extract_between(
-                    text, rule.between_start, rule.between_end
-                )
-            else:
-                logger.error(
-                    f"[TextExtractor] Unknown extraction method: {rule.method}"
-                )
-                return rule.fallback_value
-
-            # Post-processing
-            if result and rule.extract_numeric:
-                result = self._extract_numeric(result)
-
-            if result and rule.remove_unit:
-                result = self._remove_unit(result)
-
-            return result if result else rule.fallback_value
-
+            compiled = self.compile_rule(rule)
         except Exception as e:
             logger.error(f"[TextExtractor] Extraction failed: {e}")
             return rule.fallback_value
+        return self._apply(text, compiled)
 
-    def _extract_pipeline(
-        self, text: str, pipeline: List[Dict[str, Any]], fallback: Optional[str]
-    ) -> Optional[str]:
+    def extract_many(
+        self, rules_and_texts: Iterable[Tuple[TextExtractionRule, str]]
+    ) -> List[Optional[str]]:
         """
-        Execute multi-step extraction pipeline
+        Extract values for many sensors in one call
+
+        Rules are compiled once per distinct signature, so sensors sharing an
+        extraction rule only pay for regex compilation and method dispatch
+        once.
 
         Args:
-            text: Source text
-            pipeline: List of extraction steps (each is a dict with method and params)
-            fallback: Fallback value if any step fails
+            rules_and_texts: Iterable of (extraction rule, source text) pairs
 
         Returns:
-            Final extracted text or fallback
+            Extracted values in input order
         """
-        result = text
+        results: List[Optional[str]] = []
+        for rule, text in rules_and_texts:
+            try:
+                compiled = self.compile_rule(rule)
+            except Exception as e:
+                logger.error(f"[TextExtractor] Extraction failed: {e}")
+                results.append(rule.fallback_value)
+                continue
+            results.append(self._apply(text, compiled))
+        return results
+
+    def compile_rule(self, rule: TextExtractionRule) -> CompiledRule:
+        """Get the cached compiled form of an extraction rule"""
+        return self._compile(_rule_signature(rule), rule)
+
+    def _compile(self, signature: tuple, rule: TextExtractionRule) -> CompiledRule:
+        compiled = self._compiled_rules.get(signature)
+        if compiled is not None:
+            return compiled
+
+        if rule.pipeline:
+            steps, error = self._compile_pipeline(rule.pipeline)
+        else:
+            step, error = self._compile_step(
+                rule.method,
+                regex_pattern=rule.regex_pattern,
+                before_text=rule.before_text,
+                after_text=rule.after_text,
+                between_start=rule.between_start,
+                between_end=rule.between_end,
+            )
+            steps = (step,) if step else ()
+
+        compiled = CompiledRule(
+            steps=steps,
+            is_pipeline=bool(rule.pipeline),
+            extract_numeric=rule.extract_numeric,
+            remove_unit=rule.remove_unit,
+            fallback_value=rule.fallback_value,
+            error=error,
+        )
 
+        if len(self._compiled_rules) >= _MAX_COMPILED_RULES:
+            self._compiled_rules.clear()
+        self._compiled_rules[signature] = compiled
+        return compiled
+
+    def _compile_pipeline(
+        self, pipeline: List[Dict[str, Any]]
+    ) -> Tuple[tuple, Optional[str]]:
+        steps = []
         for step_index, step in enumerate(pipeline):
             method = step.get("method")
             if not method:
-                logger.error(
-                    f"[TextExtractor] Pipeline step {step_index} missing 'method'"
-                )
-                return fallback
+                return (), f"Pipeline step {step_index} missing 'method'"
+            compiled_step, error = self._compile_step(
+                method,
+                regex_pattern=step.get("regex_pattern"),
+                before_text=step.get("before_text"),
+                after_text=step.get("after_text"),
+                between_start=step.get("between_start"),
+                between_end=step.get("between_end"),
+            )
+            if error:
+                return (), f"Pipeline step {step_index} ({method}): {error}"
+            steps.append(compiled_step)
+        return tuple(steps), None
+
+    def _compile_step(
+        self,
+        method: str,
+        regex_pattern: Optional[str] = None,
+        before_text: Optional[str] = None,
+        after_text: Optional[str] = None,
+        between_start: Optional[str] = None,
+        between_end: Optional[str] = None,
+    ) -> Tuple[Optional[tuple], Optional[str]]:
+        """Resolve one extraction step to (method, func, args) or an error"""
+        if method == ExtractionMethod.EXACT:
+            return ("exact", self._extract_exact, ()), None
+        if method == ExtractionMethod.NUMERIC:
+            return ("numeric", self._extract_numeric, ()), None
+        if method == ExtractionMethod.REGEX:
+            if not regex_pattern:
+                return None, "No regex pattern provided"
+            pattern = _compile_regex(regex_pattern)
+            if pattern is None:
+                return None, f"Invalid regex pattern '{regex_pattern}'"
+            return ("regex", self._search_compiled, (pattern,)), None
+        if method == ExtractionMethod.BEFORE:
+            if not before_text:
+                return None, "No before_text provided"
+            return ("before", self._extract_before, (before_text,)), None
+        if method == ExtractionMethod.AFTER:
+            if not after_text:
+                return None, "No after_text provided"
+            return ("after", self._extract_after, (after_text,)), None
+        if method == ExtractionMethod.BETWEEN:
+            if not between_start or not between_end:
+                return None, "Missing start or end text for BETWEEN method"
+            return (
+                ("between", self._extract_between, (between_start, between_end)),
+                None,
+            )
+        return None, f"Unknown extraction method: {method}"
+
+    def _apply(self, text: str, compiled: CompiledRule) -> Optional[str]:
+        """Run a compiled rule against source text"""
+        fallback = compiled.fallback_value
+        if not text:
+            logger.warning("[TextExtractor] Empty source text")
+            return fallback
+
+        if compiled.error:
+            logger.warning(f"[TextExtractor] {compiled.error}")
+            return fallback
 
+        result = text
+        for step_index, (method, func, args) in enumerate(compiled.steps):
             try:
-                # Apply extraction method for this step
-                if method == "exact":
-                    result = self._extract_exact(result)
-                elif method == "regex":
-                    result = self._extract_regex(result, step.get("regex_pattern"))
-                elif method == "numeric":
-                    result = self._extract_numeric(result)
-                elif method == "before":
-                    result = self._extract_before(result, step.get("before_text"))
-                elif method == "after":
-                    result = self._extract_after(result, step.get("after_text"))
-                elif method == "between":
-                    result = self._extract_between(
-                        result, step.get("between_start"), step.get("between_end")
+                result = func(result, *args)
+            except Exception as e:
+                if compiled.is_pipeline:
+                    logger.error(
+                        f"[TextExtractor] Pipeline step {step_index} ({method}) failed: {e}"
                     )
                 else:
-                    logger.error(f"[TextExtractor] Unknown pipeline method: {method}")
-                    return fallback
+                    logger.error(f"[TextExtractor] Extraction failed: {e}")
+                return fallback
 
-                # If any step returns None, pipeline fails
-                if result is None:
+            # If any step returns None, pipeline fails
+            if result is None:
+                if compiled.is_pipeline:
                     logger.warning(
                         f"[TextExtractor] Pipeline step {step_index} ({method}) returned None"
                     )
-                    return fallback
-
-            except Exception as e:
-                logger.error(
-                    f"[TextExtractor] Pipeline step {step_index} ({method}) failed: {e}"
-                )
                 return fallback
 
+        # Post-processing (single-step rules only)
+        if not compiled.is_pipeline:
+            if result and compiled.extract_numeric:
+                result = self._extract_numeric(result)
+
+            if result and compiled.remove_unit:
+                result = self._remove_unit(result)
+
         return result if result else fallback
 
     def _extract_exact(self, text: str) -> str:
@@ -141,20 +272,22 @@ class TextExtractor:
             logger.warning("[TextExtractor] No regex pattern provided")
             return None
 
-        try:
-            match = re.search(pattern, text)
-            if match:
-                # If there are groups, return first group; otherwise return full match
-                return match.group(1) if match.groups() else match.group(0)
-            return None
-        except re.error as e:
-            logger.error(f"[TextExtractor] Invalid regex pattern '{pattern}': {e}")
+        compiled = _compile_regex(pattern)
+        if compiled is None:
             return None
+        return self._search_compiled(text, compiled)
+
+    def _search_compiled(self, text: str, pattern: re.Pattern) -> Optional[str]:
+        """Search with a precompiled pattern"""
+        match = pattern.search(text)
+        if match:
+            # If there are groups, return first group; otherwise return full match
+            return match.group(1) if pattern.groups else match.group(0)
+        return None
 
     def _extract_numeric(self, text: str) -> Optional[str]:
         """Extract first numeric value from text"""
-        # Match integer or decimal numbers (with optional negative sign)
-        match = re.search(r"-?\d+\.?\d*", text)
+        match = _NUMERIC_PATTERN.search(text)
         return match.group(0) if match else None
 
     def _extract_before(self, text: str, before_text: Optional[str]) -> Optional[str]:
@@ -206,7 +339,7 @@ class TextExtractor:
         """Remove unit suffix from numeric value"""
         # Remove common units: %, °C, °F, km/h, mph, V, A, W, etc.
         # Keep only numbers and decimal points
-        match = re.match(r"(-?\d+\.?\d*)", text)
+        match = _UNIT_PATTERN.match(text)
         return match.group(1) if match else text
 
 
@@ -10,29 +10,32 @@ Created for Phase 2 of the diagnostics/streaming enhancement plan.
 """
 
 import asyncio
+import io
 import subprocess
 import shutil
+import threading
 import time
 import logging
-from typing import Optional, Callable, Dict, Any, List
+from typing import Optional, Callable, Dict, Any, List, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 import numpy as np
-from services.feature_manager import get_feature_manager
+from PIL import Image
+from core.streaming.frame_change import DEFAULT_KEEPALIVE_INTERVAL, FrameChangeDetector
 
-# Conditional OpenCV import for basic mode
-feature_manager = get_feature_manager()
-CV2_AVAILABLE = False
-if feature_manager.is_enabled("real_icons_enabled"):
-    try:
-        import cv2
+# Optional OpenCV import - fall back to PIL encoding if not available
+try:
+    import cv2
 
-        CV2_AVAILABLE = True
-    except ImportError:
-        pass
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+JPEG_ENCODER_CV2 = "cv2"
+JPEG_ENCODER_PIL = "pil"
+
 
 class CaptureBackend(Enum):
     """Available capture backends."""
@@ -49,6 +52,7 @@ class StreamMetrics:
 
     frames_sent: int = 0
     frames_dropped: int = 0
+    frames_unchanged: int = 0  # Static frames skipped before encoding
     total_capture_time_ms: float = 0
     total_encode_time_ms: float = 0
     last_capture_time_ms: float = 0
@@ -76,6 +80,7 @@ class StreamMetrics:
         return {
             "frames_sent": self.frames_sent,
             "frames_dropped": self.frames_dropped,
+            "frames_unchanged": self.frames_unchanged,
             "fps": round(self.fps, 2),
             "avg_capture_time_ms": round(self.avg_capture_time_ms, 1),
             "last_capture_time_ms": round(self.last_capture_time_ms, 1),
@@ -105,6 +110,37 @@ QUALITY_PRESETS = {
 }
 
 
+def _scaled_size(width: int, height: int, max_size: int) -> Optional[Tuple[int, int]]:
+    """Output size for a preset's max dimension (None = keep original size)"""
+    if max_size <= 0 or max(width, height) <= max_size:
+        return None
+    scale = max_size / max(width, height)
+    return (int(width * scale), int(height * scale))
+
+
+def _detect_jpeg_encoder() -> str:
+    """
+    Pick the JPEG encoder once at startup.
+
+    OpenCV (decode without alpha + INTER_AREA) is used when it imports and
+    round-trips a small PNG; otherwise PIL (reduce + BILINEAR).
+    """
+    if CV2_AVAILABLE:
+        try:
+            buffer = io.BytesIO()
+            Image.new("RGBA", (16, 16), (255, 0, 0, 255)).save(buffer, format="PNG")
+            img = cv2.imdecode(
+                np.frombuffer(buffer.getvalue(), np.uint8), cv2.IMREAD_COLOR
+            )
+            img = cv2.resize(img, (8, 8), interpolation=cv2.INTER_AREA)
+            ok, _ = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 75])
+            if ok:
+                return JPEG_ENCODER_CV2
+        except Exception as e:
+            logger.warning(f"OpenCV JPEG encoding unusable, using PIL: {e}")
+    return JPEG_ENCODER_PIL
+
+
 class StreamManager:
     """
     Manages screen capture and streaming for Android devices.
@@ -112,19 +148,30 @@ class StreamManager:
     Supports multiple capture backends with automatic fallback.
     """
 
-    def __init__(self, adb_bridge=None):
+    def __init__(
+        self, adb_bridge=None, keepalive_interval: float = DEFAULT_KEEPALIVE_INTERVAL
+    ):
         """
         Initialize the stream manager.
 
         Args:
             adb_bridge: Reference to existing ADBBridge instance for fallback
+            keepalive_interval: Seconds after which an unchanged frame is
+                returned anyway by skip_unchanged captures
         """
         self.adb_bridge = adb_bridge
+        self.keepalive_interval = keepalive_interval
         self.active_streams: Dict[str, asyncio.Task] = {}
         self.metrics: Dict[str, StreamMetrics] = {}
         self.callbacks: Dict[str, List[Callable]] = {}
         self._adbutils_devices: Dict[str, Any] = {}
         self._scrcpy_available: Optional[bool] = None
+        # Per-stream change detectors (skip encoding static frames)
+        self._change_detectors: Dict[str, FrameChangeDetector] = {}
+        # JPEG encoder chosen once; output buffers reused per executor thread
+        self.jpeg_encoder = _detect_jpeg_encoder()
+        self._encode_buffers = threading.local()
+        logger.info(f"[StreamManager] JPEG encoder: {self.jpeg_encoder}")
 
     def _check_scrcpy_available(self) -> bool:
         """Check if scrcpy is available in PATH."""
@@ -162,8 +209,6 @@ class StreamManager:
 
             if pil_image:
                 # Convert PIL to bytes
-                import io
-
                 buffer = io.BytesIO()
                 pil_image.save(buffer, format="PNG")
                 return buffer.getvalue()
@@ -177,6 +222,7 @@ class StreamManager:
         device_id: str,
         quality: str = "medium",
         backend: CaptureBackend = CaptureBackend.ADB_BRIDGE,
+        skip_unchanged: bool = False,
     ) -> Optional[bytes]:
         """
         Capture screenshot with quality settings.
@@ -185,9 +231,11 @@ class StreamManager:
             device_id: ADB device identifier
             quality: Quality preset name (high, medium, low, fast)
             backend: Capture backend to use
+            skip_unchanged: Return None without encoding if the screen has not
+                changed since the last returned frame (keepalive excepted)
 
         Returns:
-            JPEG bytes or None on failure
+            JPEG bytes or None on failure / unchanged frame
         """
         preset = QUALITY_PRESETS.get(quality, QUALITY_PRESETS["medium"])
         metrics = self.metrics.get(device_id, StreamMetrics())
@@ -220,6 +268,23 @@ class StreamManager:
         if raw_png is None:
             return None
 
+        if skip_unchanged:
+            detector = self._change_detectors.get(device_id)
+            if detector is None:
+                detector = self._change_detectors[device_id] = FrameChangeDetector(
+                    keepalive_interval=self.keepalive_interval
+                )
+            try:
+                change = await asyncio.get_event_loop().run_in_executor(
+                    None, detector.check, raw_png
+                )
+                if not change.should_send:
+                    metrics.frames_unchanged += 1
+                    self.metrics[device_id] = metrics
+                    return None
+            except Exception as e:
+                logger.debug(f"Frame change check failed, encoding anyway: {e}")
+
         # Encode to JPEG with quality settings
         start_encode = time.time()
         try:
@@ -237,66 +302,66 @@ class StreamManager:
 
     async def _encode_jpeg(self, png_bytes: bytes, preset: QualityPreset) -> bytes:
         """Encode PNG to JPEG with quality settings."""
-        from PIL import Image
-        import io
-        from services.feature_manager import get_feature_manager
-
-        feature_manager = get_feature_manager()
-        cv2_available = feature_manager.is_enabled("real_icons_enabled")
-
         loop = asyncio.get_event_loop()
 
-        def encode_cv2():
-            # Decode PNG
-            nparr = np.frombuffer(png_bytes, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-            if img is None:
-                raise ValueError("Failed to decode image")
-
-            # Resize if needed
-            if preset.max_size > 0:
-                h, w = img.shape[:2]
-                if max(h, w) > preset.max_size:
-                    scale = preset.max_size / max(h, w)
-                    new_size = (int(w * scale), int(h * scale))
-                    img = cv2.resize(img, new_size, interpolation=cv2.INTER_AREA)
-
-            # Encode to JPEG
-            encode_params = [cv2.IMWRITE_JPEG_QUALITY, preset.jpeg_quality]
-            _, jpeg = cv2.imencode(".jpg", img, encode_params)
-            return jpeg.tobytes()
-
-        def encode_pil():
-            # Decode PNG using PIL
-            img = Image.open(io.BytesIO(png_bytes))
-
-            # Resize if needed
-            if preset.max_size > 0:
-                w, h = img.size
-                if max(h, w) > preset.max_size:
-                    scale = preset.max_size / max(h, w)
-                    new_size = (int(w * scale), int(h * scale))
-                    img = img.resize(new_size, Image.LANCZOS)
-
-            # Convert to RGB (JPEGs don't support RGBA)
-            if img.mode != "RGB":
-                img = img.convert("RGB")
-
-            # Encode to JPEG
-            buffer = io.BytesIO()
-            img.save(buffer, format="JPEG", quality=preset.jpeg_quality)
-            return buffer.getvalue()
-
-        if cv2_available:
+        if self.jpeg_encoder == JPEG_ENCODER_CV2:
             try:
-                import cv2
-
-                return await loop.run_in_executor(None, encode_cv2)
+                return await loop.run_in_executor(
+                    None, self._encode_cv2, png_bytes, preset
+                )
             except Exception as e:
                 logger.warning(f"OpenCV JPEG encoding failed, falling back to PIL: {e}")
 
-        return await loop.run_in_executor(None, encode_pil)
+        return await loop.run_in_executor(None, self._encode_pil, png_bytes, preset)
+
+    def _encode_cv2(self, png_bytes: bytes, preset: QualityPreset) -> bytes:
+        # IMREAD_COLOR drops alpha while decoding (no separate RGBA->RGB pass)
+        img = cv2.imdecode(np.frombuffer(png_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise ValueError("Failed to decode image")
+
+        h, w = img.shape[:2]
+        size = _scaled_size(w, h, preset.max_size)
+        if size is not None:
+            # Reuse this thread's resize target for the same output size
+            buffers = self._encode_buffers
+            dst = getattr(buffers, "cv2_resized", None)
+            if dst is None or dst.shape[:2] != (size[1], size[0]):
+                dst = buffers.cv2_resized = np.empty((size[1], size[0], 3), np.uint8)
+            img = cv2.resize(img, size, dst=dst, interpolation=cv2.INTER_AREA)
+
+        ok, jpeg = cv2.imencode(
+            ".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, preset.jpeg_quality]
+        )
+        if not ok:
+            raise ValueError("Failed to encode JPEG")
+        return jpeg.tobytes()
+
+    def _encode_pil(self, png_bytes: bytes, preset: QualityPreset) -> bytes:
+        img = Image.open(io.BytesIO(png_bytes))
+
+        size = _scaled_size(img.width, img.height, preset.max_size)
+        if size is not None:
+            # Box-average by the integer factor first (cheap), finish with BILINEAR
+            factor = min(img.width // size[0], img.height // size[1])
+            if factor >= 2:
+                img = img.reduce(factor)
+
+        # Convert to RGB once, after the reduce (JPEGs don't support RGBA)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+
+        if size is not None and img.size != size:
+            img = img.resize(size, Image.BILINEAR, reducing_gap=2.0)
+
+        buffers = self._encode_buffers
+        buffer = getattr(buffers, "jpeg", None)
+        if buffer is None:
+            buffer = buffers.jpeg = io.BytesIO()
+        buffer.seek(0)
+        buffer.truncate()
+        img.save(buffer, format="JPEG", quality=preset.jpeg_quality)
+        return buffer.getvalue()
 
     async def start_stream(
         self,
@@ -334,7 +399,9 @@ class StreamManager:
                 try:
                     start = time.time()
 
-                    jpeg = await self.capture_screenshot(device_id, quality)
+                    jpeg = await self.capture_screenshot(
+                        device_id, quality, skip_unchanged=True
+                    )
 
                     if jpeg:
                         for callback in self.callbacks.get(device_id, []):
@@ -378,6 +445,7 @@ class StreamManager:
             except asyncio.CancelledError:
                 pass
             del self.active_streams[device_id]
+            self._change_detectors.pop(device_id, None)
 
             # Notify adb_bridge that streaming stopped
             if self.adb_bridge and hasattr(self.adb_bridge, "stop_stream"):
@@ -507,6 +575,67 @@ class StreamManager:
 
         return results
 
+    async def benchmark_encode(
+        self, width: int = 1080, height: int = 2400, iterations: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Benchmark JPEG encoding of a synthetic capture for each quality preset.
+
+        Args:
+            width: Capture width in pixels
+            height: Capture height in pixels
+            iterations: Encodes per preset (after one warm-up)
+
+        Returns:
+            Dictionary with per-preset timings and output sizes
+        """
+        loop = asyncio.get_event_loop()
+        png_bytes = await loop.run_in_executor(
+            None, _synthetic_capture_png, width, height
+        )
+        results = {
+            "encoder": self.jpeg_encoder,
+            "width": width,
+            "height": height,
+            "png_bytes": len(png_bytes),
+            "iterations": iterations,
+            "presets": {},
+        }
+
+        for name, preset in QUALITY_PRESETS.items():
+            jpeg = await self._encode_jpeg(png_bytes, preset)
+            times = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                jpeg = await self._encode_jpeg(png_bytes, preset)
+                times.append((time.perf_counter() - start) * 1000)
+
+            results["presets"][name] = {
+                "min_ms": round(min(times), 1),
+                "max_ms": round(max(times), 1),
+                "avg_ms": round(sum(times) / len(times), 1),
+                "jpeg_bytes": len(jpeg),
+            }
+
+        return results
+
+
+def _synthetic_capture_png(width: int, height: int) -> bytes:
+    """Screen-like RGBA PNG: flat panels plus a noisy (photo-like) band."""
+    rng = np.random.default_rng(0)
+    pixels = np.full((height, width, 4), 255, np.uint8)
+    for _ in range(60):
+        y, x = rng.integers(0, height), rng.integers(0, width)
+        pixels[y : y + rng.integers(20, 200), x : x + rng.integers(20, 500), :3] = (
+            rng.integers(0, 255, 3)
+        )
+    band = slice(height * 5 // 12, height * 7 // 12)
+    pixels[band, :, :3] = rng.integers(0, 255, pixels[band, :, :3].shape)
+
+    buffer = io.BytesIO()
+    Image.fromarray(pixels, "RGBA").save(buffer, format="PNG")
+    return buffer.getvalue()
+
 
 # Global instance
 stream_manager: Optional[StreamManager] = None
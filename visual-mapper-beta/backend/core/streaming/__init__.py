@@ -4,6 +4,12 @@ Provides low-latency screen capture from Android companion app.
 """
 
 from .companion_receiver import CompanionStreamReceiver, companion_stream_manager
+from .frame_change import FrameChange, FrameChangeDetector
 
-__all__ = ["CompanionStreamReceiver", "companion_stream_manager"]
+__all__ = [
+    "CompanionStreamReceiver",
+    "companion_stream_manager",
+    "FrameChange",
+    "FrameChangeDetector",
+]
 # Trigger sync 1768614819
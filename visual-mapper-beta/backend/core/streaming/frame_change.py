@@ -0,0 +1,168 @@
+"""
+Frame Change Detection - Skip encoding and sending static frames.
+
+Dashboards mostly stream screens that do not change. Each captured frame is
+compared with the last frame that was actually sent:
+1. Byte digest of the raw capture (identical screencap output, no decode)
+2. Downsampled luma thumbnail compared tile by tile
+
+Unchanged frames are suppressed except for a periodic keepalive, and the
+changed tiles are reported as normalized rectangles so clients can patch.
+"""
+
+import hashlib
+import io
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Normalized (x, y, width, height), each 0.0-1.0 of the frame
+TileRect = Tuple[float, float, float, float]
+
+# Seconds between forced frames while the screen is static
+DEFAULT_KEEPALIVE_INTERVAL = 2.0
+
+
+@dataclass
+class FrameChange:
+    """
+    Result of comparing a frame with the last sent frame.
+
+    tiles is None when the whole frame must be treated as new (first frame
+    or size change), an empty list when nothing changed.
+    """
+
+    changed: bool
+    tiles: Optional[List[TileRect]] = field(default=None)
+    keepalive: bool = False
+
+    @property
+    def should_send(self) -> bool:
+        return self.changed or self.keepalive
+
+
+class FrameChangeDetector:
+    """
+    Detects whether a captured frame differs from the last sent frame.
+
+    Not thread-safe; use one detector per capture loop.
+    """
+
+    def __init__(
+        self,
+        keepalive_interval: float = DEFAULT_KEEPALIVE_INTERVAL,
+        pixel_threshold: int = 8,
+        thumb_width: int = 135,
+        tile_size: int = 8,
+    ):
+        """
+        Args:
+            keepalive_interval: Seconds after which an unchanged frame is sent anyway
+            pixel_threshold: Luma difference (0-255) for a thumbnail pixel to count as changed
+            thumb_width: Approximate width of the luma thumbnail
+            tile_size: Tile edge in thumbnail pixels
+        """
+        self.keepalive_interval = keepalive_interval
+        self.pixel_threshold = pixel_threshold
+        self.thumb_width = thumb_width
+        self.tile_size = tile_size
+
+        self._last_digest: Optional[bytes] = None
+        self._last_luma: Optional[np.ndarray] = None
+        self._last_emit = 0.0
+
+        self.frames_checked = 0
+        self.frames_suppressed = 0
+
+    def reset(self):
+        """Forget the reference frame (next frame counts as fully changed)."""
+        self._last_digest = None
+        self._last_luma = None
+
+    def check(
+        self,
+        frame_bytes: bytes,
+        image: Optional[Image.Image] = None,
+        now: Optional[float] = None,
+    ) -> FrameChange:
+        """
+        Compare a captured frame with the last sent frame.
+
+        Args:
+            frame_bytes: Raw encoded capture (PNG/JPEG)
+            image: Decoded image if the caller already has one
+            now: Monotonic timestamp (defaults to time.monotonic())
+
+        Returns:
+            FrameChange describing whether (and where) the frame changed
+        """
+        now = time.monotonic() if now is None else now
+        self.frames_checked += 1
+
+        digest = hashlib.blake2b(frame_bytes, digest_size=16).digest()
+        if digest == self._last_digest:
+            tiles: Optional[List[TileRect]] = []
+        else:
+            if image is None:
+                image = Image.open(io.BytesIO(frame_bytes))
+            luma = self._luma(image)
+            tiles = self._changed_tiles(luma)
+            if tiles is None or tiles:
+                # Compare against the last *sent* frame so slow drift still registers
+                self._last_luma = luma
+                self._last_digest = digest
+
+        if tiles is None or tiles:
+            self._last_emit = now
+            return FrameChange(changed=True, tiles=tiles)
+
+        if now - self._last_emit >= self.keepalive_interval:
+            self._last_emit = now
+            return FrameChange(changed=False, tiles=[], keepalive=True)
+
+        self.frames_suppressed += 1
+        return FrameChange(changed=False, tiles=[])
+
+    def _luma(self, image: Image.Image) -> np.ndarray:
+        factor = max(1, image.width // self.thumb_width)
+        small = image.reduce(factor) if factor > 1 else image
+        return np.asarray(small.convert("L"), dtype=np.int16)
+
+    def _changed_tiles(self, luma: np.ndarray) -> Optional[List[TileRect]]:
+        """Normalized rectangles of changed tiles (None if no comparable reference)."""
+        previous = self._last_luma
+        if previous is None or previous.shape != luma.shape:
+            return None
+
+        changed = np.abs(luma - previous) > self.pixel_threshold
+        if not changed.any():
+            return []
+
+        h, w = changed.shape
+        t = self.tile_size
+        rows, cols = -(-h // t), -(-w // t)
+        padded = np.zeros((rows * t, cols * t), dtype=bool)
+        padded[:h, :w] = changed
+        tile_map = padded.reshape(rows, t, cols, t).any(axis=(1, 3))
+
+        # Merge horizontal runs of changed tiles into one rectangle per run
+        rects: List[TileRect] = []
+        for ty in range(rows):
+            row = tile_map[ty]
+            tx = 0
+            while tx < cols:
+                if not row[tx]:
+                    tx += 1
+                    continue
+                start = tx
+                while tx < cols and row[tx]:
+                    tx += 1
+                x0, y0 = start * t / w, ty * t / h
+                x1, y1 = min(tx * t, w) / w, min((ty + 1) * t, h) / h
+                rects.append(
+                    (round(x0, 4), round(y0, 4), round(x1 - x0, 4), round(y1 - y0, 4))
+                )
+        return rects
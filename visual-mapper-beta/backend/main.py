@@ -47,6 +47,7 @@ from utils.error_handler import handle_api_error
 from utils.device_migrator import DeviceMigrator
 from services.connection_monitor import ConnectionMonitor
 from utils.device_security import DeviceSecurityManager
+from utils.icon_index import get_icon_index
 
 # Phase 8: Flow System
 from core.flows import FlowManager, FlowExecutor, FlowScheduler, FlowExecutionHistory
@@ -305,6 +306,9 @@ MQTT_CA_CERT = os.getenv("MQTT_CA_CERT", "")
 # Set to "false" to use SVG letter icons (faster, no caching needed)
 ENABLE_REAL_ICONS = os.getenv("ENABLE_REAL_ICONS", "true").lower() == "true"
 
+# Live stream: seconds between re-sent frames while the screen is static
+STREAM_KEEPALIVE_INTERVAL = float(os.getenv("STREAM_KEEPALIVE_INTERVAL", "2.0"))
+
 # HTML/CSS/JS Cache Control (Development Mode)
 # Set DISABLE_HTML_CACHE=false in production to enable browser caching
 DISABLE_HTML_CACHE = os.getenv("DISABLE_HTML_CACHE", "true").lower() == "true"
@@ -432,6 +436,9 @@ async def lifespan(app: FastAPI):
     )
     logger.info(f"[Server] ✅ Play Store Icon Scraper initialized")
 
+    # Index cached icons once so the icon endpoint never globs the cache dirs
+    get_icon_index().build(DATA_DIR / "app-icons-playstore", DATA_DIR / "app-icons")
+
     # Initialize Device Icon Scraper (independent of MQTT)
     device_icon_scraper = DeviceIconScraper(
         adb_bridge=adb_bridge, cache_dir=str(DATA_DIR / "device-icons")
@@ -454,6 +461,8 @@ async def lifespan(app: FastAPI):
 
     # Initialize Stream Manager (enhanced capture with adbutils)
     stream_manager = get_stream_manager(adb_bridge)
+    stream_manager.keepalive_interval = STREAM_KEEPALIVE_INTERVAL
+    streaming.shared_capture_manager.keepalive_interval = STREAM_KEEPALIVE_INTERVAL
     logger.info("[Server] ✅ Stream Manager initialized (enhanced capture)")
 
     # Initialize ADB Maintenance utilities
@@ -507,6 +516,11 @@ async def lifespan(app: FastAPI):
     )
     logger.info("[Server] ✅ Connection Monitor initialized")
 
+    # Periodically persist sensor runtime values (definition files stay untouched)
+    _background_tasks.append(
+        asyncio.create_task(sensor_manager.runtime_state.run_periodic_snapshots())
+    )
+
     # Connect to MQTT broker
     connected = await mqtt_manager.connect()
     if connected:
@@ -1038,6 +1052,9 @@ async def lifespan(app: FastAPI):
     if sensor_updater:
         await sensor_updater.stop_all_updates()
 
+    # Persist the latest sensor runtime values
+    sensor_manager.runtime_state.snapshot()
+
     # Stop connection monitor
     if connection_monitor:
         await connection_monitor.stop()
@@ -3,7 +3,7 @@ Visual Mapper - App Icon Extractor (Phase 8 Enhancement)
 Extracts real app icons from Android devices via ADB
 
 Features:
-- Extracts icons from APKs on device
+- Extracts icons from APKs on device (ranged reads, no full APK pull)
 - Local persistent cache (data/app-icons/)
 - Fallback to SVG if extraction fails
 - Toggle via ENABLE_REAL_ICONS config flag
@@ -12,14 +12,30 @@ Features:
 import os
 import logging
 import hashlib
+import shlex
 import subprocess
 import tempfile
+import threading
+import time
 import zipfile
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Dict, Optional, Set, Tuple, Union
+
+from utils.icon_index import SOURCE_APK, get_icon_index
+from utils.remote_file import RemoteRangeFile
 
 logger = logging.getLogger(__name__)
 
+# dd block size for ranged APK reads (RemoteRangeFile blocks are multiples of it)
+_DD_BLOCK_SIZE = 4096
+
+# Seconds a batched APK path listing stays usable (covers one prefetch run)
+_APK_PATHS_TTL = 300.0
+
+
+class _RangedReadsUnsupported(OSError):
+    """The device lacks a working stat/dd, so ranged reads can never work"""
+
 
 class AppIconExtractor:
     """
@@ -27,7 +43,7 @@ class AppIconExtractor:
 
     Strategy:
     1. Get APK path from device
-    2. Pull APK to temp location
+    2. Open the APK in place with ranged reads (pull it only as a fallback)
     3. Extract icon from APK (it's a ZIP file)
     4. Cache locally
     5. Return PNG data
@@ -47,6 +63,15 @@ class AppIconExtractor:
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.enable_extraction = enable_extraction
 
+        # Devices without usable ranged reads (toolbox without dd/stat, etc.)
+        self._ranged_unsupported: Set[str] = set()
+
+        # device_id -> (monotonic load time, {package: base APK path}) from one
+        # `pm list packages -f`; dropped once used up or older than the TTL
+        self._apk_paths: Dict[str, Tuple[float, Dict[str, str]]] = {}
+        # Prefetch workers resolve paths from several threads at once
+        self._apk_paths_lock = threading.Lock()
+
         logger.info(
             f"[AppIconExtractor] Initialized (cache: {cache_dir}, enabled: {enable_extraction})"
         )
@@ -72,6 +97,7 @@ class AppIconExtractor:
         cache_path = self._get_cache_path(package_name)
         if cache_path.exists():
             logger.debug(f"[AppIconExtractor] Cache hit for {package_name}")
+            get_icon_index().record(SOURCE_APK, package_name, cache_path)
             return cache_path.read_bytes()
 
         # Extract from device
@@ -80,6 +106,7 @@ class AppIconExtractor:
             if icon_data:
                 # Save to cache
                 cache_path.write_bytes(icon_data)
+                get_icon_index().record(SOURCE_APK, package_name, cache_path)
                 logger.info(
                     f"[AppIconExtractor] Extracted and cached icon for {package_name} ({len(icon_data)} bytes)"
                 )
@@ -105,8 +132,8 @@ class AppIconExtractor:
 
         Steps:
         1. Get APK path from package manager
-        2. Pull APK to temp file
-        3. Extract icon from APK ZIP
+        2. Read the APK ZIP remotely (directory + icon entry only)
+        3. Fall back to pulling the APK to a temp file
         4. Return PNG data
         """
         try:
@@ -118,7 +145,13 @@ class AppIconExtractor:
                 )
                 return None
 
-            # 2. Pull APK to temp file
+            # 2. Ranged reads: only the ZIP directory and icon entry cross ADB
+            if device_id not in self._ranged_unsupported:
+                icon_data = self._extract_icon_remote(device_id, apk_path, package_name)
+                if icon_data is not False:
+                    return icon_data
+
+            # 3. Pull APK to temp file
             with tempfile.NamedTemporaryFile(delete=False, suffix=".apk") as tmp_apk:
                 tmp_apk_path = tmp_apk.name
 
@@ -142,8 +175,66 @@ class AppIconExtractor:
             )
             return None
 
+    def load_apk_paths(self, device_id: str) -> Dict[str, str]:
+        """
+        Resolve the base APK path of every package with a single pm call
+
+        Prefetching icons for a whole device then skips the per-package
+        `pm path` round trip. Each path is used once and the listing expires
+        after a few minutes (apps can be updated and move), later lookups go
+        back to `pm path`.
+
+        Returns:
+            Dict of package name -> APK path (empty on failure)
+        """
+        paths: Dict[str, str] = {}
+        try:
+            result = subprocess.run(
+                ["adb", "-s", device_id, "shell", "pm", "list", "packages", "-f"],
+                capture_output=True,
+                text=True,
+                timeout=30,
+            )
+            if result.returncode == 0:
+                # package:/data/app/~~abc/com.example-xyz==/base.apk=com.example
+                for line in result.stdout.splitlines():
+                    if not line.startswith("package:"):
+                        continue
+                    path, sep, package = line[8:].strip().rpartition("=")
+                    if sep and path and package:
+                        paths[package] = path
+        except Exception as e:
+            logger.error(f"[AppIconExtractor] Failed to list APK paths: {e}")
+
+        if paths:
+            now = time.monotonic()
+            with self._apk_paths_lock:
+                # Drop listings of other devices that were never used up
+                for other, (loaded_at, _) in list(self._apk_paths.items()):
+                    if now - loaded_at > _APK_PATHS_TTL:
+                        del self._apk_paths[other]
+                self._apk_paths[device_id] = (now, dict(paths))
+            logger.info(
+                f"[AppIconExtractor] Resolved {len(paths)} APK paths on {device_id}"
+            )
+        return paths
+
     def _get_apk_path(self, device_id: str, package_name: str) -> Optional[str]:
-        """Get APK path from device using pm path"""
+        """Get APK path from device (batched pm listing, else pm path)"""
+        cached = None
+        with self._apk_paths_lock:
+            entry = self._apk_paths.get(device_id)
+            if entry:
+                loaded_at, paths = entry
+                if time.monotonic() - loaded_at > _APK_PATHS_TTL:
+                    del self._apk_paths[device_id]
+                else:
+                    cached = paths.pop(package_name, None)
+                    if not paths:
+                        del self._apk_paths[device_id]
+        if cached:
+            return cached
+
         try:
             result = subprocess.run(
                 ["adb", "-s", device_id, "shell", "pm", "path", package_name],
@@ -175,6 +266,99 @@ class AppIconExtractor:
 
         return None
 
+    def _extract_icon_remote(
+        self, device_id: str, apk_path: str, package_name: str
+    ):
+        """
+        Extract icon by reading the APK on the device through ranged dd reads
+
+        Returns:
+            Icon bytes, None if the APK has no icon, or False if ranged reads
+            are not usable (caller falls back to a full pull)
+        """
+        try:
+            size = self._get_remote_file_size(device_id, apk_path)
+            apk_file = RemoteRangeFile(
+                lambda offset, length: self._read_remote_range(
+                    device_id, apk_path, offset, length
+                ),
+                size,
+            )
+            with apk_file:
+                # Fail fast (before the search) if the ZIP directory is unreadable
+                zipfile.ZipFile(apk_file).close()
+                icon_data = self._extract_icon_from_apk(apk_file, package_name)
+                # The icon search swallows errors; a failed read isn't "no icon"
+                if apk_file.fetch_error is not None:
+                    raise apk_file.fetch_error
+                logger.debug(
+                    f"[AppIconExtractor] Ranged read for {package_name}: "
+                    f"{apk_file.bytes_fetched} of {size} bytes in {apk_file.fetch_count} reads"
+                )
+                return icon_data
+        except _RangedReadsUnsupported as e:
+            self._ranged_unsupported.add(device_id)
+            logger.info(
+                f"[AppIconExtractor] Ranged APK reads unavailable on {device_id}, "
+                f"falling back to adb pull: {e}"
+            )
+            return False
+        except Exception as e:
+            logger.info(
+                f"[AppIconExtractor] Ranged read of {package_name} failed, "
+                f"falling back to adb pull: {e}"
+            )
+            return False
+
+    def _get_remote_file_size(self, device_id: str, remote_path: str) -> int:
+        """Get a file size on the device"""
+        result = subprocess.run(
+            [
+                "adb",
+                "-s",
+                device_id,
+                "shell",
+                f"stat -c %s {shlex.quote(remote_path)}",
+            ],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        if result.returncode != 0:
+            error = result.stderr.strip()
+            if result.returncode == 127 or "not found" in error:
+                raise _RangedReadsUnsupported(f"stat unavailable: {error}")
+            raise OSError(f"stat failed: {error}")
+        try:
+            return int(result.stdout.strip())
+        except ValueError:
+            # Toolbox stat without -c support prints something else entirely
+            raise _RangedReadsUnsupported(
+                f"unexpected stat output: {result.stdout.strip()[:100]}"
+            )
+
+    def _read_remote_range(
+        self, device_id: str, remote_path: str, offset: int, length: int
+    ) -> bytes:
+        """Read [offset, offset + length) of a device file (block-aligned) via exec-out dd"""
+        if offset % _DD_BLOCK_SIZE or length % _DD_BLOCK_SIZE:
+            raise ValueError("Ranged reads must be aligned to the dd block size")
+        command = (
+            f"dd if={shlex.quote(remote_path)} bs={_DD_BLOCK_SIZE} "
+            f"skip={offset // _DD_BLOCK_SIZE} count={length // _DD_BLOCK_SIZE} 2>/dev/null"
+        )
+        result = subprocess.run(
+            ["adb", "-s", device_id, "exec-out", command],
+            capture_output=True,
+            timeout=30,
+        )
+        if result.returncode != 0:
+            raise OSError(f"dd failed: {result.stderr.decode(errors='ignore')}")
+        if not result.stdout:
+            # Only called for ranges inside the file, so dd itself is unusable
+            raise _RangedReadsUnsupported(f"dd returned no data at offset {offset}")
+        return result.stdout
+
     def _pull_apk(self, device_id: str, apk_path: str, dest_path: str):
         """Pull APK from device"""
         result = subprocess.run(
@@ -187,10 +371,10 @@ class AppIconExtractor:
             raise Exception(f"Failed to pull APK: {result.stderr.decode()}")
 
     def _extract_icon_from_apk(
-        self, apk_path: str, package_name: str
+        self, apk_path: Union[str, BinaryIO], package_name: str
     ) -> Optional[bytes]:
         """
-        Extract icon from APK (ZIP file)
+        Extract icon from APK (ZIP file path or seekable file object)
 
         Enhanced Strategy:
         1. Try common icon paths in order of preference (highest density first)
@@ -401,10 +585,12 @@ class AppIconExtractor:
             if cache_path.exists():
                 cache_path.unlink()
                 logger.info(f"[AppIconExtractor] Cleared cache for {package_name}")
+            get_icon_index().discard(SOURCE_APK, package_name)
         else:
             # Clear all cached icons
             for cache_file in self.cache_dir.glob("*.png"):
                 cache_file.unlink()
+            get_icon_index().discard(SOURCE_APK)
             logger.info("[AppIconExtractor] Cleared all icon cache")
 
     def get_cache_size(self) -> int:
@@ -39,11 +39,13 @@ class AppNameBackgroundFetcher:
 
         # Background task queue (package_name)
         self.queue = deque()
+        self.queued: Set[str] = set()  # Mirror of queue for O(1) dedupe
         self.processing: Set[str] = set()  # Currently processing
         self.completed: Set[str] = set()  # Successfully completed
         self.failed: Set[str] = set()  # Failed to fetch
         self.task = None  # Background worker task
         self.running = False
+        self._wakeup = asyncio.Event()  # Set when work is queued
 
         # Stats for progress tracking
         self.total_requested = 0
@@ -73,12 +75,14 @@ class AppNameBackgroundFetcher:
             return
 
         # Check if already queued
-        if package_name in self.queue:
+        if package_name in self.queued:
             logger.debug(f"[AppNameBackgroundFetcher] Already queued: {package_name}")
             return
 
         # Add to queue
         self.queue.append(package_name)
+        self.queued.add(package_name)
+        self._wakeup.set()
         self.total_requested += 1
         logger.debug(
             f"[AppNameBackgroundFetcher] Queued: {package_name} (queue size: {len(self.queue)})"
@@ -114,11 +118,13 @@ class AppNameBackgroundFetcher:
             try:
                 # Get next item from queue
                 if not self.queue:
-                    # Queue empty, sleep and check again
-                    await asyncio.sleep(2)
+                    # Queue empty, wait for request_name() to signal new work
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
                     continue
 
                 package_name = self.queue.popleft()
+                self.queued.discard(package_name)
 
                 # Mark as processing
                 self.processing.add(package_name)
@@ -243,6 +249,7 @@ class AppNameBackgroundFetcher:
     def reset_stats(self):
         """Reset session statistics (for new fetch session)"""
         self.queue.clear()
+        self.queued.clear()
         self.processing.clear()
         self.completed.clear()
         self.failed.clear()
@@ -4,6 +4,7 @@ Asynchronously fetches app icons in the background to populate cache
 
 Features:
 - Background task queue for icon fetching
+- Bounded concurrent workers with per-request deduplication
 - Smart prioritization (Play Store first, APK extraction fallback)
 - Non-blocking - returns SVG immediately, fetches real icon async
 - Auto-detection of new apps triggers background fetch
@@ -11,103 +12,167 @@ Features:
 
 import asyncio
 import logging
-from typing import Optional, Set
+from typing import Dict, Optional, Set, Tuple
 from collections import deque
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Icons fetched concurrently (across devices) and per device over ADB
+DEFAULT_MAX_CONCURRENCY = 6
+DEFAULT_PER_DEVICE_CONCURRENCY = 3
+# Concurrent Play Store lookups (external service, keep it polite)
+DEFAULT_PLAYSTORE_CONCURRENCY = 2
+
 
 class IconBackgroundFetcher:
     """
-    Background icon fetcher with priority queue
+    Background icon fetcher with a bounded worker pool
 
     Strategy:
     1. When icon requested but not in cache, return SVG immediately
     2. Add to background queue (Play Store then APK extraction)
     3. Next request will have cached icon (instant load)
+
+    Requests for the same (device, package) share one in-flight future.
+    Workers sleep on an asyncio.Event until work arrives, and ADB work is
+    bounded per device so one busy device cannot starve the others.
     """
 
-    def __init__(self, playstore_scraper, apk_extractor):
+    def __init__(
+        self,
+        playstore_scraper,
+        apk_extractor,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        per_device_concurrency: int = DEFAULT_PER_DEVICE_CONCURRENCY,
+        playstore_concurrency: int = DEFAULT_PLAYSTORE_CONCURRENCY,
+    ):
         """
         Initialize background icon fetcher
 
         Args:
             playstore_scraper: PlayStoreIconScraper instance
             apk_extractor: AppIconExtractor instance
+            max_concurrency: Number of worker tasks
+            per_device_concurrency: Concurrent APK extractions per device
+            playstore_concurrency: Concurrent Play Store lookups
         """
         self.playstore_scraper = playstore_scraper
         self.apk_extractor = apk_extractor
+        self.max_concurrency = max_concurrency
+        self.per_device_concurrency = per_device_concurrency
 
         # Background task queue (device_id, package_name)
         self.queue = deque()
         self.processing: Set[str] = set()  # Currently processing
-        self.task = None  # Background worker task
         self.running = False
+        self._workers: list = []
+        self._wakeup = asyncio.Event()
+
+        # (device_id, package_name) -> future shared by duplicate requests
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._device_slots: Dict[str, asyncio.Semaphore] = {}
+        self._playstore_slots = asyncio.Semaphore(playstore_concurrency)
 
         logger.info("[IconBackgroundFetcher] Initialized")
 
-    def request_icon(self, device_id: str, package_name: str):
+    @property
+    def task(self):
+        """First worker task (kept for callers that check the worker)"""
+        return self._workers[0] if self._workers else None
+
+    def request_icon(
+        self, device_id: str, package_name: str
+    ) -> Optional[asyncio.Future]:
         """
         Request icon to be fetched in background
 
         Args:
             device_id: ADB device ID (for APK extraction)
             package_name: App package name
+
+        Returns:
+            Future resolving to True/False when the fetch finishes (shared by
+            duplicate requests), or None if no event loop is running
         """
-        key = f"{device_id}:{package_name}"
+        item = (device_id, package_name)
 
-        # Skip if already in queue or processing
-        if key in self.processing:
-            logger.debug(f"[IconBackgroundFetcher] Already processing: {package_name}")
-            return
+        # Join the fetch already queued or in progress
+        future = self._inflight.get(item)
+        if future is not None:
+            logger.debug(f"[IconBackgroundFetcher] Already queued: {package_name}")
+            return future
 
-        # Check if already queued
-        for item in self.queue:
-            if item == (device_id, package_name):
-                logger.debug(f"[IconBackgroundFetcher] Already queued: {package_name}")
-                return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning(
+                f"[IconBackgroundFetcher] No event loop, cannot queue {package_name}"
+            )
+            return None
 
-        # Add to queue
-        self.queue.append((device_id, package_name))
+        future = loop.create_future()
+        self._inflight[item] = future
+        self.queue.append(item)
+        self._wakeup.set()
         logger.info(
             f"[IconBackgroundFetcher] Queued: {package_name} (queue size: {len(self.queue)})"
         )
 
-        # Start worker if not running
+        # Start workers if not running
         if not self.running:
             self.start()
 
+        return future
+
     def start(self):
-        """Start background worker task"""
+        """Start background worker tasks"""
         if self.running:
             logger.debug("[IconBackgroundFetcher] Worker already running")
             return
 
         self.running = True
-        self.task = asyncio.create_task(self._worker())
-        logger.info("[IconBackgroundFetcher] Background worker started")
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)
+        ]
+        logger.info(
+            f"[IconBackgroundFetcher] Background workers started ({self.max_concurrency})"
+        )
 
     def stop(self):
-        """Stop background worker task"""
+        """Stop background worker tasks"""
         self.running = False
-        if self.task:
-            self.task.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+        for future in self._inflight.values():
+            if not future.done():
+                future.cancel()
+        self._inflight.clear()
+        self.queue.clear()
         logger.info("[IconBackgroundFetcher] Background worker stopped")
 
+    def _device_slot(self, device_id: str) -> asyncio.Semaphore:
+        slot = self._device_slots.get(device_id)
+        if slot is None:
+            slot = asyncio.Semaphore(self.per_device_concurrency)
+            self._device_slots[device_id] = slot
+        return slot
+
     async def _worker(self):
         """Background worker that processes icon fetch queue"""
-        logger.info("[IconBackgroundFetcher] Worker loop started")
+        logger.debug("[IconBackgroundFetcher] Worker loop started")
 
         while self.running:
             try:
-                # Get next item from queue
                 if not self.queue:
-                    # Queue empty, sleep and check again
-                    await asyncio.sleep(2)
+                    # Queue empty, wait for request_icon() to signal new work
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
                     continue
 
-                device_id, package_name = self.queue.popleft()
+                item = self.queue.popleft()
+                device_id, package_name = item
                 key = f"{device_id}:{package_name}"
 
                 # Check if wizard is active on this device (affects ADB-based extraction only)
@@ -122,27 +187,29 @@ class IconBackgroundFetcher:
                 # Mark as processing
                 self.processing.add(key)
 
+                success = False
                 try:
                     # Pass wizard_active flag - allows Play Store fetch but skips APK extraction
-                    await self._fetch_icon(
+                    success = await self._fetch_icon(
                         device_id, package_name, skip_adb=wizard_active
                     )
                 finally:
-                    # Remove from processing
+                    # Remove from processing and wake everyone sharing the fetch
                     self.processing.discard(key)
+                    future = self._inflight.pop(item, None)
+                    if future is not None and not future.done():
+                        future.set_result(bool(success))
 
-                # Small delay between fetches to avoid overwhelming the system
-                await asyncio.sleep(0.5)
-
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"[IconBackgroundFetcher] Worker error: {e}")
-                await asyncio.sleep(1)
 
-        logger.info("[IconBackgroundFetcher] Worker loop stopped")
+        logger.debug("[IconBackgroundFetcher] Worker loop stopped")
 
     async def _fetch_icon(
         self, device_id: str, package_name: str, skip_adb: bool = False
-    ):
+    ) -> bool:
         """
         Fetch icon from Play Store or APK extraction
 
@@ -150,6 +217,9 @@ class IconBackgroundFetcher:
             device_id: ADB device ID
             package_name: App package name
             skip_adb: If True, skip APK extraction (ADB busy with wizard)
+
+        Returns:
+            True if an icon was cached
         """
         logger.debug(
             f"[IconBackgroundFetcher] Fetching icon: {package_name} (skip_adb={skip_adb})"
@@ -160,26 +230,28 @@ class IconBackgroundFetcher:
             # NOTE: playstore_scraper.get_icon() uses blocking HTTP calls (google_play_scraper + requests)
             # Must run in thread pool to avoid blocking asyncio event loop
             if self.playstore_scraper:
-                icon_data = await asyncio.to_thread(
-                    self.playstore_scraper.get_icon, package_name
-                )
+                async with self._playstore_slots:
+                    icon_data = await asyncio.to_thread(
+                        self.playstore_scraper.get_icon, package_name
+                    )
                 if icon_data:
                     logger.info(
                         f"[IconBackgroundFetcher] ✅ Play Store cached: {package_name}"
                     )
-                    return
+                    return True
 
             # Step 2: Try APK extraction (slow, requires ADB)
             # NOTE: APK extraction also involves blocking I/O, run in thread
             if self.apk_extractor and not skip_adb:
-                icon_data = await asyncio.to_thread(
-                    self.apk_extractor.get_icon, device_id, package_name
-                )
+                async with self._device_slot(device_id):
+                    icon_data = await asyncio.to_thread(
+                        self.apk_extractor.get_icon, device_id, package_name
+                    )
                 if icon_data:
                     logger.info(
                         f"[IconBackgroundFetcher] ✅ APK extracted: {package_name}"
                     )
-                    return
+                    return True
             elif skip_adb:
                 logger.debug(
                     f"[IconBackgroundFetcher] Skipping APK extraction (wizard active): {package_name}"
@@ -194,6 +266,8 @@ class IconBackgroundFetcher:
                 f"[IconBackgroundFetcher] Fetch failed for {package_name}: {e}"
             )
 
+        return False
+
     async def prefetch_all_apps(
         self, device_id: str, packages: list[str], max_apps: Optional[int] = None
     ):
@@ -212,6 +286,14 @@ class IconBackgroundFetcher:
         # Add all packages to queue
         packages_to_fetch = packages[:max_apps] if max_apps else packages
 
+        # One `pm list packages -f` instead of a `pm path` per package
+        if (
+            self.apk_extractor
+            and self.apk_extractor.enable_extraction
+            and packages_to_fetch
+        ):
+            await asyncio.to_thread(self.apk_extractor.load_apk_paths, device_id)
+
         for package_name in packages_to_fetch:
             self.request_icon(device_id, package_name)
 
@@ -224,5 +306,7 @@ class IconBackgroundFetcher:
         return {
             "queue_size": len(self.queue),
             "processing_count": len(self.processing),
+            "in_flight": len(self._inflight),
+            "workers": len(self._workers),
             "is_running": self.running,
         }
@@ -31,6 +31,7 @@ MQTT Topics:
 """
 
 import argparse
+import heapq
 import json
 import logging
 import math
@@ -472,6 +473,66 @@ class PrioritizedReplayBuffer:
         return self.tree.n_entries
 
 
+# === Per-State Q-Value Index ===
+
+
+class StateActionIndex:
+    """
+    Per-state view of a flat "screen_hash|action_key" Q-table
+
+    Keeps each state's Q-values and their running max (floored at 0.0, the
+    value of an unseen state) so the next-state max used by every TD target
+    is a dict lookup instead of a scan over the whole table.
+    """
+
+    def __init__(self, q_table: Optional[Dict[str, float]] = None):
+        self._values: Dict[str, Dict[str, float]] = {}  # state -> {key: q}
+        self._max: Dict[str, float] = {}
+        if q_table:
+            self.rebuild(q_table)
+
+    @staticmethod
+    def state_of(key: str) -> str:
+        return key.split("|", 1)[0]
+
+    def rebuild(self, q_table: Dict[str, float]):
+        self.clear()
+        for key, value in q_table.items():
+            self.set(key, value)
+
+    def clear(self):
+        self._values.clear()
+        self._max.clear()
+
+    def set(self, key: str, value: float):
+        state = self.state_of(key)
+        values = self._values.setdefault(state, {})
+        previous = values.get(key)
+        values[key] = value
+
+        current_max = self._max.get(state, 0.0)
+        if value >= current_max:
+            self._max[state] = value
+        elif previous is not None and previous == current_max:
+            # The max entry went down; rescan this state's actions only
+            self._max[state] = max(0.0, max(values.values()))
+
+    def discard(self, key: str):
+        state = self.state_of(key)
+        values = self._values.get(state)
+        if not values or key not in values:
+            return
+        value = values.pop(key)
+        if not values:
+            del self._values[state]
+            self._max.pop(state, None)
+        elif value == self._max.get(state, 0.0):
+            self._max[state] = max(0.0, max(values.values()))
+
+    def max_q(self, screen_hash: str) -> float:
+        return self._max.get(screen_hash, 0.0)
+
+
 # === Enhanced Q-Table Trainer ===
 
 
@@ -494,6 +555,7 @@ class QTableTrainer:
 
     def __init__(self):
         self.q_table: Dict[str, float] = {}
+        self.state_index = StateActionIndex()  # O(1) next-state max Q
         self.visit_counts: Dict[str, int] = {}
         self.replay_buffer = PrioritizedReplayBuffer(REPLAY_BUFFER_SIZE)
         self.stats = TrainingStats()
@@ -606,6 +668,7 @@ class QTableTrainer:
             # Q-learning update with adaptive learning rate
             new_q = current_q + HYPERPARAMS.alpha * (target_q - current_q)
             self.q_table[key] = new_q
+            self.state_index.set(key, new_q)
 
             # Update stats
             self.visit_counts[key] = self.visit_counts.get(key, 0) + 1
@@ -734,12 +797,7 @@ class QTableTrainer:
 
     def _get_max_q(self, screen_hash: str) -> float:
         """Get max Q-value for all actions in a screen"""
-        max_q = 0.0
-        prefix = f"{screen_hash}|"
-        for key, value in self.q_table.items():
-            if key.startswith(prefix):
-                max_q = max(max_q, value)
-        return max_q
+        return self.state_index.max_q(screen_hash)
 
     def train_batch(self, batch_size: int = BATCH_SIZE):
         """Train on a batch using prioritized experience replay"""
@@ -767,6 +825,7 @@ class QTableTrainer:
                 weight = weights[i] if NUMPY_AVAILABLE else 1.0
                 new_q = current_q + HYPERPARAMS.alpha * weight * td_error
                 self.q_table[key] = new_q
+                self.state_index.set(key, new_q)
 
                 self.updates_since_last += 1
 
@@ -843,6 +902,7 @@ class QTableTrainer:
                 with open(path, "r") as f:
                     data = json.load(f)
                 self.q_table = data.get("q_table", {})
+                self.state_index.rebuild(self.q_table)
                 self.visit_counts = data.get("visit_counts", {})
                 self.dangerous_patterns = data.get("dangerous_patterns", {})
                 self.success_patterns = data.get("success_patterns", {})
@@ -856,6 +916,7 @@ class QTableTrainer:
         """Reset all learned data"""
         with self.lock:
             self.q_table.clear()
+            self.state_index.clear()
             self.visit_counts.clear()
             self.dangerous_patterns.clear()
             self.success_patterns.clear()
@@ -909,20 +970,23 @@ class QTableTrainer:
             # Calculate how many to remove (remove 20% extra to avoid frequent pruning)
             to_remove_count = int((current_size - max_size) * 1.2)
 
-            # Sort entries by visit count (ascending) - least visited first
-            entries = [
-                (key, self.visit_counts.get(key, 0)) for key in self.q_table.keys()
-            ]
-            entries.sort(key=lambda x: x[1])
+            # Least visited entries first (stable, like a full sort by visit count)
+            visit_counts = self.visit_counts
+            candidates = heapq.nsmallest(
+                to_remove_count,
+                self.q_table.keys(),
+                key=lambda key: visit_counts.get(key, 0),
+            )
 
             # Remove least visited entries
             removed_count = 0
-            for key, visit_count in entries[:to_remove_count]:
+            for key in candidates:
                 # Don't remove blocked states (important safety info)
                 if key in self.blocked_states:
                     continue
 
                 del self.q_table[key]
+                self.state_index.discard(key)
                 self.visit_counts.pop(key, None)
                 self.danger_scores.pop(key, None)
                 self.danger_counts.pop(key, None)
@@ -1059,8 +1123,17 @@ if ONNX_DML_AVAILABLE and NUMPY_AVAILABLE:
             self.state_encoder: Dict[str, int] = {}
             self.next_state_id = 0
 
+            # Encoding constants and a reusable buffer for replay batches
+            self._hash_multipliers = np.arange(1, state_dim + 1, dtype=np.float64)
+            self._position_scales = np.array(
+                [10000 ** (i / 16) for i in range(min(16, state_dim))],
+                dtype=np.float64,
+            )
+            self._batch_states = np.empty((BATCH_SIZE, state_dim), dtype=np.float32)
+
             # Q-table backup for states we haven't encoded
             self.q_table: Dict[str, float] = {}
+            self.state_index = StateActionIndex()
             self.visit_counts: Dict[str, int] = {}
 
             # Training data
@@ -1090,29 +1163,45 @@ if ONNX_DML_AVAILABLE and NUMPY_AVAILABLE:
 
         def _encode_state(self, screen_hash: str, action_key: str) -> np.ndarray:
             """Encode state-action pair as fixed-size vector"""
+            state_vec = np.empty(self.state_dim, dtype=np.float32)
+            self._encode_into(screen_hash, action_key, state_vec)
+            return state_vec.reshape(1, -1)
+
+        def _encode_into(self, screen_hash: str, action_key: str, out: np.ndarray):
+            """Write the encoding of a state-action pair into a 1-D float32 row"""
             key = f"{screen_hash}|{action_key}"
 
             # Get or create state ID
-            if key not in self.state_encoder:
-                self.state_encoder[key] = self.next_state_id
+            state_id = self.state_encoder.get(key)
+            if state_id is None:
+                state_id = self.state_encoder[key] = self.next_state_id
                 self.next_state_id += 1
 
-            state_id = self.state_encoder[key]
-
-            # Create embedding vector (hash-based encoding)
-            state_vec = np.zeros(self.state_dim, dtype=np.float32)
-
-            # Use hash to create deterministic but distributed encoding
+            # Pseudo-random values from float(hash * k). hash is split into
+            # 32-bit halves so both partial products are exact in float64 and
+            # their sum rounds once, matching the exact integer product.
             hash_val = hash(key)
-            for i in range(self.state_dim):
-                # Create pseudo-random values from hash
-                state_vec[i] = np.sin(hash_val * (i + 1) * 0.1) * 0.5 + 0.5
+            multipliers = self._hash_multipliers
+            phases = (hash_val >> 32) * multipliers
+            phases *= 2.0**32
+            phases += (hash_val & 0xFFFFFFFF) * multipliers
+            out[:] = np.sin(phases * 0.1) * 0.5 + 0.5
 
             # Add position encoding based on state ID
-            for i in range(min(16, self.state_dim)):
-                state_vec[i] += np.sin(state_id / (10000 ** (i / 16))) * 0.1
+            out[: len(self._position_scales)] += (
+                np.sin(state_id / self._position_scales) * 0.1
+            )
 
-            return state_vec.reshape(1, -1)
+        def _encode_batch(self, batch: List[ExplorationLogEntry]) -> np.ndarray:
+            """Encode replay entries into stacked rows of the preallocated buffer"""
+            if len(batch) > len(self._batch_states):
+                self._batch_states = np.empty(
+                    (len(batch), self.state_dim), dtype=np.float32
+                )
+            states = self._batch_states[: len(batch)]
+            for row, entry in zip(states, batch):
+                self._encode_into(entry.screen_hash, entry.action_key, row)
+            return states
 
         def _relu(self, x: np.ndarray) -> np.ndarray:
             """ReLU activation"""
@@ -1120,20 +1209,32 @@ if ONNX_DML_AVAILABLE and NUMPY_AVAILABLE:
 
         def _forward_numpy(self, state: np.ndarray) -> float:
             """Forward pass using numpy (CPU)"""
-            h1 = self._relu(state @ self.W1 + self.b1)
-            h2 = self._relu(h1 @ self.W2 + self.b2)
-            out = h2 @ self.W3 + self.b3
-            return float(out[0, 0])
+            return float(self._forward_numpy_batch(state)[0])
+
+        def _forward_numpy_batch(self, states: np.ndarray) -> np.ndarray:
+            """Forward pass for stacked states (N, state_dim) -> (N,)"""
+            h1 = states @ self.W1
+            h1 += self.b1
+            np.maximum(h1, 0, out=h1)
+            h2 = h1 @ self.W2
+            h2 += self.b2
+            np.maximum(h2, 0, out=h2)
+            out = h2 @ self.W3
+            out += self.b3
+            return out[:, 0]
 
         def _build_onnx_model(self) -> bytes:
             """Build ONNX model from current weights"""
             from onnx import helper, TensorProto, numpy_helper
 
             # Input
+            # Dynamic batch dimension so replay batches run in one call
             X = helper.make_tensor_value_info(
-                "input", TensorProto.FLOAT, [1, self.state_dim]
+                "input", TensorProto.FLOAT, ["batch", self.state_dim]
+            )
+            Y = helper.make_tensor_value_info(
+                "output", TensorProto.FLOAT, ["batch", 1]
             )
-            Y = helper.make_tensor_value_info("output", TensorProto.FLOAT, [1, 1])
 
             # Weights as initializers
             W1_init = numpy_helper.from_array(self.W1, name="W1")
@@ -1193,17 +1294,21 @@ if ONNX_DML_AVAILABLE and NUMPY_AVAILABLE:
 
         def _forward_onnx(self, state: np.ndarray) -> float:
             """Forward pass using ONNX Runtime (NPU)"""
+            return float(self._forward_onnx_batch(state)[0])
+
+        def _forward_onnx_batch(self, states: np.ndarray) -> np.ndarray:
+            """Forward pass for stacked states using ONNX Runtime (NPU)"""
             session = self._get_ort_session()
             if session is None:
-                return self._forward_numpy(state)
+                return self._forward_numpy_batch(states)
 
             try:
-                output = session.run(None, {"input": state})[0]
-                self.npu_inferences += 1
-                return float(output[0, 0])
+                output = session.run(None, {"input": states})[0]
+                self.npu_inferences += len(states)
+                return output[:, 0]
             except Exception as e:
                 logger.debug(f"ONNX inference failed, falling back to numpy: {e}")
-                return self._forward_numpy(state)
+                return self._forward_numpy_batch(states)
 
         def predict(self, screen_hash: str, action_key: str) -> float:
             """Predict Q-value for state-action pair"""
@@ -1224,8 +1329,15 @@ if ONNX_DML_AVAILABLE and NUMPY_AVAILABLE:
 
             return q_val
 
-        def _backward(self, state: np.ndarray, target: float):
-            """Backward pass to update weights (gradient descent)"""
+        def _backward(self, state: np.ndarray, target):
+            """
+            Backward pass to update weights (gradient descent)
+
+            state may be a stack of rows (N, state_dim) with target (N, 1).
+            That is one step on the summed gradient, not N per-sample steps:
+            every row sees the same pre-update weights, and clipping bounds
+            the sum (scaled by N) rather than each sample's gradient.
+            """
             # Forward pass with cache
             h1_pre = state @ self.W1 + self.b1
             h1 = self._relu(h1_pre)
@@ -1256,11 +1368,12 @@ if ONNX_DML_AVAILABLE and NUMPY_AVAILABLE:
             d_W1 = state.T @ d_h1_pre
             d_b1 = d_h1_pre.sum(axis=0, keepdims=True)
 
-            # Gradient clipping
-            max_grad = 1.0
-            d_W1 = np.clip(d_W1, -max_grad, max_grad)
-            d_W2 = np.clip(d_W2, -max_grad, max_grad)
-            d_W3 = np.clip(d_W3, -max_grad, max_grad)
+            # Gradient clipping (gradients are fresh arrays, clip in place);
+            # a summed batch gets the bound of as many per-sample steps
+            max_grad = 1.0 * len(state)
+            np.clip(d_W1, -max_grad, max_grad, out=d_W1)
+            np.clip(d_W2, -max_grad, max_grad, out=d_W2)
+            np.clip(d_W3, -max_grad, max_grad, out=d_W3)
 
             # Update weights
             self.W1 -= self.learning_rate * d_W1
@@ -1272,7 +1385,7 @@ if ONNX_DML_AVAILABLE and NUMPY_AVAILABLE:
 
             # Mark session for rebuild
             self.session_needs_rebuild = True
-            self.cpu_updates += 1
+            self.cpu_updates += len(state)
 
         def _training_loop(self):
             """Background training loop"""
@@ -1323,6 +1436,7 @@ if ONNX_DML_AVAILABLE and NUMPY_AVAILABLE:
                 # Q-learning update
                 new_q = current_q + HYPERPARAMS.alpha * (target - current_q)
                 self.q_table[key] = new_q
+                self.state_index.set(key, new_q)
                 self.visit_counts[key] = self.visit_counts.get(key, 0) + 1
 
                 # Train neural network
@@ -1336,12 +1450,7 @@ if ONNX_DML_AVAILABLE and NUMPY_AVAILABLE:
 
         def _get_max_q(self, screen_hash: str) -> float:
             """Get max Q-value for a screen"""
-            max_q = 0.0
-            prefix = f"{screen_hash}|"
-            for key, value in self.q_table.items():
-                if key.startswith(prefix):
-                    max_q = max(max_q, value)
-            return max_q
+            return self.state_index.max_q(screen_hash)
 
         def add_experience(self, entry: ExplorationLogEntry):
             """Add experience for training"""
@@ -1357,31 +1466,40 @@ if ONNX_DML_AVAILABLE and NUMPY_AVAILABLE:
 
             with self.lock:
                 batch, indices, weights = self.replay_buffer.sample(BATCH_SIZE)
-                td_errors = []
+                if not batch:
+                    return
+                count = len(batch)
 
-                for i, entry in enumerate(batch):
-                    state = self._encode_state(entry.screen_hash, entry.action_key)
+                states = self._encode_batch(batch)
 
-                    # Use NPU for forward pass to get current Q-value
-                    current_q = self._forward_onnx(state)
+                # Use NPU for one forward pass over the whole batch
+                current_q = self._forward_onnx_batch(states)
 
-                    # Get max Q for next state
-                    next_max_q = (
+                # Targets from rewards and next-state max Q
+                rewards = np.fromiter(
+                    (entry.reward for entry in batch), dtype=np.float32, count=count
+                )
+                next_max_q = np.fromiter(
+                    (
                         self._get_max_q(entry.next_screen_hash)
                         if entry.next_screen_hash
-                        else 0
-                    )
-                    target = entry.reward + HYPERPARAMS.gamma * next_max_q
+                        else 0.0
+                        for entry in batch
+                    ),
+                    dtype=np.float32,
+                    count=count,
+                )
+                targets = rewards + np.float32(HYPERPARAMS.gamma) * next_max_q
 
-                    # Calculate TD error for priority update
-                    td_error = abs(target - current_q)
-                    td_errors.append(td_error)
+                # TD errors for priority update
+                td_errors = np.abs(targets - current_q)
 
-                    # Weighted backward pass (CPU - gradients)
-                    self._backward(state, target * weights[i])
+                # Weighted backward pass (CPU - gradients), one step per batch
+                weighted = targets * np.asarray(weights, dtype=np.float32)
+                self._backward(states, weighted.reshape(-1, 1))
 
                 # Update priorities in replay buffer
-                self.replay_buffer.update_priorities(indices, td_errors)
+                self.replay_buffer.update_priorities(indices, td_errors.tolist())
                 self.stats.total_updates += BATCH_SIZE
 
         def get_stats(self) -> TrainingStats:
@@ -1440,6 +1558,7 @@ if ONNX_DML_AVAILABLE and NUMPY_AVAILABLE:
 
                 with self.lock:
                     self.q_table = data.get("q_table", {})
+                    self.state_index.rebuild(self.q_table)
                     self.visit_counts = data.get("visit_counts", {})
                     self.state_encoder = data.get("state_encoder", {})
                     self.next_state_id = len(self.state_encoder)
@@ -1475,6 +1594,7 @@ if ONNX_DML_AVAILABLE and NUMPY_AVAILABLE:
             """Reset all learned data"""
             with self.lock:
                 self.q_table.clear()
+                self.state_index.clear()
                 self.visit_counts.clear()
                 self.state_encoder.clear()
                 self.next_state_id = 0
@@ -83,6 +83,11 @@ class ScreenNode(BaseModel):
         description="Key UI elements that identify this screen (toolbar titles, tab labels, etc.)",
     )
 
+    # Perceptual fingerprint for fast visual identification
+    fingerprint: Optional[str] = Field(
+        None, description="Serialized screen fingerprint (dHash:pHash:thumbnail)"
+    )
+
     # Metadata
     learned_from: Literal["recording", "teaching", "mining"] = Field(
         "recording", description="How this screen was discovered"
@@ -18,6 +18,8 @@ from pathlib import Path
 from typing import Optional, Tuple
 from google_play_scraper import app as get_app_details
 
+from utils.icon_index import SOURCE_PLAYSTORE, get_icon_index
+
 logger = logging.getLogger(__name__)
 
 
@@ -63,6 +65,7 @@ class PlayStoreIconScraper:
         cache_path = self._get_cache_path(package_name)
         if cache_path.exists():
             logger.debug(f"[PlayStoreIconScraper] Cache hit for {package_name}")
+            get_icon_index().record(SOURCE_PLAYSTORE, package_name, cache_path)
             return cache_path.read_bytes()
 
         # Scrape from Play Store (also caches app name)
@@ -71,6 +74,7 @@ class PlayStoreIconScraper:
             if icon_data:
                 # Save icon to cache
                 cache_path.write_bytes(icon_data)
+                get_icon_index().record(SOURCE_PLAYSTORE, package_name, cache_path)
                 logger.info(
                     f"[PlayStoreIconScraper] ✅ Scraped and cached icon for {package_name} ({len(icon_data)} bytes)"
                 )
@@ -267,10 +271,12 @@ class PlayStoreIconScraper:
             if cache_path.exists():
                 cache_path.unlink()
                 logger.info(f"[PlayStoreIconScraper] Cleared cache for {package_name}")
+            get_icon_index().discard(SOURCE_PLAYSTORE, package_name)
         else:
             # Clear all cached icons
             for cache_file in self.cache_dir.glob("*.png"):
                 cache_file.unlink()
+            get_icon_index().discard(SOURCE_PLAYSTORE)
             logger.info("[PlayStoreIconScraper] Cleared all Play Store icon cache")
 
     def get_cache_stats(self) -> dict:
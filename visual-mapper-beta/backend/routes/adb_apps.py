@@ -8,14 +8,18 @@ Provides endpoints for managing apps on Android devices:
 - Stop/force-close apps
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
 import logging
 import time
 import os
+import zlib
 from pathlib import Path
 from routes import get_deps
+from utils.icon_index import compute_etag, get_icon_index, sniff_image_type
 
 # Get DATA_DIR from environment (matches main.py)
 DATA_DIR = Path(os.getenv("DATA_DIR", "./data"))
@@ -61,9 +65,60 @@ async def get_installed_apps(device_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Browser cache lifetime for real icons; SVG placeholders always revalidate
+# so the real icon shows up as soon as the background fetch lands
+ICON_CACHE_CONTROL = "public, max-age=86400"
+PLACEHOLDER_CACHE_CONTROL = "no-cache"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header matches a strong ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def _icon_response(
+    request: Request,
+    content: bytes,
+    media_type: str,
+    source: str,
+    etag: str,
+    cache_control: str = ICON_CACHE_CONTROL,
+) -> Response:
+    """Icon response with validators, or 304 if the client already has it"""
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "X-Icon-Source": source,
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type=media_type, headers=headers)
+
+
+def _placeholder_svg(package_name: str) -> bytes:
+    """Letter placeholder with a hue that is stable across processes"""
+    first_letter = package_name.split(".")[-1][0].upper() if package_name else "A"
+    hue = zlib.crc32(package_name.encode()) % 360
+    return f"""<svg xmlns="http://www.w3.org/2000/svg" width="48" height="48" viewBox="0 0 48 48">
+        <rect width="48" height="48" fill="hsl({hue}, 70%, 60%)" rx="8"/>
+        <text x="24" y="32" font-family="Arial, sans-serif" font-size="24" font-weight="bold"
+              fill="white" text-anchor="middle">{first_letter}</text>
+    </svg>""".encode()
+
+
 @router.get("/app-icon/{device_id}/{package_name}")
 async def get_app_icon(
-    device_id: str, package_name: str, skip_extraction: bool = False
+    request: Request, device_id: str, package_name: str, skip_extraction: bool = False
 ):
     """
     Get app icon - multi-tier approach for optimal performance
@@ -74,6 +129,9 @@ async def get_app_icon(
     2. Device-specific cache - INSTANT (screenshot crop fallback)
     3. Background fetch + SVG fallback - INSTANT response while fetching
 
+    Tiers 0-1 come from the in-memory icon index (no filesystem scans);
+    responses carry strong ETags and answer If-None-Match with 304.
+
     Args:
         device_id: ADB device ID
         package_name: App package name
@@ -82,49 +140,33 @@ async def get_app_icon(
     Returns:
         Icon image data (PNG/WebP/SVG)
     """
-    from fastapi.responses import Response
-
     deps = get_deps()
-
-    # Tier 0: Check Play Store cache (INSTANT + BEST QUALITY)
-    # Play Store icons are high quality, properly sized, and authoritative
-    # Always check the cache directory - icons may exist even if scraper isn't initialized
-    playstore_cache = DATA_DIR / "app-icons-playstore" / f"{package_name}.png"
-    logger.debug(f"[API] Checking Play Store cache: {playstore_cache} (exists={playstore_cache.exists()})")
-    if playstore_cache.exists():
-        icon_data = playstore_cache.read_bytes()
-        logger.debug(f"[API] Tier 0: Play Store cache hit for {package_name}")
-        return Response(
-            content=icon_data,
-            media_type="image/png",
-            headers={"X-Icon-Source": "playstore"},
-        )
-
-    # Tier 1: Check APK extraction cache (INSTANT)
-    # Always check the cache directory - icons may exist even if extractor isn't initialized
-    import glob
-
-    apk_cache_pattern = str(DATA_DIR / "app-icons" / f"{package_name}_*.png")
-    apk_caches = glob.glob(apk_cache_pattern)
-    if apk_caches:
-        icon_data = Path(apk_caches[0]).read_bytes()
-        logger.debug(f"[API] Tier 1: APK cache hit for {package_name}")
-        return Response(
-            content=icon_data,
-            media_type="image/png",
-            headers={"X-Icon-Source": "apk-extraction"},
+    icon_index = get_icon_index()
+
+    # Tiers 0-1: Play Store / APK extraction caches via the icon index
+    entry = icon_index.get_cached(package_name)
+    if entry is None and icon_index.has_icon(package_name):
+        entry = await asyncio.to_thread(icon_index.load, package_name)
+    if entry is not None:
+        logger.debug(f"[API] Icon index hit ({entry.source}) for {package_name}")
+        return _icon_response(
+            request, entry.data, entry.media_type, entry.source, entry.etag
         )
 
     # Tier 2: Check device-specific cache (INSTANT but lower quality)
     # Device scraper crops from screenshots - use as fallback only for apps not on Play Store
     if deps.device_icon_scraper:
-        icon_data = deps.device_icon_scraper.get_icon(device_id, package_name)
+        icon_data = await asyncio.to_thread(
+            deps.device_icon_scraper.get_icon, device_id, package_name
+        )
         if icon_data:
             logger.debug(f"[API] Tier 2: Device scraper cache hit for {package_name}")
-            return Response(
-                content=icon_data,
-                media_type="image/png",
-                headers={"X-Icon-Source": "device-scraper"},
+            return _icon_response(
+                request,
+                icon_data,
+                sniff_image_type(icon_data),
+                "device-scraper",
+                compute_etag(icon_data),
             )
 
     # Tier 3: Not in cache - Trigger background fetch and return SVG immediately
@@ -134,20 +176,17 @@ async def get_app_icon(
         logger.debug(f"[API] Tier 3: Background fetch requested for {package_name}")
 
     # Tier 4: SVG fallback (INSTANT - return immediately while background fetch happens)
-    first_letter = package_name.split(".")[-1][0].upper() if package_name else "A"
-    hash_val = hash(package_name) % 360
-    svg = f"""<svg xmlns="http://www.w3.org/2000/svg" width="48" height="48" viewBox="0 0 48 48">
-        <rect width="48" height="48" fill="hsl({hash_val}, 70%, 60%)" rx="8"/>
-        <text x="24" y="32" font-family="Arial, sans-serif" font-size="24" font-weight="bold"
-              fill="white" text-anchor="middle">{first_letter}</text>
-    </svg>"""
+    svg = _placeholder_svg(package_name)
     logger.debug(
         f"[API] Tier 4: SVG fallback for {package_name} (background fetch in progress)"
     )
-    return Response(
-        content=svg,
-        media_type="image/svg+xml",
-        headers={"X-Icon-Source": "svg-placeholder"},
+    return _icon_response(
+        request,
+        svg,
+        "image/svg+xml",
+        "svg-placeholder",
+        compute_etag(svg),
+        cache_control=PLACEHOLDER_CACHE_CONTROL,
     )
 
 
@@ -281,7 +281,9 @@ async def auto_unlock_device(device_id: str):
         # Get security config using stable_id
         config = deps.device_security_manager.get_lock_config(stable_id)
         passcode = (
-            deps.device_security_manager.get_passcode(stable_id) if config else None
+            await deps.device_security_manager.get_passcode_async(stable_id)
+            if config
+            else None
         )
 
         success = False
@@ -386,19 +386,11 @@ async def delete_transition(package: str, transition_id: str) -> Dict[str, Any]:
     if not graph:
         raise HTTPException(status_code=404, detail=f"No graph found for {package}")
 
-    # Find and remove transition
-    original_count = len(graph.transitions)
-    graph.transitions = [
-        t for t in graph.transitions if t.transition_id != transition_id
-    ]
-
-    if len(graph.transitions) == original_count:
+    if not manager.remove_transition(package, transition_id):
         raise HTTPException(
             status_code=404, detail=f"Transition {transition_id} not found"
         )
 
-    manager.save_graph(graph)
-
     return {"success": True, "message": f"Deleted transition {transition_id}"}
 
 
@@ -5,7 +5,7 @@ Provides performance metrics, cache statistics, and diagnostic tools.
 Includes both aggregate metrics and detailed benchmarking capabilities.
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 import logging
 import time
 import subprocess
@@ -83,6 +83,8 @@ async def get_performance_metrics():
                 else "unknown"
             ),
         }
+        if hasattr(deps.mqtt_manager, "router"):
+            metrics["mqtt"]["inbound"] = deps.mqtt_manager.router.get_stats()
 
     return metrics
 
@@ -332,6 +334,31 @@ async def benchmark_capture(device_id: str, iterations: int = 5):
     return results
 
 
+@router.get("/diagnostics/benchmark-encode")
+async def benchmark_encode(
+    width: int = Query(1080, ge=1, le=4096, description="Capture width"),
+    height: int = Query(2400, ge=1, le=4096, description="Capture height"),
+    iterations: int = Query(5, ge=1, le=20, description="Encodes per preset"),
+):
+    """
+    Benchmark JPEG encoding for each streaming quality preset.
+
+    Encodes a synthetic capture (default 1080x2400) with the encoder the
+    stream manager selected at startup. Dimensions and iterations are
+    bounded so one request cannot tie up the server.
+    """
+    deps = get_deps()
+    if not deps.stream_manager:
+        raise HTTPException(status_code=503, detail="Stream manager not initialized")
+
+    logger.info(
+        f"[Diagnostics] Running encode benchmark {width}x{height} ({iterations} iterations)"
+    )
+    results = await deps.stream_manager.benchmark_encode(width, height, iterations)
+    logger.info(f"[Diagnostics] Encode benchmark complete: encoder={results['encoder']}")
+    return results
+
+
 @router.get("/diagnostics/system")
 async def get_system_diagnostics():
     """Get overall system diagnostics - CPU, memory, connected devices."""
@@ -252,6 +252,26 @@ async def get_sensor_update_status(device_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/sensors/state/{device_id}")
+async def get_sensor_states(device_id: str):
+    """Get runtime state (current value, last updated, last error) of a device's sensors"""
+    deps = get_deps()
+    try:
+        states = {}
+        for sensor in deps.sensor_manager.get_all_sensors(device_id):
+            state = deps.sensor_manager.runtime_state.get(sensor.sensor_id)
+            states[sensor.sensor_id] = state.to_dict() if state else None
+        return {
+            "success": True,
+            "device_id": device_id,
+            "states": states,
+            "count": len(states),
+        }
+    except Exception as e:
+        logger.error(f"[API] Get sensor states failed for {device_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/sensors/{device_id}")
 async def get_sensors(device_id: str):
     """Get all sensors for a device"""
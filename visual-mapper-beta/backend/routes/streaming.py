@@ -16,9 +16,12 @@ import asyncio
 import atexit
 import base64
 import io
+import struct
 from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from PIL import Image
 from routes import get_deps
+from core.streaming.frame_change import FrameChange, FrameChangeDetector
 
 logger = logging.getLogger(__name__)
 
@@ -63,6 +66,8 @@ QUALITY_PRESETS = {
 # Frame capture timeout - skip slow frames quickly to maintain responsiveness
 FRAME_CAPTURE_TIMEOUT = 3.0  # 3s max per frame for WiFi ADB
 FRAME_SKIP_DELAY = 0.1  # Wait time after skipping a frame (was 0.5s)
+# Seconds between frames re-sent while the device screen is static
+UNCHANGED_FRAME_KEEPALIVE = 2.0
 IMAGE_EXECUTOR = ThreadPoolExecutor(max_workers=2)
 atexit.register(IMAGE_EXECUTOR.shutdown, wait=False)
 
@@ -72,9 +77,12 @@ def resize_image_for_quality(img_bytes: bytes, quality: str) -> bytes:
 
     Raises exception on failure - caller should skip frame rather than send full-res.
     """
-    preset = QUALITY_PRESETS.get(quality, QUALITY_PRESETS["medium"])
+    return encode_image_for_quality(Image.open(io.BytesIO(img_bytes)), quality)
 
-    img = Image.open(io.BytesIO(img_bytes))
+
+def encode_image_for_quality(img: Image.Image, quality: str) -> bytes:
+    """Resize an already decoded image for a quality preset and encode as JPEG."""
+    preset = QUALITY_PRESETS.get(quality, QUALITY_PRESETS["medium"])
 
     # Resize if needed
     if preset["max_height"] and img.height > preset["max_height"]:
@@ -90,6 +98,31 @@ def resize_image_for_quality(img_bytes: bytes, quality: str) -> bytes:
     return output.getvalue()
 
 
+def process_stream_frame(
+    detector: Optional[FrameChangeDetector],
+    img_bytes: bytes,
+    qualities: List[str],
+    uncached: List[str],
+) -> Tuple[FrameChange, Dict[str, bytes]]:
+    """Check a captured frame for changes and encode only what must be sent.
+
+    The frame is decoded once. Changed frames are encoded for every requested
+    tier; unchanged frames only for tiers without an up-to-date encoded frame
+    to fall back on.
+    """
+    img = Image.open(io.BytesIO(img_bytes))
+    change = (
+        detector.check(img_bytes, img)
+        if detector
+        else FrameChange(changed=True, tiles=None)
+    )
+    targets = qualities if change.changed else uncached
+    if not targets:
+        return change, {}
+    img.load()
+    return change, {quality: encode_image_for_quality(img, quality) for quality in targets}
+
+
 async def resize_image_for_quality_async(img_bytes: bytes, quality: str) -> bytes:
     """Run PIL resize/encode off the event loop to avoid stalling other clients."""
     loop = asyncio.get_running_loop()
@@ -130,52 +163,122 @@ async def wait_for_next_tick(next_tick: float, frame_delay: float) -> float:
 # =============================================================================
 
 
+class FrameSlot:
+    """Latest-frame-wins mailbox for a single subscriber.
+
+    A new frame replaces any frame the subscriber has not picked up yet, so a
+    slow consumer only ever skips frames for itself.
+    """
+
+    def __init__(self):
+        self._frame: Optional[bytes] = None
+        self._tiles: Optional[list] = None
+        self._event = asyncio.Event()
+        self.delivered = 0
+        self.dropped = 0
+
+    def put_nowait(self, frame: bytes, tiles: Optional[list] = None):
+        """Store a frame; tiles are changed rects (None = whole frame changed)."""
+        if self._frame is not None:
+            self.dropped += 1
+            # The subscriber skipped a frame, so it must patch both changes
+            if tiles is not None and self._tiles is not None:
+                tiles = self._tiles + tiles
+            else:
+                tiles = None
+        self._frame = frame
+        self._tiles = tiles
+        self._event.set()
+
+    async def get_with_tiles(self) -> Tuple[bytes, Optional[list]]:
+        while self._frame is None:
+            self._event.clear()
+            await self._event.wait()
+        frame, tiles = self._frame, self._tiles
+        self._frame, self._tiles = None, None
+        self._event.clear()
+        self.delivered += 1
+        return frame, tiles
+
+    async def get(self) -> bytes:
+        frame, _ = await self.get_with_tiles()
+        return frame
+
+
 class SharedCaptureManager:
     """Manages shared capture pipelines per device.
 
     Instead of each WebSocket connection running its own capture loop,
     a single producer captures frames and broadcasts to all subscribers.
     This eliminates per-frame ADB handshake overhead for multiple clients.
+
+    Each subscriber picks a quality tier. The producer decodes every device
+    frame once and encodes it only for tiers that currently have subscribers
+    and are due (each tier keeps its own frame rate); the encoded bytes are
+    shared by all subscribers of that tier.
+
+    Frames whose content has not changed since the last sent frame are not
+    encoded or sent, apart from a keepalive every keepalive_interval seconds.
     """
 
-    def __init__(self):
+    def __init__(self, keepalive_interval: float = UNCHANGED_FRAME_KEEPALIVE):
         self._producers: dict[str, asyncio.Task] = {}
-        self._subscribers: dict[str, list[asyncio.Queue]] = {}
+        self._subscribers: dict[str, dict[FrameSlot, str]] = {}  # slot -> quality
         self._frame_counts: dict[str, int] = {}
         self._lock = asyncio.Lock()
-
-    async def subscribe(self, device_id: str, quality: str = "fast") -> asyncio.Queue:
+        self.keepalive_interval = keepalive_interval
+        # Last frame sent per tier, replayed to new subscribers and for keepalives
+        self._last_frames: dict[str, dict[str, bytes]] = {}  # device -> quality -> jpeg
+        self._suppressed_counts: dict[str, int] = {}
+
+    def _add_subscriber(self, device_id: str, quality: str) -> FrameSlot:
+        if device_id not in self._subscribers:
+            self._subscribers[device_id] = {}
+            self._frame_counts[device_id] = 0
+
+        slot = FrameSlot()
+        self._subscribers[device_id][slot] = quality
+
+        # Static screens may not produce a new frame for a while
+        header = struct.pack(">II", self._frame_counts.get(device_id, 0), 0)
+        last_jpeg = self._last_frames.get(device_id, {}).get(quality)
+        if last_jpeg is not None:
+            slot.put_nowait(header + last_jpeg)
+        return slot
+
+    def _active_tiers(self, device_id: str) -> dict[str, list[FrameSlot]]:
+        """Subscribers grouped by quality tier."""
+        tiers: dict[str, list[FrameSlot]] = {}
+        for slot, quality in self._subscribers.get(device_id, {}).items():
+            tiers.setdefault(quality, []).append(slot)
+        return tiers
+
+    async def subscribe(self, device_id: str, quality: str = "fast") -> FrameSlot:
         """Subscribe to frames from a device. Starts producer if needed."""
-        async with self._lock:
-            if device_id not in self._subscribers:
-                self._subscribers[device_id] = []
-                self._frame_counts[device_id] = 0
+        if quality not in QUALITY_PRESETS:
+            quality = "fast"
 
-            # Create bounded queue for this subscriber (drop old frames if slow)
-            queue: asyncio.Queue = asyncio.Queue(maxsize=3)
-            self._subscribers[device_id].append(queue)
+        async with self._lock:
+            slot = self._add_subscriber(device_id, quality)
 
             # Start producer if not running
             if device_id not in self._producers or self._producers[device_id].done():
                 self._producers[device_id] = asyncio.create_task(
-                    self._producer_loop(device_id, quality)
+                    self._producer_loop(device_id)
                 )
                 logger.info(f"[SharedCapture] Started producer for {device_id}")
 
             logger.info(
-                f"[SharedCapture] New subscriber for {device_id}, "
+                f"[SharedCapture] New {quality} subscriber for {device_id}, "
                 f"total: {len(self._subscribers[device_id])}"
             )
-            return queue
+            return slot
 
-    async def unsubscribe(self, device_id: str, queue: asyncio.Queue):
+    async def unsubscribe(self, device_id: str, slot: FrameSlot):
         """Unsubscribe from a device. Stops producer if no subscribers left."""
         async with self._lock:
             if device_id in self._subscribers:
-                try:
-                    self._subscribers[device_id].remove(queue)
-                except ValueError:
-                    pass
+                self._subscribers[device_id].pop(slot, None)
 
                 logger.info(
                     f"[SharedCapture] Subscriber left {device_id}, "
@@ -195,25 +298,43 @@ class SharedCaptureManager:
                     del self._subscribers[device_id]
                     if device_id in self._frame_counts:
                         del self._frame_counts[device_id]
+                    self._last_frames.pop(device_id, None)
+                    self._suppressed_counts.pop(device_id, None)
 
-    async def _producer_loop(self, device_id: str, quality: str):
-        """Single capture loop that broadcasts to all subscribers."""
+    async def _producer_loop(self, device_id: str):
+        """Single capture loop that encodes per tier and broadcasts to subscribers."""
         deps = get_deps()
-        preset = QUALITY_PRESETS.get(quality, QUALITY_PRESETS["fast"])
-        frame_delay = preset["frame_delay"]
         next_tick = time.monotonic()
+        tier_next_due: dict[str, float] = {}
+        detector = FrameChangeDetector(keepalive_interval=self.keepalive_interval)
+        last_frames = self._last_frames.setdefault(device_id, {})
+        # Tiers whose cached frame predates the latest screen change
+        stale_tiers: set[str] = set()
 
         if deps.adb_bridge and hasattr(deps.adb_bridge, "start_stream"):
             deps.adb_bridge.start_stream(device_id)
 
         try:
             while True:
+                # Pace the loop by the fastest tier currently subscribed
+                async with self._lock:
+                    tiers = self._active_tiers(device_id)
+                if not tiers:
+                    break
+                frame_delay = min(
+                    QUALITY_PRESETS[quality]["frame_delay"] for quality in tiers
+                )
                 next_tick = await wait_for_next_tick(next_tick, frame_delay)
 
-                # Check if we still have subscribers
-                async with self._lock:
-                    if device_id not in self._subscribers or not self._subscribers[device_id]:
-                        break
+                # Tiers whose own frame interval has elapsed
+                now = time.monotonic()
+                due = [
+                    quality
+                    for quality in tiers
+                    if now >= tier_next_due.get(quality, 0.0) - frame_delay / 2
+                ]
+                if not due:
+                    continue
 
                 try:
                     # Capture frame
@@ -226,41 +347,73 @@ class SharedCaptureManager:
                         await asyncio.sleep(FRAME_SKIP_DELAY)
                         continue
 
-                    # Process frame
-                    jpeg_bytes = await resize_image_for_quality_async(
-                        screenshot_bytes, quality
+                    # Change check + decode once + encode due tiers (off the event loop)
+                    uncached = [
+                        q for q in due if q not in last_frames or q in stale_tiers
+                    ]
+                    loop = asyncio.get_running_loop()
+                    change, encoded = await loop.run_in_executor(
+                        IMAGE_EXECUTOR,
+                        process_stream_frame,
+                        detector,
+                        screenshot_bytes,
+                        due,
+                        uncached,
                     )
+                    for quality in due:
+                        tier_next_due[quality] = (
+                            now + QUALITY_PRESETS[quality]["frame_delay"]
+                        )
+                    last_frames.update(encoded)
+                    if change.changed:
+                        stale_tiers.update(last_frames)
+                    stale_tiers.difference_update(encoded)
+
+                    # Static screen: nothing to send unless a tier has never had a frame
+                    if change.should_send:
+                        send = {q: last_frames[q] for q in due if q in last_frames}
+                        # New or stale tiers differ from what their clients
+                        # last got by more than this change: whole frame
+                        tiles = {
+                            q: None if q in uncached else change.tiles for q in send
+                        }
+                    else:
+                        send = encoded
+                        tiles = {}  # Only new or stale tiers: whole frame
+                    if not send:
+                        self._suppressed_counts[device_id] = (
+                            self._suppressed_counts.get(device_id, 0) + 1
+                        )
+                        continue
 
                     # Increment frame count
                     self._frame_counts[device_id] = self._frame_counts.get(device_id, 0) + 1
                     frame_number = self._frame_counts[device_id]
                     capture_time = int(time.monotonic() * 1000) % (2**32)
 
-                    # Create frame data (same format as MJPEG v1)
-                    import struct
+                    # Same header for every tier (same format as MJPEG v1)
                     header = struct.pack(">II", frame_number, capture_time)
-                    frame_data = header + jpeg_bytes
 
-                    # Broadcast to all subscribers
+                    # Broadcast each tier to its subscribers
+                    subscriber_count = 0
                     async with self._lock:
-                        queues = self._subscribers.get(device_id, [])
-                        for q in queues:
-                            try:
-                                # Non-blocking put - drop frame if queue full
-                                q.put_nowait(frame_data)
-                            except asyncio.QueueFull:
-                                # Drop oldest frame, add new one
-                                try:
-                                    q.get_nowait()
-                                    q.put_nowait(frame_data)
-                                except:
-                                    pass
+                        for quality, slots in self._active_tiers(device_id).items():
+                            jpeg_bytes = send.get(quality)
+                            if jpeg_bytes is None:
+                                continue  # Tier joined mid-frame or not due
+                            frame_data = header + jpeg_bytes
+                            for slot in slots:
+                                slot.put_nowait(frame_data, tiles.get(quality))
+                            subscriber_count += len(slots)
 
                     # Log periodically
                     if frame_number <= 3 or frame_number % 60 == 0:
+                        sizes = ", ".join(
+                            f"{quality}={len(data)}" for quality, data in send.items()
+                        )
                         logger.info(
                             f"[SharedCapture] {device_id} frame {frame_number}: "
-                            f"{len(jpeg_bytes)} bytes, {len(queues)} subscribers"
+                            f"{sizes} bytes, {subscriber_count} subscribers"
                         )
 
                 except asyncio.TimeoutError:
@@ -283,9 +436,38 @@ class SharedCaptureManager:
                 device_id: len(subs)
                 for device_id, subs in self._subscribers.items()
             },
+            "tiers": {
+                device_id: {
+                    quality: len(slots)
+                    for quality, slots in self._active_tiers(device_id).items()
+                }
+                for device_id in self._subscribers
+            },
+            "dropped_frames": {
+                device_id: sum(slot.dropped for slot in subs)
+                for device_id, subs in self._subscribers.items()
+            },
+            "suppressed_frames": dict(self._suppressed_counts),
             "frame_counts": dict(self._frame_counts),
         }
 
+    def broadcast_frame(self, device_id: str, frame_data: bytes) -> int:
+        """
+        Hand an already encoded frame to every subscriber of a device.
+
+        Externally produced frames (companion app) come in a single encoding,
+        so all tiers receive the same bytes.
+
+        Returns:
+            Number of subscribers the frame was delivered to
+        """
+        slots = self._subscribers.get(device_id)
+        if not slots:
+            return 0
+        for slot in slots:
+            slot.put_nowait(frame_data)
+        return len(slots)
+
     async def inject_frame(self, device_id: str, frame_data: bytes):
         """
         Inject a frame from an external source (like companion app).
@@ -306,25 +488,18 @@ class SharedCaptureManager:
             frame_number = self._frame_counts[device_id]
 
             # Broadcast to all subscribers
-            queues = self._subscribers[device_id]
-            for q in queues:
-                try:
-                    q.put_nowait(frame_data)
-                except asyncio.QueueFull:
-                    try:
-                        q.get_nowait()
-                        q.put_nowait(frame_data)
-                    except:
-                        pass
+            subscriber_count = self.broadcast_frame(device_id, frame_data)
 
             # Log periodically
             if frame_number == 1 or frame_number % 60 == 0:
                 logger.info(
                     f"[SharedCapture] Injected frame {frame_number} for {device_id}: "
-                    f"{len(frame_data)} bytes, {len(queues)} subscribers"
+                    f"{len(frame_data)} bytes, {subscriber_count} subscribers"
                 )
 
-    async def subscribe_without_producer(self, device_id: str) -> asyncio.Queue:
+    async def subscribe_without_producer(
+        self, device_id: str, quality: str = "fast"
+    ) -> FrameSlot:
         """
         Subscribe to frames for a device without starting the ADB producer.
 
@@ -332,18 +507,13 @@ class SharedCaptureManager:
         (like the companion app) via inject_frame().
         """
         async with self._lock:
-            if device_id not in self._subscribers:
-                self._subscribers[device_id] = []
-                self._frame_counts[device_id] = 0
-
-            queue: asyncio.Queue = asyncio.Queue(maxsize=3)
-            self._subscribers[device_id].append(queue)
+            slot = self._add_subscriber(device_id, quality)
 
             logger.info(
                 f"[SharedCapture] New subscriber (no producer) for {device_id}, "
                 f"total: {len(self._subscribers[device_id])}"
             )
-            return queue
+            return slot
 
 
 # Global shared capture manager instance
@@ -566,8 +736,6 @@ async def stream_device_mjpeg(websocket: WebSocket, device_id: str):
         - Bytes 4-7: Capture time ms (uint32 big-endian)
         - Bytes 8+: JPEG image data
     """
-    import struct
-
     deps = get_deps()
 
     await websocket.accept()
@@ -711,8 +879,12 @@ async def stream_device_mjpeg_v2(websocket: WebSocket, device_id: str):
     - First message: JSON config
     - Subsequent messages: Binary JPEG with 8-byte header (frame_number, capture_time)
 
+    Unchanged frames are not re-sent (apart from a periodic keepalive frame).
+
     Query params:
     - quality: 'high', 'medium', 'low', 'fast', 'ultrafast' (default: fast)
+    - tiles: 'true' to receive {"type": "tiles", "frame_number", "rects"} before
+      each frame, listing changed regions as normalized [x, y, w, h]
     """
     await websocket.accept()
 
@@ -721,6 +893,7 @@ async def stream_device_mjpeg_v2(websocket: WebSocket, device_id: str):
     if quality not in QUALITY_PRESETS:
         quality = "fast"
     preset = QUALITY_PRESETS[quality]
+    send_tiles = websocket.query_params.get("tiles", "").lower() in ("1", "true")
 
     logger.info(
         f"[WS-MJPEG-v2] Client connected for device: {device_id}, quality: {quality} "
@@ -729,7 +902,7 @@ async def stream_device_mjpeg_v2(websocket: WebSocket, device_id: str):
 
     device_width, device_height = 1080, 1920  # Defaults
     frames_received = 0
-    queue = None
+    slot = None
 
     try:
         # Send config immediately
@@ -745,14 +918,24 @@ async def stream_device_mjpeg_v2(websocket: WebSocket, device_id: str):
             }
         )
 
-        # Subscribe to shared capture pipeline
-        queue = await shared_capture_manager.subscribe(device_id, quality)
+        # Subscribe to shared capture pipeline at this client's quality tier
+        slot = await shared_capture_manager.subscribe(device_id, quality)
 
-        # Consume frames from queue and send to client
+        # Send the latest frame whenever the client is ready for one
         while True:
             try:
                 # Wait for next frame with timeout
-                frame_data = await asyncio.wait_for(queue.get(), timeout=5.0)
+                frame_data, tiles = await asyncio.wait_for(
+                    slot.get_with_tiles(), timeout=5.0
+                )
+                if send_tiles and tiles is not None:
+                    await websocket.send_json(
+                        {
+                            "type": "tiles",
+                            "frame_number": struct.unpack(">I", frame_data[:4])[0],
+                            "rects": tiles,
+                        }
+                    )
                 await websocket.send_bytes(frame_data)
                 frames_received += 1
 
@@ -775,8 +958,8 @@ async def stream_device_mjpeg_v2(websocket: WebSocket, device_id: str):
     except Exception as e:
         logger.error(f"[WS-MJPEG-v2] Connection error: {e}")
     finally:
-        if queue:
-            await shared_capture_manager.unsubscribe(device_id, queue)
+        if slot:
+            await shared_capture_manager.unsubscribe(device_id, slot)
         logger.info(
             f"[WS-MJPEG-v2] Stream ended for device: {device_id}, frames sent: {frames_received}"
         )
@@ -840,18 +1023,7 @@ async def companion_stream(websocket: WebSocket, device_id: str):
         nonlocal frames_received
         frames_received += 1
 
-        # Get subscribers for this device
-        if device_id in shared_capture_manager._subscribers:
-            queues = shared_capture_manager._subscribers[device_id]
-            for q in queues:
-                try:
-                    q.put_nowait(frame_data)
-                except asyncio.QueueFull:
-                    try:
-                        q.get_nowait()
-                        q.put_nowait(frame_data)
-                    except:
-                        pass
+        shared_capture_manager.broadcast_frame(device_id, frame_data)
 
     companion_stream_manager.set_frame_callback(device_id, on_companion_frame)
 
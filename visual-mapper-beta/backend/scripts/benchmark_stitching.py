@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Screenshot Stitching Benchmark
+
+Times ImageComposer.stitch_by_elements on a synthetic long page and reports
+the peak memory it adds on top of the captures. Overlap detection is pinned
+to the known scroll distance, so the numbers cover composition only.
+
+Run from the backend directory:
+    python scripts/benchmark_stitching.py
+    python scripts/benchmark_stitching.py --captures 40 --repeat 5
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ss_modules.compose import ImageComposer
+from ss_modules.elements import ElementAnalyzer
+from ss_modules.overlap import OverlapDetector
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class KnownScrollDetector(OverlapDetector):
+    """OverlapDetector that trusts the known scroll instead of matching images."""
+
+    def detect_overlap_between_captures(
+        self, img1, img2, screen_height, known_scroll=0
+    ):
+        return screen_height - known_scroll, 0
+
+
+def make_capture(width: int, height: int, offset: int) -> Image.Image:
+    """Render rows [offset, offset + height) of a deterministic striped page."""
+    rows = np.arange(offset, offset + height)
+    band = (rows // 48) * 2654435761 % 2**24
+    colors = np.stack([band >> 16, (band >> 8) & 0xFF, band & 0xFF], axis=1)
+    arr = np.repeat(colors[:, None, :], width, axis=1).astype(np.uint8)
+    # Column texture that changes per band, like rows of list items
+    arr[:, ::7] ^= ((rows[:, None, None] // 48 * 31) & 0xFF).astype(np.uint8)
+    return Image.fromarray(arr, "RGB")
+
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    # ru_maxrss is KB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--captures", type=int, default=20)
+    parser.add_argument("--width", type=int, default=1080)
+    parser.add_argument("--height", type=int, default=2400)
+    parser.add_argument("--scroll", type=int, default=1600)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    # Synthetic seams trip the stitch quality warnings; keep the report clean
+    logging.getLogger("ss_modules").setLevel(logging.ERROR)
+
+    captures = [
+        (make_capture(args.width, args.height, i * args.scroll), [], 0, args.scroll)
+        for i in range(args.captures)
+    ]
+    composer = ImageComposer(
+        overlap_detector=KnownScrollDetector(),
+        element_analyzer=ElementAnalyzer(),
+        remove_duplicates_fn=lambda img, elements, screen_height: (img, elements),
+    )
+
+    # Captures are resident before stitching, so the RSS high-water mark
+    # only moves by what composition allocates on top of them.
+    baseline = peak_rss_mb()
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result, _, _ = composer.stitch_by_elements(captures, args.height)
+        timings.append(time.perf_counter() - start)
+        del result
+    extra = peak_rss_mb() - baseline
+
+    print(
+        f"{args.captures} captures of {args.width}x{args.height}, "
+        f"scroll {args.scroll}px"
+    )
+    print(f"  Median time: {statistics.median(timings) * 1000:.0f} ms")
+    if resource is not None:
+        print(f"  Peak memory above captures: {extra:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
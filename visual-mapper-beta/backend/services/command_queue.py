@@ -9,7 +9,11 @@ Features:
 - Priority ordering
 - Duplicate detection
 - Async-safe operations
-- Persistent storage (SQLite)
+- Persistent storage (SQLite, WAL mode)
+
+All database I/O runs on a single dedicated worker thread that owns one
+long-lived connection, so enqueue/ack calls never block the event loop on
+disk syncs and statements stay in sqlite3's prepared-statement cache.
 """
 
 import asyncio
@@ -17,8 +21,9 @@ import logging
 import sqlite3
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, List, Any, Optional
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 from enum import Enum
@@ -26,6 +31,39 @@ from threading import Lock
 
 logger = logging.getLogger(__name__)
 
+# Statements are module constants so sqlite3's per-connection statement
+# cache hands back the same prepared statement on every call
+_INSERT_SQL = """
+    INSERT INTO command_queue (
+        command_id, device_id, command_type, payload, priority,
+        created_at, expires_at, status, retry_count, max_retries, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_EXPIRE_SQL = """
+    UPDATE command_queue
+    SET status = ?, updated_at = ?
+    WHERE expires_at < ? AND status = ?
+"""
+_SELECT_PENDING_SQL = """
+    SELECT command_id, device_id, command_type, payload, priority,
+           created_at, expires_at, status, retry_count, max_retries, error_message
+    FROM command_queue
+    WHERE device_id = ? AND status = ?
+    ORDER BY priority DESC, created_at ASC
+"""
+_UPDATE_STATUS_SQL = """
+    UPDATE command_queue SET status = ?, updated_at = ?
+    WHERE command_id = ?
+"""
+_SELECT_RETRIES_SQL = (
+    "SELECT retry_count, max_retries FROM command_queue WHERE command_id = ?"
+)
+_UPDATE_FAILED_SQL = """
+    UPDATE command_queue
+    SET status = ?, error_message = ?, retry_count = ?, updated_at = ?
+    WHERE command_id = ?
+"""
+
 
 class CommandPriority(Enum):
     """Command priority levels for ordering"""
@@ -99,6 +137,11 @@ class CommandQueue:
         self.db_path = Path(db_path)
         self.default_ttl = default_ttl_seconds
         self._lock = Lock()
+        # Single worker: serializes writes and keeps the connection on one thread
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="command-queue"
+        )
+        self._conn: Optional[sqlite3.Connection] = None
         self._init_db()
         logger.info(f"[CommandQueue] Initialized with DB at {self.db_path}")
 
@@ -106,7 +149,8 @@ class CommandQueue:
         """Initialize SQLite database"""
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
-        with sqlite3.connect(str(self.db_path)) as conn:
+        conn = self._get_conn()
+        with self._lock, conn:
             conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS command_queue (
@@ -131,7 +175,31 @@ class CommandQueue:
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_expires ON command_queue(expires_at)"
             )
-            conn.commit()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Get the long-lived connection (opened on first use)"""
+        if self._conn is None:
+            # Created during __init__ but afterwards only used from the worker
+            conn = sqlite3.connect(
+                str(self.db_path), check_same_thread=False, cached_statements=64
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, func, *args):
+        """Run a blocking database call on the queue's worker thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def close(self):
+        """Close the database connection and stop the worker thread"""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
 
     def _generate_id(self) -> str:
         """Generate unique command ID"""
@@ -139,6 +207,47 @@ class CommandQueue:
 
         return f"cmd_{uuid.uuid4().hex[:12]}"
 
+    def _build_command(
+        self,
+        device_id: str,
+        command_type: str,
+        payload: Dict[str, Any],
+        priority: CommandPriority,
+        ttl_seconds: Optional[int],
+        now: float,
+    ) -> QueuedCommand:
+        ttl = ttl_seconds or self.default_ttl
+        return QueuedCommand(
+            command_id=self._generate_id(),
+            device_id=device_id,
+            command_type=command_type,
+            payload=payload,
+            priority=priority.value,
+            created_at=now,
+            expires_at=now + ttl,
+        )
+
+    def _insert_sync(self, commands: List[QueuedCommand], now: float):
+        rows = [
+            (
+                cmd.command_id,
+                cmd.device_id,
+                cmd.command_type,
+                json.dumps(cmd.payload),
+                cmd.priority,
+                cmd.created_at,
+                cmd.expires_at,
+                cmd.status,
+                cmd.retry_count,
+                cmd.max_retries,
+                now,
+            )
+            for cmd in commands
+        ]
+        conn = self._get_conn()
+        with self._lock, conn:
+            conn.executemany(_INSERT_SQL, rows)
+
     async def enqueue(
         self,
         device_id: str,
@@ -160,50 +269,68 @@ class CommandQueue:
         Returns:
             Command ID
         """
-        command_id = self._generate_id()
         now = time.time()
-        ttl = ttl_seconds or self.default_ttl
-        expires_at = now + ttl
-
-        cmd = QueuedCommand(
-            command_id=command_id,
-            device_id=device_id,
-            command_type=command_type,
-            payload=payload,
-            priority=priority.value,
-            created_at=now,
-            expires_at=expires_at,
+        cmd = self._build_command(
+            device_id, command_type, payload, priority, ttl_seconds, now
         )
 
-        with self._lock:
-            with sqlite3.connect(str(self.db_path)) as conn:
-                conn.execute(
-                    """
-                    INSERT INTO command_queue (
-                        command_id, device_id, command_type, payload, priority,
-                        created_at, expires_at, status, retry_count, max_retries, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                    (
-                        cmd.command_id,
-                        cmd.device_id,
-                        cmd.command_type,
-                        json.dumps(cmd.payload),
-                        cmd.priority,
-                        cmd.created_at,
-                        cmd.expires_at,
-                        cmd.status,
-                        cmd.retry_count,
-                        cmd.max_retries,
-                        now,
-                    ),
-                )
-                conn.commit()
+        await self._run(self._insert_sync, [cmd], now)
 
         logger.info(
-            f"[CommandQueue] Enqueued {command_type} for {device_id}: {command_id}"
+            f"[CommandQueue] Enqueued {command_type} for {device_id}: {cmd.command_id}"
         )
-        return command_id
+        return cmd.command_id
+
+    async def enqueue_many(self, commands: Iterable[Dict[str, Any]]) -> List[str]:
+        """
+        Add several commands in one transaction.
+
+        Args:
+            commands: Dicts with the enqueue() arguments (device_id,
+                command_type, payload and optional priority/ttl_seconds)
+
+        Returns:
+            Command IDs in input order
+        """
+        now = time.time()
+        queued = [
+            self._build_command(
+                c["device_id"],
+                c["command_type"],
+                c["payload"],
+                c.get("priority", CommandPriority.NORMAL),
+                c.get("ttl_seconds"),
+                now,
+            )
+            for c in commands
+        ]
+        if not queued:
+            return []
+
+        await self._run(self._insert_sync, queued, now)
+
+        logger.info(f"[CommandQueue] Enqueued {len(queued)} commands")
+        return [cmd.command_id for cmd in queued]
+
+    def _get_pending_sync(self, device_id: str, now: float) -> list:
+        conn = self._get_conn()
+        with self._lock, conn:
+            # First, expire old commands
+            conn.execute(
+                _EXPIRE_SQL,
+                (
+                    CommandStatus.EXPIRED.value,
+                    now,
+                    now,
+                    CommandStatus.PENDING.value,
+                ),
+            )
+
+            # Then get pending commands
+            cursor = conn.execute(
+                _SELECT_PENDING_SQL, (device_id, CommandStatus.PENDING.value)
+            )
+            return cursor.fetchall()
 
     async def get_pending_commands(self, device_id: str) -> List[QueuedCommand]:
         """
@@ -216,39 +343,7 @@ class CommandQueue:
         Returns:
             List of pending commands
         """
-        now = time.time()
-
-        with self._lock:
-            with sqlite3.connect(str(self.db_path)) as conn:
-                # First, expire old commands
-                conn.execute(
-                    """
-                    UPDATE command_queue
-                    SET status = ?, updated_at = ?
-                    WHERE expires_at < ? AND status = ?
-                """,
-                    (
-                        CommandStatus.EXPIRED.value,
-                        now,
-                        now,
-                        CommandStatus.PENDING.value,
-                    ),
-                )
-
-                # Then get pending commands
-                cursor = conn.execute(
-                    """
-                    SELECT command_id, device_id, command_type, payload, priority,
-                           created_at, expires_at, status, retry_count, max_retries, error_message
-                    FROM command_queue
-                    WHERE device_id = ? AND status = ?
-                    ORDER BY priority DESC, created_at ASC
-                """,
-                    (device_id, CommandStatus.PENDING.value),
-                )
-
-                rows = cursor.fetchall()
-                conn.commit()
+        rows = await self._run(self._get_pending_sync, device_id, time.time())
 
         commands = []
         for row in rows:
@@ -281,111 +376,125 @@ class CommandQueue:
         """Mark a command as completed"""
         return await self._update_status(command_id, CommandStatus.COMPLETED)
 
+    def _mark_failed_sync(self, command_id: str, error_message: str, now: float) -> bool:
+        conn = self._get_conn()
+        with self._lock, conn:
+            # Get current retry count
+            row = conn.execute(_SELECT_RETRIES_SQL, (command_id,)).fetchone()
+
+            if not row:
+                return False
+
+            retry_count, max_retries = row
+            retry_count += 1
+
+            if retry_count >= max_retries:
+                # No more retries, mark as failed
+                conn.execute(
+                    _UPDATE_FAILED_SQL,
+                    (
+                        CommandStatus.FAILED.value,
+                        error_message,
+                        retry_count,
+                        now,
+                        command_id,
+                    ),
+                )
+                logger.warning(
+                    f"[CommandQueue] Command {command_id} failed permanently: {error_message}"
+                )
+            else:
+                # Keep pending for retry
+                conn.execute(
+                    _UPDATE_FAILED_SQL,
+                    (
+                        CommandStatus.PENDING.value,
+                        error_message,
+                        retry_count,
+                        now,
+                        command_id,
+                    ),
+                )
+                logger.info(
+                    f"[CommandQueue] Command {command_id} will retry ({retry_count}/{max_retries})"
+                )
+
+        return True
+
     async def mark_failed(self, command_id: str, error_message: str) -> bool:
         """
         Mark a command as failed.
         If retries remaining, keeps it pending for retry.
         """
-        now = time.time()
-
-        with self._lock:
-            with sqlite3.connect(str(self.db_path)) as conn:
-                # Get current retry count
-                cursor = conn.execute(
-                    "SELECT retry_count, max_retries FROM command_queue WHERE command_id = ?",
-                    (command_id,),
-                )
-                row = cursor.fetchone()
-
-                if not row:
-                    return False
-
-                retry_count, max_retries = row
-                retry_count += 1
-
-                if retry_count >= max_retries:
-                    # No more retries, mark as failed
-                    conn.execute(
-                        """
-                        UPDATE command_queue
-                        SET status = ?, error_message = ?, retry_count = ?, updated_at = ?
-                        WHERE command_id = ?
-                    """,
-                        (
-                            CommandStatus.FAILED.value,
-                            error_message,
-                            retry_count,
-                            now,
-                            command_id,
-                        ),
-                    )
-                    logger.warning(
-                        f"[CommandQueue] Command {command_id} failed permanently: {error_message}"
-                    )
-                else:
-                    # Keep pending for retry
-                    conn.execute(
-                        """
-                        UPDATE command_queue
-                        SET status = ?, error_message = ?, retry_count = ?, updated_at = ?
-                        WHERE command_id = ?
-                    """,
-                        (
-                            CommandStatus.PENDING.value,
-                            error_message,
-                            retry_count,
-                            now,
-                            command_id,
-                        ),
-                    )
-                    logger.info(
-                        f"[CommandQueue] Command {command_id} will retry ({retry_count}/{max_retries})"
-                    )
-
-                conn.commit()
+        return await self._run(
+            self._mark_failed_sync, command_id, error_message, time.time()
+        )
 
-        return True
+    def _update_status_sync(
+        self, command_ids: List[str], status: CommandStatus, now: float
+    ) -> int:
+        conn = self._get_conn()
+        with self._lock, conn:
+            cursor = conn.executemany(
+                _UPDATE_STATUS_SQL,
+                [(status.value, now, command_id) for command_id in command_ids],
+            )
+            return cursor.rowcount
 
     async def _update_status(self, command_id: str, status: CommandStatus) -> bool:
         """Update command status"""
-        now = time.time()
+        updated = await self._run(
+            self._update_status_sync, [command_id], status, time.time()
+        )
+        return updated > 0
+
+    async def ack_many(
+        self,
+        command_ids: Iterable[str],
+        status: CommandStatus = CommandStatus.COMPLETED,
+    ) -> int:
+        """
+        Set the status of several commands in one transaction.
+
+        Args:
+            command_ids: Commands to update
+            status: New status (default: completed)
 
+        Returns:
+            Number of commands updated
+        """
+        command_ids = list(command_ids)
+        if not command_ids:
+            return 0
+        return await self._run(
+            self._update_status_sync, command_ids, status, time.time()
+        )
+
+    def _get_stats_sync(self, device_id: Optional[str]) -> Dict[str, int]:
+        conn = self._get_conn()
         with self._lock:
-            with sqlite3.connect(str(self.db_path)) as conn:
+            if device_id:
                 cursor = conn.execute(
                     """
-                    UPDATE command_queue SET status = ?, updated_at = ?
-                    WHERE command_id = ?
+                    SELECT status, COUNT(*) FROM command_queue
+                    WHERE device_id = ?
+                    GROUP BY status
                 """,
-                    (status.value, now, command_id),
+                    (device_id,),
+                )
+            else:
+                cursor = conn.execute(
+                    """
+                    SELECT status, COUNT(*) FROM command_queue
+                    GROUP BY status
+                """
                 )
-                conn.commit()
-                return cursor.rowcount > 0
+
+            return {row[0]: row[1] for row in cursor.fetchall()}
 
     async def get_queue_stats(self, device_id: Optional[str] = None) -> Dict[str, Any]:
         """Get queue statistics"""
-        now = time.time()
-
-        with self._lock:
-            with sqlite3.connect(str(self.db_path)) as conn:
-                if device_id:
-                    cursor = conn.execute(
-                        """
-                        SELECT status, COUNT(*) FROM command_queue
-                        WHERE device_id = ?
-                        GROUP BY status
-                    """,
-                        (device_id,),
-                    )
-                else:
-                    cursor = conn.execute(
-                        """
-                        SELECT status, COUNT(*) FROM command_queue
-                        GROUP BY status
-                    """
-                    )
-
-                stats = {row[0]: row[1] for row in cursor.fetchall()}
+        stats = await self._run(self._get_stats_sync, device_id)
 
         return {
             "device_id": device_id,
@@ -397,71 +506,76 @@ class CommandQueue:
             "total": sum(stats.values()),
         }
 
+    def _cleanup_sync(self, cutoff: float) -> int:
+        conn = self._get_conn()
+        with self._lock, conn:
+            cursor = conn.execute(
+                """
+                DELETE FROM command_queue
+                WHERE status IN (?, ?, ?) AND created_at < ?
+            """,
+                (
+                    CommandStatus.COMPLETED.value,
+                    CommandStatus.FAILED.value,
+                    CommandStatus.EXPIRED.value,
+                    cutoff,
+                ),
+            )
+            return cursor.rowcount
+
     async def cleanup_old_commands(self, max_age_hours: int = 24) -> int:
         """Remove old completed/failed/expired commands"""
         cutoff = time.time() - (max_age_hours * 3600)
 
-        with self._lock:
-            with sqlite3.connect(str(self.db_path)) as conn:
+        deleted = await self._run(self._cleanup_sync, cutoff)
+
+        if deleted > 0:
+            logger.info(f"[CommandQueue] Cleaned up {deleted} old commands")
+        return deleted
+
+    def _cancel_pending_sync(
+        self, device_id: str, command_type: Optional[str], now: float
+    ) -> int:
+        conn = self._get_conn()
+        with self._lock, conn:
+            if command_type:
                 cursor = conn.execute(
                     """
-                    DELETE FROM command_queue
-                    WHERE status IN (?, ?, ?) AND created_at < ?
+                    UPDATE command_queue
+                    SET status = ?, updated_at = ?
+                    WHERE device_id = ? AND command_type = ? AND status = ?
                 """,
                     (
-                        CommandStatus.COMPLETED.value,
-                        CommandStatus.FAILED.value,
                         CommandStatus.EXPIRED.value,
-                        cutoff,
+                        now,
+                        device_id,
+                        command_type,
+                        CommandStatus.PENDING.value,
                     ),
                 )
-                deleted = cursor.rowcount
-                conn.commit()
-
-        if deleted > 0:
-            logger.info(f"[CommandQueue] Cleaned up {deleted} old commands")
-        return deleted
+            else:
+                cursor = conn.execute(
+                    """
+                    UPDATE command_queue
+                    SET status = ?, updated_at = ?
+                    WHERE device_id = ? AND status = ?
+                """,
+                    (
+                        CommandStatus.EXPIRED.value,
+                        now,
+                        device_id,
+                        CommandStatus.PENDING.value,
+                    ),
+                )
+            return cursor.rowcount
 
     async def cancel_pending(
         self, device_id: str, command_type: Optional[str] = None
     ) -> int:
         """Cancel pending commands for a device"""
-        now = time.time()
-
-        with self._lock:
-            with sqlite3.connect(str(self.db_path)) as conn:
-                if command_type:
-                    cursor = conn.execute(
-                        """
-                        UPDATE command_queue
-                        SET status = ?, updated_at = ?
-                        WHERE device_id = ? AND command_type = ? AND status = ?
-                    """,
-                        (
-                            CommandStatus.EXPIRED.value,
-                            now,
-                            device_id,
-                            command_type,
-                            CommandStatus.PENDING.value,
-                        ),
-                    )
-                else:
-                    cursor = conn.execute(
-                        """
-                        UPDATE command_queue
-                        SET status = ?, updated_at = ?
-                        WHERE device_id = ? AND status = ?
-                    """,
-                        (
-                            CommandStatus.EXPIRED.value,
-                            now,
-                            device_id,
-                            CommandStatus.PENDING.value,
-                        ),
-                    )
-
-                cancelled = cursor.rowcount
-                conn.commit()
+        cancelled = await self._run(
+            self._cancel_pending_sync, device_id, command_type, time.time()
+        )
 
         logger.info(
             f"[CommandQueue] Cancelled {cancelled} pending commands for {device_id}"
@@ -539,32 +539,38 @@ class ConnectionMonitor:
                 f"[ConnectionMonitor] Replaying {len(commands)} queued commands for {device_id}"
             )
 
-            for cmd in commands:
-                try:
-                    await self.command_queue.mark_processing(cmd.command_id)
-
-                    success = await self._command_sender(
-                        device_id, cmd.command_type, cmd.payload
-                    )
+            # Acknowledge successful replays in one transaction, even if the
+            # loop is interrupted, so they are never replayed twice
+            completed_ids = []
+            try:
+                for cmd in commands:
+                    try:
+                        await self.command_queue.mark_processing(cmd.command_id)
 
-                    if success:
-                        await self.command_queue.mark_completed(cmd.command_id)
-                        logger.info(
-                            f"[ConnectionMonitor] Replayed command {cmd.command_id} successfully"
-                        )
-                    else:
-                        await self.command_queue.mark_failed(
-                            cmd.command_id, "Send failed"
-                        )
-                        logger.warning(
-                            f"[ConnectionMonitor] Failed to replay command {cmd.command_id}"
+                        success = await self._command_sender(
+                            device_id, cmd.command_type, cmd.payload
                         )
 
-                except Exception as e:
-                    await self.command_queue.mark_failed(cmd.command_id, str(e))
-                    logger.error(
-                        f"[ConnectionMonitor] Error replaying command {cmd.command_id}: {e}"
-                    )
+                        if success:
+                            completed_ids.append(cmd.command_id)
+                            logger.info(
+                                f"[ConnectionMonitor] Replayed command {cmd.command_id} successfully"
+                            )
+                        else:
+                            await self.command_queue.mark_failed(
+                                cmd.command_id, "Send failed"
+                            )
+                            logger.warning(
+                                f"[ConnectionMonitor] Failed to replay command {cmd.command_id}"
+                            )
+
+                    except Exception as e:
+                        await self.command_queue.mark_failed(cmd.command_id, str(e))
+                        logger.error(
+                            f"[ConnectionMonitor] Error replaying command {cmd.command_id}: {e}"
+                        )
+            finally:
+                await self.command_queue.ack_many(completed_ids)
 
         except Exception as e:
             logger.error(f"[ConnectionMonitor] Error getting queued commands: {e}")
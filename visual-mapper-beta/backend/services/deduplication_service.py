@@ -2,7 +2,7 @@
 Deduplication Service - Unified duplicate detection for sensors, actions, and flows.
 
 Provides:
-- Similarity detection for new entities
+- Similarity detection for new entities (sensor candidates via blocking keys)
 - Merge recommendations
 - Runtime session caching to avoid redundant operations
 - Non-breaking: warnings and suggestions only, never blocks user actions
@@ -17,6 +17,13 @@ import hashlib
 
 logger = logging.getLogger(__name__)
 
+# Sensor bounds match when their centers are within this many pixels
+SENSOR_BOUNDS_TOLERANCE = 20
+
+# Highest sensor similarity possible without sharing a blocking key
+# (extraction 20% + element class 5% + name 5%); lower thresholds need a full scan
+UNKEYED_MAX_SENSOR_SCORE = 0.30
+
 
 class EntityType(str, Enum):
     SENSOR = "sensor"
@@ -132,6 +139,100 @@ class ExecutionSession:
         }
 
 
+def _bounds_center(bounds: Any) -> Optional[Tuple[float, float]]:
+    """Center of x/y/width/height or left/top/right/bottom bounds (None if unknown)."""
+    if not bounds:
+        return None
+    if hasattr(bounds, "model_dump"):
+        bounds = bounds.model_dump()
+    try:
+        if "x" in bounds:
+            x, y = bounds.get("x", 0), bounds.get("y", 0)
+            w, h = bounds.get("width", 0), bounds.get("height", 0)
+        elif "left" in bounds:
+            x, y = bounds.get("left", 0), bounds.get("top", 0)
+            w = bounds.get("right", 0) - x
+            h = bounds.get("bottom", 0) - y
+        else:
+            return None
+        return x + w / 2, y + h / 2
+    except Exception:
+        return None
+
+
+def _sensor_blocking_fields(
+    sensor: Any,
+) -> Tuple[str, str, Optional[Tuple[float, float]]]:
+    """
+    (resource_id, activity, bounds center) as _calculate_sensor_similarity sees them.
+
+    Accepts sensor dicts and SensorDefinition objects (without model_dump()).
+    """
+    if isinstance(sensor, dict):
+        source = sensor.get("source", {}) or {}
+
+        def value(key: str, fallback_key: str) -> str:
+            v = source.get(key, "") or sensor.get(key, "")
+            if not v:
+                v = source.get(fallback_key, "") or sensor.get(fallback_key, "")
+            return str(v).strip() if v else ""
+
+        rid = value("element_resource_id", "resource_id")
+        screen = value("screen_activity", "activity")
+        bounds = source.get("custom_bounds") or sensor.get("bounds", {})
+    else:
+        source = sensor.source
+        rid = str(source.element_resource_id or "").strip()
+        screen = str(source.screen_activity or "").strip()
+        bounds = source.custom_bounds
+
+    activity = screen.split(".")[-1] if screen else ""
+    return rid, activity, _bounds_center(bounds)
+
+
+class _SensorBlockingIndex:
+    """
+    Buckets sensors by resource_id, activity and a bounds grid cell.
+
+    Two sensors can only reach a similarity above UNKEYED_MAX_SENSOR_SCORE if
+    they share one of these, so candidates() returns a superset of the matches
+    while skipping most pairs. Bounds cells are SENSOR_BOUNDS_TOLERANCE wide;
+    centers within tolerance always fall in the same or an adjacent cell.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[tuple, List[int]] = {}
+
+    @staticmethod
+    def keys(sensor: Any) -> List[tuple]:
+        rid, activity, center = _sensor_blocking_fields(sensor)
+        keys = []
+        if rid:
+            keys.append(("rid", rid))
+        if activity:
+            keys.append(("screen", activity))
+        if center is not None:
+            cell = SENSOR_BOUNDS_TOLERANCE
+            keys.append(("cell", int(center[0] // cell), int(center[1] // cell)))
+        return keys
+
+    def add(self, position: int, sensor: Any):
+        for key in self.keys(sensor):
+            self._buckets.setdefault(key, []).append(position)
+
+    def candidates(self, sensor: Any) -> Set[int]:
+        found: Set[int] = set()
+        for key in self.keys(sensor):
+            if key[0] == "cell":
+                _, cx, cy = key
+                for dx in (-1, 0, 1):
+                    for dy in (-1, 0, 1):
+                        found.update(self._buckets.get(("cell", cx + dx, cy + dy), ()))
+            else:
+                found.update(self._buckets.get(key, ()))
+        return found
+
+
 class DeduplicationService:
     """
     Central service for detecting and managing duplicates.
@@ -182,7 +283,7 @@ class DeduplicationService:
         Returns:
             Matching SensorDefinition if found, else None
         """
-        logger.info(f"[Dedup] find_matching_sensor called for device: {device_id}")
+        logger.debug(f"[Dedup] find_matching_sensor called for device: {device_id}")
 
         if not self.sensor_manager:
             logger.warning(
@@ -192,23 +293,15 @@ class DeduplicationService:
 
         try:
             existing_sensors = self.sensor_manager.get_all_sensors(device_id)
-            logger.info(
-                f"[Dedup] Found {len(existing_sensors)} existing sensors for device {device_id}"
-            )
-
             if not existing_sensors:
                 logger.info("[Dedup] No existing sensors to compare against")
                 return None
 
-            # Log new sensor key fields for debugging
-            new_rid = new_sensor_data.get("source", {}).get(
-                "element_resource_id", ""
-            ) or new_sensor_data.get("element_resource_id", "")
-            new_screen = new_sensor_data.get("source", {}).get(
-                "screen_activity", ""
-            ) or new_sensor_data.get("screen_activity", "")
-            logger.info(
-                f"[Dedup] New sensor: resource_id={new_rid}, screen={new_screen}"
+            candidates = self._sensor_candidates(
+                existing_sensors, new_sensor_data, threshold
+            )
+            logger.debug(
+                f"[Dedup] Scoring {len(candidates)}/{len(existing_sensors)} candidate sensors for device {device_id}"
             )
 
             best_match = None
@@ -216,26 +309,12 @@ class DeduplicationService:
             best_reasons = []
             highest_score_found = 0.0  # Track highest score even if below threshold
 
-            for existing_obj in existing_sensors:
-                existing = (
-                    existing_obj.model_dump()
-                    if hasattr(existing_obj, "model_dump")
-                    else existing_obj
-                )
+            for existing_obj in candidates:
+                existing = self._as_sensor_dict(existing_obj)
                 score, reasons = self._calculate_sensor_similarity(
                     new_sensor_data, existing
                 )
 
-                existing_name = existing.get("friendly_name", "Unknown")
-                existing_rid = (
-                    existing.get("source", {}).get("element_resource_id", "")
-                    if existing.get("source")
-                    else ""
-                )
-                logger.info(
-                    f"[Dedup] Compared with '{existing_name}' (rid={existing_rid}): score={score:.2f}, reasons={[r.value for r in reasons]}"
-                )
-
                 # Track highest score found regardless of threshold
                 if score > highest_score_found:
                     highest_score_found = score
@@ -291,41 +370,15 @@ class DeduplicationService:
         try:
             existing_sensors = self.sensor_manager.get_all_sensors(device_id)
 
-            for existing_obj in existing_sensors:
+            for existing_obj in self._sensor_candidates(
+                existing_sensors, new_sensor, threshold
+            ):
                 # Convert SensorDefinition to dict for comparison
-                existing = (
-                    existing_obj.model_dump()
-                    if hasattr(existing_obj, "model_dump")
-                    else existing_obj
-                )
+                existing = self._as_sensor_dict(existing_obj)
                 score, reasons = self._calculate_sensor_similarity(new_sensor, existing)
 
                 if score >= threshold:
-                    recommendation = self._get_recommendation(score)
-                    sensor_name = existing.get("name") or existing.get(
-                        "friendly_name", "Unnamed"
-                    )
-                    matches.append(
-                        SimilarMatch(
-                            entity_id=existing.get("sensor_id", ""),
-                            entity_type=EntityType.SENSOR,
-                            entity_name=sensor_name,
-                            similarity_score=score,
-                            match_reasons=reasons,
-                            recommendation=recommendation,
-                            details={
-                                "existing_name": sensor_name,
-                                "existing_value": existing.get("current_value"),
-                                "existing_screen": existing.get("screen_activity"),
-                                "existing_resource_id": existing.get("resource_id"),
-                                "match_reason": (
-                                    reasons[0].value
-                                    if reasons
-                                    else "similar configuration"
-                                ),
-                            },
-                        )
-                    )
+                    matches.append(self._sensor_match(existing, score, reasons))
 
             # Sort by similarity score (highest first)
             matches.sort(key=lambda m: m.similarity_score, reverse=True)
@@ -340,6 +393,44 @@ class DeduplicationService:
 
         return matches
 
+    def _sensor_candidates(
+        self, existing_sensors: List[Any], new_sensor: Any, threshold: float
+    ) -> List[Any]:
+        """Existing sensors that can reach threshold (original order)."""
+        if threshold <= UNKEYED_MAX_SENSOR_SCORE + 1e-9:
+            return list(existing_sensors)
+
+        index = _SensorBlockingIndex()
+        for position, sensor in enumerate(existing_sensors):
+            index.add(position, sensor)
+        return [existing_sensors[i] for i in sorted(index.candidates(new_sensor))]
+
+    @staticmethod
+    def _as_sensor_dict(sensor: Any) -> Dict[str, Any]:
+        return sensor.model_dump() if hasattr(sensor, "model_dump") else sensor
+
+    def _sensor_match(
+        self, existing: Dict[str, Any], score: float, reasons: List[MatchReason]
+    ) -> SimilarMatch:
+        sensor_name = existing.get("name") or existing.get("friendly_name", "Unnamed")
+        return SimilarMatch(
+            entity_id=existing.get("sensor_id", ""),
+            entity_type=EntityType.SENSOR,
+            entity_name=sensor_name,
+            similarity_score=score,
+            match_reasons=reasons,
+            recommendation=self._get_recommendation(score),
+            details={
+                "existing_name": sensor_name,
+                "existing_value": existing.get("current_value"),
+                "existing_screen": existing.get("screen_activity"),
+                "existing_resource_id": existing.get("resource_id"),
+                "match_reason": (
+                    reasons[0].value if reasons else "similar configuration"
+                ),
+            },
+        )
+
     def _calculate_sensor_similarity(
         self, new_sensor: Dict[str, Any], existing: Dict[str, Any]
     ) -> Tuple[float, List[MatchReason]]:
@@ -414,7 +505,9 @@ class DeduplicationService:
             "custom_bounds"
         ) or existing.get("bounds", {})
         if new_bounds and existing_bounds:
-            if self._bounds_overlap(new_bounds, existing_bounds, tolerance=20):
+            if self._bounds_overlap(
+                new_bounds, existing_bounds, tolerance=SENSOR_BOUNDS_TOLERANCE
+            ):
                 score += 0.15
                 reasons.append(MatchReason.SAME_BOUNDS)
 
@@ -447,39 +540,16 @@ class DeduplicationService:
     ) -> bool:
         """Check if two bounds overlap within tolerance."""
         tolerance = tolerance or self.BOUNDS_TOLERANCE
-        try:
-            # Handle different bounds formats
-            if "x" in bounds1:
-                x1, y1 = bounds1.get("x", 0), bounds1.get("y", 0)
-                w1, h1 = bounds1.get("width", 0), bounds1.get("height", 0)
-            elif "left" in bounds1:
-                x1, y1 = bounds1.get("left", 0), bounds1.get("top", 0)
-                w1 = bounds1.get("right", 0) - x1
-                h1 = bounds1.get("bottom", 0) - y1
-            else:
-                return False
-
-            if "x" in bounds2:
-                x2, y2 = bounds2.get("x", 0), bounds2.get("y", 0)
-                w2, h2 = bounds2.get("width", 0), bounds2.get("height", 0)
-            elif "left" in bounds2:
-                x2, y2 = bounds2.get("left", 0), bounds2.get("top", 0)
-                w2 = bounds2.get("right", 0) - x2
-                h2 = bounds2.get("bottom", 0) - y2
-            else:
-                return False
-
-            # Check if centers are close
-            center1_x = x1 + w1 / 2
-            center1_y = y1 + h1 / 2
-            center2_x = x2 + w2 / 2
-            center2_y = y2 + h2 / 2
-
-            dx = abs(center1_x - center2_x)
-            dy = abs(center1_y - center2_y)
+        # Handle different bounds formats; check if centers are close
+        center1 = _bounds_center(bounds1)
+        center2 = _bounds_center(bounds2)
+        if center1 is None or center2 is None:
+            return False
 
+        try:
+            dx = abs(center1[0] - center2[0])
+            dy = abs(center1[1] - center2[1])
             return dx <= tolerance and dy <= tolerance
-
         except Exception:
             return False
 
@@ -880,34 +950,78 @@ class DeduplicationService:
         return suggestions
 
     def _find_sensor_duplicate_groups(self, device_id: str) -> List[Dict]:
-        """Find groups of duplicate sensors."""
+        """
+        Find groups of duplicate sensors.
+
+        Each sensor is only scored against blocking-key candidates that come
+        after it, and matching pairs are merged with union-find, so a group
+        is a connected set of pairwise matches.
+        """
         groups = []
         try:
             sensors = self.sensor_manager.get_all_sensors(device_id)
-            processed = set()
-
-            for sensor in sensors:
-                sid = sensor.get("sensor_id")
-                if sid in processed:
+            threshold = self.MEDIUM_SIMILARITY
+
+            index = _SensorBlockingIndex()
+            for position, sensor in enumerate(sensors):
+                index.add(position, sensor)
+
+            dumped: Dict[int, Dict[str, Any]] = {}
+
+            def as_dict(position: int) -> Dict[str, Any]:
+                if position not in dumped:
+                    dumped[position] = self._as_sensor_dict(sensors[position])
+                return dumped[position]
+
+            parent = list(range(len(sensors)))
+
+            def find(i: int) -> int:
+                while parent[i] != i:
+                    parent[i] = parent[parent[i]]
+                    i = parent[i]
+                return i
+
+            pairs = 0
+            for i, sensor in enumerate(sensors):
+                if threshold <= UNKEYED_MAX_SENSOR_SCORE + 1e-9:
+                    candidates = range(i + 1, len(sensors))
+                else:
+                    candidates = [j for j in index.candidates(sensor) if j > i]
+                for j in candidates:
+                    pairs += 1
+                    score, _ = self._calculate_sensor_similarity(
+                        as_dict(i), as_dict(j)
+                    )
+                    if score >= threshold:
+                        root_i, root_j = find(i), find(j)
+                        if root_i != root_j:
+                            # Lower position becomes the root (kept sensor)
+                            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+            members: Dict[int, List[int]] = {}
+            for position in range(len(sensors)):
+                members.setdefault(find(position), []).append(position)
+
+            for root, positions in sorted(members.items()):
+                if len(positions) < 2:
                     continue
-
-                # Find similar sensors
-                similar = self.find_similar_sensors(
-                    device_id, sensor, threshold=self.MEDIUM_SIMILARITY
-                )
-                similar_ids = [m.entity_id for m in similar if m.entity_id != sid]
-
-                if similar_ids:
-                    group = {
-                        "items": [sid] + similar_ids,
-                        "names": [sensor.get("name", "Unnamed")]
-                        + [m.entity_name for m in similar],
+                items = [as_dict(p) for p in positions]
+                ids = [item.get("sensor_id") for item in items]
+                groups.append(
+                    {
+                        "items": ids,
+                        "names": [
+                            item.get("name") or item.get("friendly_name", "Unnamed")
+                            for item in items
+                        ],
                         "recommendation": "merge",
-                        "keep_suggestion": sid,  # Suggest keeping the first one
+                        "keep_suggestion": ids[0],  # Suggest keeping the first one
                     }
-                    groups.append(group)
-                    processed.add(sid)
-                    processed.update(similar_ids)
+                )
+
+            logger.debug(
+                f"[Dedup] Scored {pairs} candidate pairs for {len(sensors)} sensors, {len(groups)} duplicate groups"
+            )
 
         except Exception as e:
             logger.error(f"[Dedup] Error finding sensor duplicates: {e}")
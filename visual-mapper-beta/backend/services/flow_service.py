@@ -220,7 +220,7 @@ STEP_SCHEMAS: Dict[str, Dict[str, Any]] = {
             "state_match_threshold": {
                 "type": "number",
                 "description": "Similarity threshold (0.0-1.0)",
-                "default": 0.80,
+                "default": 0.90,
             },
             "recovery_action": {
                 "type": "string",
@@ -430,6 +430,10 @@ STEP_SCHEMAS: Dict[str, Dict[str, Any]] = {
 # Schema version for cache busting
 SCHEMA_VERSION = "2.0.0"
 
+# Extra seconds to wait for a companion result beyond flow.flow_timeout
+# (MQTT round trip and result publishing)
+MQTT_RESULT_GRACE_SECONDS = 10.0
+
 
 class FlowService:
     def __init__(self, flow_manager, flow_executor, mqtt_manager=None, adb_bridge=None):
@@ -719,21 +723,31 @@ class FlowService:
         preferred = getattr(flow, "preferred_executor", "server")
         return preferred if preferred else "server"
 
-    async def _execute_via_mqtt(self, flow) -> "FlowExecutionResult":
+    async def _execute_via_mqtt(
+        self, flow, timeout: Optional[float] = None
+    ) -> "FlowExecutionResult":
         """
         Phase 2: Execute flow via MQTT to Android companion app.
 
         This sends the flow to the companion app which executes it locally
-        using the AccessibilityService for gestures.
+        using the AccessibilityService for gestures, then waits for the
+        result the app publishes (matched by request_id).
+
+        Args:
+            flow: Flow to execute
+            timeout: Seconds to wait for the result
+                     (default: flow.flow_timeout + MQTT_RESULT_GRACE_SECONDS)
         """
-        from core.flows import FlowExecutionResult, StepResult
+        from core.flows import FlowExecutionResult
         from datetime import datetime
-        import asyncio
-        import json
+        import time
 
         if not self.mqtt_manager or not self.mqtt_manager.is_connected:
             raise HTTPException(status_code=503, detail="MQTT not connected")
 
+        if timeout is None:
+            timeout = flow.flow_timeout + MQTT_RESULT_GRACE_SECONDS
+
         # Prepare flow payload for Android
         flow_payload = {
             "flow_id": flow.flow_id,
@@ -746,48 +760,145 @@ class FlowService:
             "flow_timeout": flow.flow_timeout,
         }
 
-        # Publish execution request to MQTT
-        topic = f"visual_mapper/{flow.device_id}/flow/{flow.flow_id}/execute"
-        start_time = datetime.now()
+        started_at = datetime.now()
+        start_time = time.monotonic()
 
         try:
-            self.mqtt_manager.publish(topic, json.dumps(flow_payload))
-            logger.info(f"Published flow execution request to {topic}")
-
-            # For now, return a pending result
-            # In a full implementation, we'd wait for a response via MQTT callback
-            # or use a result queue
-
-            return FlowExecutionResult(
+            result_data = await self.mqtt_manager.execute_flow_and_wait(
+                flow.device_id, flow.flow_id, flow_payload, timeout=timeout
+            )
+            result = self._result_from_companion(flow, result_data)
+            if not result.execution_time_ms:
+                result.execution_time_ms = int((time.monotonic() - start_time) * 1000)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"[FlowService] No companion result for flow {flow.flow_id} within {timeout:g}s"
+            )
+            result = FlowExecutionResult(
                 flow_id=flow.flow_id,
-                success=True,  # Optimistic - actual result comes via MQTT callback
+                success=False,
                 executed_steps=0,
-                failed_step=None,
-                error_message=None,
-                captured_sensors={},
-                step_results=[],
-                execution_time_ms=int(
-                    (datetime.now() - start_time).total_seconds() * 1000
-                ),
-                timestamp=datetime.now(),
+                error_message=f"Companion app did not report a result within {timeout:g}s",
+                execution_time_ms=int((time.monotonic() - start_time) * 1000),
             )
-
         except Exception as e:
             logger.error(f"Failed to execute flow via MQTT: {e}")
-            return FlowExecutionResult(
+            result = FlowExecutionResult(
                 flow_id=flow.flow_id,
                 success=False,
                 executed_steps=0,
                 failed_step=0,
                 error_message=f"MQTT execution failed: {str(e)}",
-                captured_sensors={},
-                step_results=[],
-                execution_time_ms=int(
-                    (datetime.now() - start_time).total_seconds() * 1000
-                ),
-                timestamp=datetime.now(),
+                execution_time_ms=int((time.monotonic() - start_time) * 1000),
+            )
+
+        await self._record_companion_execution(flow, result, started_at)
+        return result
+
+    def _result_from_companion(
+        self, flow, result_data: Dict[str, Any]
+    ) -> "FlowExecutionResult":
+        """
+        Map a companion result payload to a FlowExecutionResult.
+
+        Companion payload: success, error, duration (ms), timestamp, and
+        optionally executed_steps, failed_step, captured_sensors and
+        step_results (list of StepResult-shaped dicts).
+        """
+        from core.flows import FlowExecutionResult
+        from core.flows.flow_models import StepResult
+
+        step_results = []
+        for i, step_data in enumerate(result_data.get("step_results") or []):
+            try:
+                step_results.append(
+                    StepResult(
+                        step_index=step_data.get("step_index", i),
+                        step_type=step_data.get("step_type")
+                        or (flow.steps[i].step_type if i < len(flow.steps) else "unknown"),
+                        description=step_data.get("description"),
+                        success=bool(step_data.get("success", False)),
+                        error_message=step_data.get("error_message")
+                        or step_data.get("error"),
+                        details=step_data.get("details") or {},
+                    )
+                )
+            except Exception as e:
+                logger.warning(
+                    f"[FlowService] Ignoring malformed step result {i} for {flow.flow_id}: {e}"
+                )
+
+        success = bool(result_data.get("success", False))
+        executed_steps = result_data.get("executed_steps")
+        if executed_steps is None:
+            executed_steps = len(step_results) if step_results else (
+                len(flow.steps) if success else 0
+            )
+        failed_step = result_data.get("failed_step")
+        if failed_step is None and not success:
+            failed_step = next(
+                (sr.step_index for sr in step_results if not sr.success), None
             )
 
+        return FlowExecutionResult(
+            flow_id=flow.flow_id,
+            success=success,
+            executed_steps=executed_steps,
+            failed_step=failed_step,
+            error_message=result_data.get("error_message") or result_data.get("error"),
+            captured_sensors=result_data.get("captured_sensors") or {},
+            step_results=step_results,
+            execution_time_ms=int(result_data.get("duration") or 0),
+        )
+
+    async def _record_companion_execution(self, flow, result, started_at):
+        """Add a companion execution to flow history and metrics (like FlowExecutor)"""
+        if not self.flow_executor:
+            return
+
+        from core.flows.flow_execution_history import FlowExecutionLog, FlowStepLog
+        from datetime import datetime
+        import uuid
+
+        started = started_at.isoformat()
+        execution_log = FlowExecutionLog(
+            execution_id=str(uuid.uuid4()),
+            flow_id=flow.flow_id,
+            device_id=flow.device_id,
+            started_at=started,
+            completed_at=datetime.now().isoformat(),
+            success=result.success,
+            error=result.error_message,
+            duration_ms=result.execution_time_ms,
+            triggered_by="api",
+            steps=[
+                FlowStepLog(
+                    step_index=sr.step_index,
+                    step_type=sr.step_type,
+                    description=sr.description,
+                    started_at=started,
+                    success=sr.success,
+                    error=sr.error_message,
+                    details=sr.details or None,
+                )
+                for sr in result.step_results
+            ],
+            total_steps=len(flow.steps),
+            executed_steps=result.executed_steps,
+        )
+
+        try:
+            self.flow_executor.execution_history.add_execution(execution_log)
+        except Exception as e:
+            logger.error(f"[FlowService] Failed to save execution history: {e}")
+
+        performance_monitor = getattr(self.flow_executor, "performance_monitor", None)
+        if performance_monitor:
+            try:
+                await performance_monitor.record_execution(flow, result)
+            except Exception as e:
+                logger.error(f"[FlowService] Failed to record metrics: {e}")
+
     def _validate_flow_data(self, flow_data: Dict[str, Any]):
         """
         Phase 2: Comprehensive validation using STEP_SCHEMAS.
@@ -2,6 +2,7 @@
 Screenshot Stitcher Compose Module
 
 Contains image stitching and composition methods:
+- StripCanvas: Deferred canvas that composes recorded strips in one pass
 - stitch_by_elements: Main stitch orchestrator using known scroll distances
 - stitch_two_captures_simple: Simple stitch with pre-detected overlap
 - stitch_two_captures_deterministic: Image-based stitch using template matching
@@ -12,12 +13,93 @@ Contains image stitching and composition methods:
 
 import logging
 import re
+from dataclasses import dataclass
 from typing import Tuple, Optional, List
 from PIL import Image
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class StitchStrip:
+    """A horizontal band of a source capture placed at dest_y in the output."""
+
+    image: Image.Image
+    top: int  # First source row (inclusive)
+    bottom: int  # Last source row (exclusive)
+    dest_y: int  # Row in the stitched image where `top` lands
+
+    @property
+    def height(self) -> int:
+        return self.bottom - self.top
+
+
+class StripCanvas:
+    """
+    Deferred stitch canvas.
+
+    Instead of re-copying the ever-growing accumulated image for every new
+    capture, the stitcher records which rows of which capture end up where
+    and composes the final image once in render(). Only references to the
+    capture images are held, so peak memory is the captures plus one output
+    canvas regardless of page length.
+    """
+
+    def __init__(self, width: int):
+        self.width = width
+        self.strips: List[StitchStrip] = []
+
+    @classmethod
+    def from_image(cls, img: Image.Image) -> "StripCanvas":
+        canvas = cls(img.size[0])
+        canvas.add(img, 0, img.size[1], 0)
+        return canvas
+
+    @property
+    def height(self) -> int:
+        if not self.strips:
+            return 0
+        return max(strip.dest_y + strip.height for strip in self.strips)
+
+    def add(self, image: Image.Image, top: int, bottom: int, dest_y: int):
+        """Place rows [top, bottom) of image at dest_y."""
+        if bottom > top:
+            self.strips.append(StitchStrip(image, top, bottom, dest_y))
+
+    def truncate(self, height: int):
+        """Drop everything at or below `height` (e.g. a fixed footer)."""
+        kept = []
+        for strip in self.strips:
+            if strip.dest_y >= height:
+                continue
+            overflow = strip.dest_y + strip.height - height
+            if overflow > 0:
+                strip = StitchStrip(
+                    strip.image, strip.top, strip.bottom - overflow, strip.dest_y
+                )
+            kept.append(strip)
+        self.strips = kept
+
+    def crop(self, top: int, bottom: int) -> Image.Image:
+        """Compose only rows [top, bottom) of the stitched result."""
+        region = Image.new("RGB", (self.width, max(0, bottom - top)))
+        for strip in self.strips:
+            lo = max(top, strip.dest_y)
+            hi = min(bottom, strip.dest_y + strip.height)
+            if hi <= lo:
+                continue
+            src_top = strip.top + (lo - strip.dest_y)
+            src_bottom = strip.top + (hi - strip.dest_y)
+            region.paste(
+                strip.image.crop((0, src_top, self.width, src_bottom)), (0, lo - top)
+            )
+        return region
+
+    def render(self) -> Image.Image:
+        """Allocate the output canvas once and paste every strip into it."""
+        return self.crop(0, self.height)
+
+
 class ImageComposer:
     """Composes multiple screenshots into a single stitched image."""
 
@@ -78,11 +160,13 @@ class ImageComposer:
             )
 
         # For 2+ captures, stitch iteratively
-        # Start with first capture as base
+        # Start with first capture as base. Captures are recorded as strips on a
+        # deferred canvas and composed once at the end, so long pages don't
+        # re-copy the growing accumulated image for every capture.
         img, elements, _, _ = unpack_capture(captures[0])
-        result_img = img
+        canvas = StripCanvas.from_image(img)
         result_elements = elements
-        width, height = result_img.size
+        width, height = img.size
         total_stitch_info = {
             "scroll_offset": 0,
             "header_height": 0,
@@ -105,9 +189,11 @@ class ImageComposer:
             # This matches the stable stitcher's approach
             if precalc_first_new_y > 0 and len(captures) == 2:
                 logger.info(f"  === TRACING PAPER STITCHING (element-based) ===")
+                # Only reached for two captures, so the base is still the first image
                 result_img, result_elements, stitch_info = self.stitch_tracing_paper(
-                    result_img, result_elements, img_next, elements_next, screen_height
+                    img, result_elements, img_next, elements_next, screen_height
                 )
+                canvas = StripCanvas.from_image(result_img)
                 continue
 
             logger.info(
@@ -175,7 +261,7 @@ class ImageComposer:
                     # Take template from bottom of accumulated image, but ABOVE the footer
                     # Important: if there's a fixed footer, taking template from very bottom
                     # would match the footer (which doesn't move) and give wrong results
-                    acc_height = result_img.size[1]
+                    acc_height = canvas.height
                     template_height = 100
                     # Account for footer - take template from CONTENT area, not footer
                     footer_margin = (
@@ -187,13 +273,8 @@ class ImageComposer:
                     )
 
                     if template_y > 0:
-                        template = result_img.crop(
-                            (
-                                0,
-                                template_y,
-                                result_img.size[0],
-                                template_y + template_height,
-                            )
+                        template = canvas.crop(
+                            template_y, template_y + template_height
                         )
 
                         # Search for this template in the new capture
@@ -279,21 +360,20 @@ class ImageComposer:
                     f"  is_last=True, final new_content_start={detected_new_content_start}, new_content={expected_new_content}px"
                 )
 
-            result_img, result_elements, stitch_info = self.stitch_two_captures_simple(
-                result_img,
+            result_elements, stitch_info = self.append_capture_strip(
+                canvas,
                 result_elements,
                 img_next,
                 elements_next,
                 screen_height,
                 detected_new_content_start,  # Use detected position
-                current_result_height,
                 detected_footer,  # Pass detected footer - no hardcoding!
                 is_last_capture=is_last,
             )
 
             # Update for next iteration
             prev_raw_img = img_next
-            current_result_height = result_img.size[1]
+            current_result_height = canvas.height
 
             # Accumulate stitch info
             total_stitch_info["scroll_offset"] += stitch_info.get("scroll_offset", 0)
@@ -301,6 +381,9 @@ class ImageComposer:
                 total_stitch_info["header_height"] = stitch_info.get("header_height", 0)
                 total_stitch_info["footer_height"] = stitch_info.get("footer_height", 0)
 
+        # Compose the final image in a single pass
+        result_img = canvas.render()
+
         # Final summary
         final_w, final_h = result_img.size
         logger.info(f"  === STITCH SUMMARY ===")
@@ -501,8 +584,42 @@ class ImageComposer:
         new_content_start is already determined by template matching.
         detected_footer is dynamically detected from image comparison.
         """
-        width = accumulated_img.size[0]
-        acc_height = accumulated_img.size[1]
+        canvas = StripCanvas.from_image(accumulated_img)
+        base_strip = canvas.strips[-1]
+        combined_elements, stitch_info = self.append_capture_strip(
+            canvas,
+            accumulated_elements,
+            new_img,
+            new_elements,
+            screen_height,
+            new_content_start,
+            detected_footer,
+            is_last_capture=is_last_capture,
+        )
+        if canvas.strips[-1] is base_strip:
+            # Nothing was added - hand back the original image untouched
+            return accumulated_img, combined_elements, stitch_info
+        return canvas.render(), combined_elements, stitch_info
+
+    def append_capture_strip(
+        self,
+        canvas: StripCanvas,
+        accumulated_elements: list,
+        new_img: Image.Image,
+        new_elements: list,
+        screen_height: int,
+        new_content_start: int,  # Where new content starts in new_img
+        detected_footer: int,  # Dynamically detected footer height
+        is_last_capture: bool = True,
+    ) -> Tuple[list, dict]:
+        """
+        Record the new content of new_img as a strip on the canvas.
+
+        Same placement rules as stitch_two_captures_simple, but no pixels are
+        copied until the caller renders the canvas.
+        """
+        width = canvas.width
+        acc_height = canvas.height
 
         # Use the dynamically detected footer - no hardcoding!
         fixed_footer = detected_footer
@@ -516,7 +633,7 @@ class ImageComposer:
 
         if new_content_height <= 0:
             logger.warning(f"  No new content! height={new_content_height}")
-            return accumulated_img, accumulated_elements, {"scroll_offset": 0}
+            return accumulated_elements, {"scroll_offset": 0}
 
         # Skip captures with very little new content (likely duplicates at end of page)
         MIN_NEW_CONTENT = 50  # At least 50px of new content needed
@@ -524,7 +641,7 @@ class ImageComposer:
             logger.warning(
                 f"  Too little new content ({new_content_height}px < {MIN_NEW_CONTENT}px), skipping this capture"
             )
-            return accumulated_img, accumulated_elements, {"scroll_offset": 0}
+            return accumulated_elements, {"scroll_offset": 0}
 
         # For first stitch (acc is single screen), ALWAYS crop footer from accumulated image
         # The last capture will provide the footer, so we don't want it duplicated
@@ -541,66 +658,6 @@ class ImageComposer:
         )
         logger.info(f"  Paste at y={paste_y}, total height={total_height}px")
 
-        # Create stitched image
-        stitched = Image.new("RGB", (width, total_height))
-
-        # Paste accumulated image (crop footer if first stitch)
-        if acc_height == screen_height:
-            # First stitch - crop footer from accumulated image
-            cropped_acc = accumulated_img.crop((0, 0, width, paste_y))
-            stitched.paste(cropped_acc, (0, 0))
-        else:
-            stitched.paste(accumulated_img, (0, 0))
-
-        # Paste new content (no gradient blending - it was causing black lines)
-        new_content = new_img.crop((0, new_content_start, width, new_content_end))
-
-        # DISABLED: Gradient blending was causing artifacts (black lines, cut text)
-        # The overlap detection is accurate enough that we don't need blending
-        blend_height = 0  # Disabled - was 10
-        if False and paste_y > blend_height and new_content_height > blend_height:
-            import numpy as np
-
-            # Get the overlap region from both images (ensure RGB, not RGBA)
-            if acc_height == screen_height:
-                acc_bottom = np.array(
-                    accumulated_img.crop(
-                        (0, paste_y - blend_height, width, paste_y)
-                    ).convert("RGB")
-                )
-            else:
-                acc_bottom = np.array(
-                    stitched.crop((0, paste_y - blend_height, width, paste_y)).convert(
-                        "RGB"
-                    )
-                )
-            new_top = np.array(
-                new_content.convert("RGB").crop((0, 0, width, blend_height))
-            )
-
-            # Create gradient blend
-            for i in range(blend_height):
-                alpha = i / blend_height  # 0 at top (acc), 1 at bottom (new)
-                blended_row = (1 - alpha) * acc_bottom[i] + alpha * new_top[i]
-                acc_bottom[i] = blended_row.astype(np.uint8)
-
-            # Paste blended region (replaces the area just before paste_y)
-            blended_img = Image.fromarray(acc_bottom)
-            stitched.paste(blended_img, (0, paste_y - blend_height))
-
-            # Paste rest of new content starting at paste_y (NOT paste_y + blend_height!)
-            if new_content_height > blend_height:
-                rest_content = new_content.crop(
-                    (0, blend_height, width, new_content_height)
-                )
-                stitched.paste(
-                    rest_content, (0, paste_y)
-                )  # Fixed: was paste_y + blend_height
-
-            logger.info(f"  Applied {blend_height}px gradient blend at seam")
-        else:
-            stitched.paste(new_content, (0, paste_y))
-
         # === STITCH QUALITY CHECK ===
         # Compare the seam region to detect misalignment
         import numpy as np
@@ -608,14 +665,7 @@ class ImageComposer:
         seam_height = 20  # Compare 20px around the seam
         if paste_y > seam_height and new_content_start > 0:
             # Get the bottom of accumulated image (above where we paste)
-            if acc_height == screen_height:
-                acc_seam = accumulated_img.crop(
-                    (0, paste_y - seam_height, width, paste_y)
-                )
-            else:
-                acc_seam = accumulated_img.crop(
-                    (0, paste_y - seam_height, width, paste_y)
-                )
+            acc_seam = canvas.crop(paste_y - seam_height, paste_y)
 
             # Get the top of new content (what we're pasting)
             new_seam = new_img.crop(
@@ -636,6 +686,11 @@ class ImageComposer:
                     f"  Stitch quality OK: seam similarity {seam_similarity*100:.1f}%"
                 )
 
+        # Crop footer from accumulated content (first stitch), then place new content.
+        # No gradient blending - it was causing black lines and cut text.
+        canvas.truncate(paste_y)
+        canvas.add(new_img, new_content_start, new_content_end, paste_y)
+
         # === Combine elements ===
         combined_elements = []
 
@@ -666,7 +721,7 @@ class ImageComposer:
                     }
                 combined_elements.append(adjusted_elem)
 
-        return stitched, combined_elements, {"scroll_offset": new_content_start}
+        return combined_elements, {"scroll_offset": new_content_start}
 
     def stitch_two_captures_deterministic(
         self,
@@ -9,11 +9,17 @@ Contains overlap detection and image comparison methods:
 - detect_overlap_between_captures: Multi-strip overlap validation
 - compare_images: Structural similarity comparison
 - compare_image_regions: Simple region comparison
+
+Pixel arrays and per-row profiles are cached per image, so the many
+detectors run against the same capture pair convert each image only once.
+Sliding searches rank candidate offsets with a row-profile lower bound and
+only run full pixel comparisons on offsets that can still win.
 """
 
 import logging
 import numpy as np
-from typing import Tuple, Optional
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Callable, Iterable, Tuple, Optional
 from PIL import Image
 
 logger = logging.getLogger(__name__)
@@ -28,6 +34,35 @@ except ImportError:
     logger.warning("OpenCV not available in overlap module, using PIL-only methods")
 
 
+class _ImageArrayCache:
+    """
+    Small identity-keyed cache of arrays derived from recently seen images.
+
+    Captures are treated as immutable once handed to the detector, so an
+    image object is a safe key. Holding the last few images alive is cheap
+    compared to re-converting them for every detector call.
+    """
+
+    def __init__(self, size: int = 8):
+        self.size = size
+        self._entries = []  # (image, kind, value)
+
+    def get(self, img: Image.Image, kind: str, build: Callable) -> np.ndarray:
+        for entry_img, entry_kind, value in self._entries:
+            if entry_img is img and entry_kind == kind:
+                return value
+        value = build(img)
+        self._entries.append((img, kind, value))
+        if len(self._entries) > self.size:
+            self._entries.pop(0)
+        return value
+
+
+def _row_profile(arr: np.ndarray) -> np.ndarray:
+    """Mean intensity of each row (over width and channels)."""
+    return arr.reshape(arr.shape[0], -1).mean(axis=1)
+
+
 class OverlapDetector:
     """Detects overlap between screenshots for stitching."""
 
@@ -43,6 +78,105 @@ class OverlapDetector:
         """
         self.fixed_element_threshold = fixed_element_threshold
         self.match_threshold = match_threshold
+        self._arrays = _ImageArrayCache()
+
+    def _raw(self, img: Image.Image) -> np.ndarray:
+        return self._arrays.get(img, "raw", np.array)
+
+    def _rgb(self, img: Image.Image) -> np.ndarray:
+        return self._arrays.get(img, "rgb", lambda i: np.array(i.convert("RGB")))
+
+    def _gray(self, img: Image.Image) -> np.ndarray:
+        return self._arrays.get(img, "gray", lambda i: np.array(i.convert("L")))
+
+    def _rgb_rows(self, img: Image.Image) -> np.ndarray:
+        return self._arrays.get(img, "rgb_rows", lambda i: _row_profile(self._rgb(i)))
+
+    def _gray_rows(self, img: Image.Image) -> np.ndarray:
+        return self._arrays.get(
+            img, "gray_rows", lambda i: _row_profile(self._gray(i))
+        )
+
+    def _band_similarities(
+        self, img1: Image.Image, img2: Image.Image, heights: Iterable[int], top: bool
+    ) -> Optional[np.ndarray]:
+        """
+        Similarity of the top (or bottom) `h` rows of two images for each h.
+
+        Equivalent to compare_image_regions on growing crops, but the per-row
+        absolute differences are computed once and accumulated, instead of
+        re-converting and re-summing the same rows for every step.
+        """
+        arr1 = self._raw(img1)
+        arr2 = self._raw(img2)
+        if arr1.shape != arr2.shape:
+            return None
+
+        heights = np.asarray(list(heights), dtype=np.int64)
+        if heights.size == 0:
+            return heights.astype(np.float64)
+        depth = int(heights.max())
+        if top:
+            band1, band2 = arr1[:depth], arr2[:depth]
+        else:
+            band1, band2 = arr1[::-1][:depth], arr2[::-1][:depth]
+
+        row_diff = np.abs(band1.astype(np.int32) - band2.astype(np.int32))
+        row_diff = row_diff.reshape(depth, -1).sum(axis=1, dtype=np.int64)
+        cumulative = np.cumsum(row_diff)
+
+        values_per_row = arr1[0].size
+        return 1.0 - cumulative[heights - 1] / (255.0 * values_per_row * heights)
+
+    def _best_strip_match(
+        self,
+        strip: np.ndarray,
+        search: np.ndarray,
+        positions: Iterable[int],
+        search_rows: Optional[np.ndarray] = None,
+    ) -> Tuple[int, float]:
+        """
+        Find where `strip` best matches `search` among candidate row offsets.
+
+        Similarity is 1 - mean absolute difference / 255, the same score the
+        sliding-window loops used. Per row |mean(a) - mean(b)| <= mean|a - b|,
+        so the 1-D row profiles give an upper bound on every candidate's score.
+        Candidates are visited best-bound first and the scan stops once no
+        remaining offset can beat the current best, which returns the same
+        (first-best) offset as an exhaustive scan.
+
+        Returns:
+            (best_y, best_score), or (-1, 0.0) when nothing scores above zero
+        """
+        strip_height = strip.shape[0]
+        positions = np.asarray(
+            [y for y in positions if 0 <= y and y + strip_height <= search.shape[0]],
+            dtype=np.int64,
+        )
+        if positions.size == 0 or strip_height == 0:
+            return -1, 0.0
+
+        if search_rows is None:
+            search_rows = _row_profile(search)
+        windows = sliding_window_view(search_rows, strip_height)[positions]
+        lower_bounds = np.abs(windows - _row_profile(strip)).mean(axis=1)
+        order = np.argsort(lower_bounds, kind="stable")
+
+        strip_f = strip.astype(float)
+        best_y, best_score = -1, 0.0
+        for idx in order:
+            # Small slack absorbs float rounding between the bound and the score
+            if 1.0 - lower_bounds[idx] / 255.0 + 1e-9 < best_score:
+                break
+            y = int(positions[idx])
+            candidate = search[y : y + strip_height]
+            diff = np.abs(strip_f - candidate.astype(float))
+            similarity = 1.0 - (np.mean(diff) / 255.0)
+            if similarity > best_score or (similarity == best_score and y < best_y):
+                best_score = similarity
+                best_y = y
+
+        return best_y, best_score
 
     def detect_fixed_top_height(self, img1: Image.Image, img2: Image.Image) -> int:
         """
@@ -59,7 +193,7 @@ class OverlapDetector:
             Height in pixels of the fixed top element, or 0 if none detected
         """
         try:
-            width, height = img1.size
+            height = img1.size[1]
 
             # Start small to detect fullscreen apps and minimal headers
             # Use smaller step size for precision
@@ -67,14 +201,13 @@ class OverlapDetector:
             last_similar_height = 0
 
             # Check top portions in increments starting from 10px
-            for check_height in range(10, min(300, height // 4), step_size):
-                # Extract top portions
-                top1 = img1.crop((0, 0, width, check_height))
-                top2 = img2.crop((0, 0, width, check_height))
-
-                # Compare them
-                similarity = self.compare_image_regions(top1, top2)
+            check_heights = range(10, min(300, height // 4), step_size)
+            similarities = self._band_similarities(img1, img2, check_heights, top=True)
+            if similarities is None:
+                logger.info(f"  No fixed top element detected (size mismatch)")
+                return 0
 
+            for check_height, similarity in zip(check_heights, similarities):
                 if similarity >= self.fixed_element_threshold:
                     # This region is identical - it's part of fixed header
                     last_similar_height = check_height
@@ -118,7 +251,7 @@ class OverlapDetector:
             Height in pixels of the fixed bottom element, or 0 if none detected
         """
         try:
-            width, height = img1.size
+            height = img1.size[1]
 
             # Use smaller step size for more accurate detection
             step_size = 10
@@ -127,14 +260,15 @@ class OverlapDetector:
             # Check bottom portions in small increments
             # Start from VERY small (10px) to detect even gesture nav hint bars
             # This allows detecting fullscreen apps with 0px footer
-            for check_height in range(10, min(300, height // 3), step_size):
-                # Extract bottom portions
-                bottom1 = img1.crop((0, height - check_height, width, height))
-                bottom2 = img2.crop((0, height - check_height, width, height))
-
-                # Compare them
-                similarity = self.compare_image_regions(bottom1, bottom2)
+            check_heights = range(10, min(300, height // 3), step_size)
+            similarities = self._band_similarities(
+                img1, img2, check_heights, top=False
+            )
+            if similarities is None:
+                logger.info(f"  No fixed footer detected (size mismatch)")
+                return 0
 
+            for check_height, similarity in zip(check_heights, similarities):
                 if similarity >= self.fixed_element_threshold:
                     # This region is still fixed (identical)
                     last_similar_height = check_height
@@ -181,8 +315,8 @@ class OverlapDetector:
             img1_height = img1.size[1]
 
             # Convert to numpy arrays and ensure RGB (not RGBA)
-            arr1 = np.array(img1.convert("RGB"))
-            arr2 = np.array(img2.convert("RGB"))
+            arr1 = self._rgb(img1)
+            arr2 = self._rgb(img2)
 
             # Take a strip from the MIDDLE portion of img1 (avoiding header and footer)
             # This strip should appear somewhere in img2 after scrolling
@@ -206,22 +340,13 @@ class OverlapDetector:
             search_start = 80  # Skip status bar
             search_end = screen_height - 100  # Leave room for search
 
-            best_match_y = -1
-            best_match_score = 0
-
-            # Slide the template down img2 and find best match
-            for y in range(
-                search_start, search_end - strip_height, 10
-            ):  # Step by 10 for speed
-                region = arr2[y : y + strip_height, :, :]
-
-                # Calculate similarity (simple mean absolute difference)
-                diff = np.abs(strip.astype(float) - region.astype(float))
-                similarity = 1.0 - (np.mean(diff) / 255.0)
-
-                if similarity > best_match_score:
-                    best_match_score = similarity
-                    best_match_y = y
+            # Slide the template down img2 and find best match (step 10 for speed)
+            best_match_y, best_match_score = self._best_strip_match(
+                strip,
+                arr2,
+                range(search_start, search_end - strip_height, 10),
+                search_rows=self._rgb_rows(img2),
+            )
 
             if best_match_score > 0.85:  # Good match threshold
                 # scroll_offset = where strip was in img1 - where it is in img2
@@ -262,20 +387,15 @@ class OverlapDetector:
             Tuple of (Y-offset in pixels, match quality) or (None, None) if no match
         """
         try:
-            width2, height2 = img2.size
+            height2 = img2.size[1]
             template_width, template_height = template.size
 
-            # Extract search region from img2
+            # Grayscale search region from img2 (cached per capture)
             actual_search_height = min(search_height, height2)
-            search_region = img2.crop((0, 0, width2, actual_search_height))
-
-            # Convert PIL to numpy arrays
-            template_np = np.array(template.convert("RGB"))
-            search_np = np.array(search_region.convert("RGB"))
+            search_gray = self._gray(img2)[:actual_search_height]
 
             # Convert to grayscale for better matching (using PIL)
             template_gray = np.array(template.convert("L"))
-            search_gray = np.array(search_region.convert("L"))
 
             if CV2_AVAILABLE:
                 # Use OpenCV template matching
@@ -330,24 +450,18 @@ class OverlapDetector:
             else:
                 # PIL-only fallback: simple sliding window comparison
                 logger.info("  Using PIL-only template matching (cv2 not available)")
-                best_y = 0
-                max_val = 0.0
-
-                # Slide template down search region
-                for y in range(0, actual_search_height - template_height, 5):
-                    region = search_gray[y : y + template_height, :]
-                    if region.shape != template_gray.shape:
-                        continue
-
-                    # Calculate normalized correlation
-                    diff = np.abs(template_gray.astype(float) - region.astype(float))
-                    similarity = 1.0 - (np.mean(diff) / 255.0)
-
-                    if similarity > max_val:
-                        max_val = similarity
-                        best_y = y
+                if template_gray.shape[1] != search_gray.shape[1]:
+                    best_y, max_val = -1, 0.0
+                else:
+                    # Slide template down search region
+                    best_y, max_val = self._best_strip_match(
+                        template_gray,
+                        search_gray,
+                        range(0, actual_search_height - template_height, 5),
+                        search_rows=self._gray_rows(img2)[:actual_search_height],
+                    )
 
-                offset_y = best_y
+                offset_y = max(best_y, 0)
 
             # Quality check
             if max_val < self.match_threshold:
@@ -464,8 +578,9 @@ class OverlapDetector:
                 return (new_content_start, fixed_footer)
 
             # Convert images to numpy for fast comparison
-            arr1 = np.array(img1.convert("RGB"))
-            arr2 = np.array(img2.convert("RGB"))
+            arr1 = self._rgb(img1)
+            arr2 = self._rgb(img2)
+            arr2_rows = self._rgb_rows(img2)
 
             strip_height = 60  # Strip height for matching
             scrollable_start = fixed_header
@@ -503,18 +618,12 @@ class OverlapDetector:
                     search_start = fixed_header
                     search_end = min(scrollable_end - strip_height, fixed_header + 500)
 
-                best_y = -1
-                best_score = 0
-
-                for y in range(search_start, search_end, 5):
-                    candidate = arr2[y : y + strip_height, :, :]
-                    diff = np.abs(
-                        reference_strip.astype(float) - candidate.astype(float)
-                    )
-                    similarity = 1.0 - (np.mean(diff) / 255.0)
-                    if similarity > best_score:
-                        best_score = similarity
-                        best_y = y
+                best_y, best_score = self._best_strip_match(
+                    reference_strip,
+                    arr2,
+                    range(search_start, search_end, 5),
+                    search_rows=arr2_rows,
+                )
 
                 if best_score > 0.9 and best_y > 0:
                     detected_scroll = strip_y - best_y
@@ -719,8 +828,8 @@ class OverlapDetector:
         """
         try:
             # Convert to numpy arrays
-            arr1 = np.array(img1)
-            arr2 = np.array(img2)
+            arr1 = self._raw(img1)
+            arr2 = self._raw(img2)
 
             # Ensure same size
             if arr1.shape != arr2.shape:
@@ -729,8 +838,8 @@ class OverlapDetector:
             # Convert to grayscale for comparison
             if len(arr1.shape) == 3:
                 # Use PIL for grayscale conversion (works without cv2)
-                gray1 = np.array(img1.convert("L"))
-                gray2 = np.array(img2.convert("L"))
+                gray1 = self._gray(img1)
+                gray2 = self._gray(img2)
             else:
                 gray1, gray2 = arr1, arr2
 
@@ -15,6 +15,8 @@ import re
 import logging
 from typing import List, Dict, Optional, Any
 
+from utils.keyword_matcher import get_keyword_matcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -272,8 +274,10 @@ class ActionSuggester:
         # Check for class match
         class_match = element_class in pattern.get("classes", [])
 
-        # Check for keywords
-        keyword_match = any(kw in searchable for kw in pattern.get("keywords", []))
+        # Check for keywords (one precompiled alternation per pattern)
+        keyword_match = get_keyword_matcher(
+            tuple(pattern.get("keywords", []))
+        ).contains(searchable)
 
         # Calculate confidence based on matches
         is_button_class = "Button" in element_class  # More flexible check
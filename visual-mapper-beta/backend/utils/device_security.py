@@ -6,7 +6,7 @@ Handles lock screen configuration and encrypted passcode storage for Android dev
 Security Features:
 - Per-device encryption keys derived from stable_device_id
 - PBKDF2 (100,000 iterations) + Fernet cipher
-- Keys never stored on disk (regenerated from device ID each time)
+- Keys never stored on disk (derived from device ID, cached in memory per process)
 - Passcodes encrypted at rest in JSON files
 - File permissions: 600 (owner read/write only)
 
@@ -17,12 +17,15 @@ Lock Strategies:
 4. MANUAL_ONLY - User unlocks manually (most secure)
 """
 
+import asyncio
+import base64
 import json
 import logging
 import os
+import threading
 from enum import Enum
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
@@ -30,6 +33,14 @@ from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
 logger = logging.getLogger(__name__)
 
+# Process-wide caches shared by every DeviceSecurityManager instance
+# (several components create their own manager for the same data dir).
+# - Fernet ciphers: PBKDF2 with 100k iterations costs tens of ms per derivation
+# - Raw config files: keyed by path, validated against (mtime_ns, size)
+_cache_lock = threading.Lock()
+_fernet_cache: Dict[Tuple[bytes, str], Fernet] = {}
+_config_cache: Dict[Path, Tuple[Tuple[int, int], Dict]] = {}
+
 
 class LockStrategy(str, Enum):
     """Lock screen strategies for device security"""
@@ -88,18 +99,72 @@ class DeviceSecurityManager:
         """
         Get Fernet cipher for device.
 
+        The key derivation runs once per device per process; later calls
+        return the cached cipher.
+
         Args:
             device_id: Device identifier
 
         Returns:
             Fernet cipher instance
         """
+        cache_key = (self.salt, device_id)
+        fernet = _fernet_cache.get(cache_key)
+        if fernet is not None:
+            return fernet
+
         key = self._derive_encryption_key(device_id)
         # Fernet requires base64-encoded key
-        import base64
-
         b64_key = base64.urlsafe_b64encode(key)
-        return Fernet(b64_key)
+        fernet = Fernet(b64_key)
+        with _cache_lock:
+            _fernet_cache[cache_key] = fernet
+        return fernet
+
+    async def prepare_device(self, device_id: str) -> None:
+        """
+        Derive (and cache) the device's cipher in a worker thread, so the
+        first PBKDF2 run doesn't block the event loop.
+
+        Args:
+            device_id: Device identifier
+        """
+        if (self.salt, device_id) not in _fernet_cache:
+            await asyncio.to_thread(self._get_fernet, device_id)
+
+    def _read_config(self, device_id: str) -> Optional[Dict]:
+        """
+        Read the raw config file for a device, re-parsing only when it changed.
+
+        Args:
+            device_id: Device identifier
+
+        Returns:
+            Raw config dict (including encrypted passcode), or None if missing
+        """
+        config_path = self._get_config_path(device_id)
+        try:
+            stat = config_path.stat()
+        except FileNotFoundError:
+            with _cache_lock:
+                _config_cache.pop(config_path, None)
+            return None
+
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = _config_cache.get(config_path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        with open(config_path, "r") as f:
+            config = json.load(f)
+        with _cache_lock:
+            _config_cache[config_path] = (stamp, config)
+        return config
+
+    def _invalidate_config(self, device_id: str) -> None:
+        """Drop the cached config for a device after it was written or deleted"""
+        with _cache_lock:
+            _config_cache.pop(self._get_config_path(device_id), None)
 
     def encrypt_passcode(self, device_id: str, passcode: str) -> str:
         """
@@ -200,6 +265,7 @@ class DeviceSecurityManager:
         # Save to JSON file
         config_path = self._get_config_path(device_id)
         try:
+            self._invalidate_config(device_id)
             with open(config_path, "w") as f:
                 json.dump(config, f, indent=2)
 
@@ -235,14 +301,10 @@ class DeviceSecurityManager:
                 - sleep_grace_period: int (seconds, default 300)
             Returns None if no config exists
         """
-        config_path = self._get_config_path(device_id)
-
-        if not config_path.exists():
-            return None
-
         try:
-            with open(config_path, "r") as f:
-                config = json.load(f)
+            config = self._read_config(device_id)
+            if config is None:
+                return None
 
             # Return sanitized config (don't expose encrypted passcode)
             return {
@@ -271,14 +333,10 @@ class DeviceSecurityManager:
             Passcode is only returned if strategy is AUTO_UNLOCK.
             Caller is responsible for clearing passcode from memory after use.
         """
-        config_path = self._get_config_path(device_id)
-
-        if not config_path.exists():
-            return None
-
         try:
-            with open(config_path, "r") as f:
-                config = json.load(f)
+            config = self._read_config(device_id)
+            if config is None:
+                return None
 
             # Only return passcode if AUTO_UNLOCK strategy
             if config.get("strategy") != LockStrategy.AUTO_UNLOCK.value:
@@ -295,6 +353,25 @@ class DeviceSecurityManager:
             logger.error(f"Failed to get passcode for {device_id}: {e}")
             return None
 
+    async def get_passcode_async(self, device_id: str) -> Optional[str]:
+        """
+        Async variant of get_passcode for use on the event loop.
+
+        Runs the first key derivation for the device in a worker thread;
+        afterwards this is a cached config lookup plus a Fernet decrypt.
+
+        Args:
+            device_id: Device identifier
+
+        Returns:
+            Decrypted passcode, or None if not available
+        """
+        config = self.get_lock_config(device_id)
+        if not config or not config.get("has_passcode"):
+            return None
+        await self.prepare_device(device_id)
+        return self.get_passcode(device_id)
+
     def delete_lock_config(self, device_id: str) -> bool:
         """
         Delete lock screen configuration for device.
@@ -311,6 +388,7 @@ class DeviceSecurityManager:
             return True
 
         try:
+            self._invalidate_config(device_id)
             config_path.unlink()
             logger.info(f"Deleted lock configuration for {device_id}")
             return True
@@ -401,6 +479,7 @@ class DeviceSecurityManager:
             if success:
                 # Delete old config
                 try:
+                    self._invalidate_config(old_device_id)
                     old_config_path.unlink()
                     logger.info(
                         f"Migrated security config from {old_device_id} to {stable_id}"
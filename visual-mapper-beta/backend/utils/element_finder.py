@@ -12,15 +12,178 @@ Detection strategies (in order of reliability):
 3. text match only
 4. class + approximate bounds match
 5. Fall back to stored bounds
+
+Lookups go through an ElementIndex built once per UI hierarchy, so resolving
+many sensors against the same dump does not rescan the element list for
+every strategy.
 """
 
 import logging
-from typing import Dict, List, Optional, Tuple
+import re
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass
 
+from .spatial_grid import SpatialGrid
+
 logger = logging.getLogger(__name__)
 
 
+def extract_element_bounds(element: Dict) -> Optional[Dict]:
+    """Extract bounds dict {x, y, width, height} from an element"""
+    bounds = element.get("bounds")
+    if not bounds:
+        return None
+
+    # Handle different bounds formats
+    if isinstance(bounds, dict):
+        return {
+            "x": bounds.get("x", bounds.get("left", 0)),
+            "y": bounds.get("y", bounds.get("top", 0)),
+            "width": bounds.get(
+                "width", bounds.get("right", 0) - bounds.get("left", 0)
+            ),
+            "height": bounds.get(
+                "height", bounds.get("bottom", 0) - bounds.get("top", 0)
+            ),
+        }
+    elif isinstance(bounds, (list, tuple)) and len(bounds) == 4:
+        # [left, top, right, bottom] format
+        return {
+            "x": bounds[0],
+            "y": bounds[1],
+            "width": bounds[2] - bounds[0],
+            "height": bounds[3] - bounds[1],
+        }
+    elif isinstance(bounds, str):
+        # Android-style "[x1,y1][x2,y2]" or "(x,y) WxH" formats
+        try:
+            if "[" in bounds and "]" in bounds:
+                nums = [int(n) for n in re.findall(r"\d+", bounds)]
+                if len(nums) >= 4:
+                    return {
+                        "x": nums[0],
+                        "y": nums[1],
+                        "width": nums[2] - nums[0],
+                        "height": nums[3] - nums[1],
+                    }
+            nums = [int(n) for n in re.findall(r"\d+", bounds)]
+            if len(nums) == 4:
+                return {
+                    "x": nums[0],
+                    "y": nums[1],
+                    "width": nums[2],
+                    "height": nums[3],
+                }
+        except Exception:
+            return None
+
+    return None
+
+
+def _add(table: Dict[str, List[int]], key, index: int):
+    bucket = table.get(key)
+    if bucket is None:
+        table[key] = [index]
+    else:
+        bucket.append(index)
+
+
+class ElementIndex:
+    """
+    Lookup tables over one parsed UI hierarchy.
+
+    Exact-match maps by resource_id, text, class, content-desc and path are
+    built in a single pass. Bounds and the proximity grid are built lazily on
+    first use. All lookups return element positions in hierarchy order so
+    "first match" semantics are the same as a linear scan.
+    """
+
+    def __init__(self, elements: Sequence[Dict]):
+        self.elements = elements
+        self.by_resource_id: Dict[str, List[int]] = {}
+        self.by_text: Dict[str, List[int]] = {}
+        self.by_text_lower: Dict[str, List[int]] = {}
+        self.by_class: Dict[str, List[int]] = {}
+        self.by_content_desc_lower: Dict[str, List[int]] = {}
+        self.by_path: Dict[str, int] = {}
+        # Lower-cased fields for substring queries (ADBHelpers partial matching)
+        self.text_lower: List[str] = []
+        self.content_desc_lower: List[str] = []
+        self.resource_ids: List[str] = []
+
+        for i, elem in enumerate(elements):
+            text = elem.get("text", "")
+            # Hierarchy parsers emit resource_id; raw uiautomator attrs use resource-id
+            resource_id = elem.get("resource_id") or elem.get("resource-id") or ""
+            desc = elem.get("content_desc") or elem.get("content-desc") or ""
+            text_lower = (text or "").lower()
+            desc_lower = desc.lower()
+
+            _add(self.by_text, text, i)
+            _add(self.by_text_lower, text_lower.strip(), i)
+            _add(self.by_class, elem.get("class", ""), i)
+            if resource_id:
+                _add(self.by_resource_id, resource_id, i)
+            if desc_lower:
+                _add(self.by_content_desc_lower, desc_lower.strip(), i)
+            path = elem.get("path")
+            if path is not None and path not in self.by_path:
+                self.by_path[path] = i
+
+            self.text_lower.append(text_lower)
+            self.content_desc_lower.append(desc_lower)
+            self.resource_ids.append(resource_id)
+
+        self._bounds: Optional[List[Optional[Tuple[int, int, int, int]]]] = None
+        self._grid: Optional[SpatialGrid] = None
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+    def bounds(self, i: int) -> Optional[Dict]:
+        """Bounds of element i as a fresh {x, y, width, height} dict"""
+        if self._bounds is None:
+            self._build_bounds()
+        b = self._bounds[i]
+        if b is None:
+            return None
+        return {"x": b[0], "y": b[1], "width": b[2], "height": b[3]}
+
+    def _build_bounds(self):
+        self._bounds = []
+        for elem in self.elements:
+            b = extract_element_bounds(elem)
+            self._bounds.append(
+                (b["x"], b["y"], b["width"], b["height"]) if b else None
+            )
+
+    def near_origin(self, x: float, y: float, radius: float) -> List[int]:
+        """
+        Candidates whose top-left corner lies within the square of side
+        2 * radius around (x, y). Callers apply the exact distance check.
+        """
+        if self._grid is None:
+            if self._bounds is None:
+                self._build_bounds()
+            self._grid = SpatialGrid(cell_size=128)
+            for i, b in enumerate(self._bounds):
+                if b is not None:
+                    self._grid.insert(i, b[0], b[1], b[0], b[1])
+        return self._grid.query(x - radius, y - radius, x + radius, y + radius)
+
+
+def get_element_index(elements: Union[Sequence[Dict], ElementIndex]) -> ElementIndex:
+    """
+    Index for a UI element list (an ElementIndex is returned as is).
+
+    Callers that run several lookups against one dump should build the
+    ElementIndex once and pass it instead of the list.
+    """
+    if isinstance(elements, ElementIndex):
+        return elements
+    return ElementIndex(elements)
+
+
 @dataclass
 class ElementMatch:
     """Result of smart element detection"""
@@ -52,7 +215,7 @@ class SmartElementFinder:
 
     def find_element(
         self,
-        ui_elements: List[Dict],
+        ui_elements: Union[List[Dict], ElementIndex],
         resource_id: Optional[str] = None,
         element_text: Optional[str] = None,
         element_class: Optional[str] = None,
@@ -64,7 +227,7 @@ class SmartElementFinder:
         Find element using multiple strategies.
 
         Args:
-            ui_elements: List of current UI elements from screen
+            ui_elements: List of current UI elements from screen (or its ElementIndex)
             resource_id: Android resource ID (e.g., 'com.app:id/temp')
             element_text: Expected text content
             element_class: Android class (e.g., 'android.widget.TextView')
@@ -76,16 +239,18 @@ class SmartElementFinder:
         if not ui_elements:
             return ElementMatch(found=False, message="No UI elements available")
 
+        index = get_element_index(ui_elements)
+
         # Strategy 0: Match by hierarchy path (most reliable when available)
         if element_path:
-            match = self._find_by_path(ui_elements, element_path)
+            match = self._find_by_path(index, element_path)
             if match.found:
                 return match
 
         # Strategy 1: Match by resource_id (most reliable)
         if resource_id:
             match = self._find_by_resource_id(
-                ui_elements, resource_id, stored_bounds, parent_path
+                index, resource_id, stored_bounds, parent_path
             )
             if match.found:
                 return match
@@ -93,24 +258,20 @@ class SmartElementFinder:
         # Strategy 2: Match by text + class
         if element_text and element_class:
             match = self._find_by_text_and_class(
-                ui_elements, element_text, element_class, stored_bounds, parent_path
+                index, element_text, element_class, stored_bounds, parent_path
             )
             if match.found:
                 return match
 
         # Strategy 3: Match by text only
         if element_text:
-            match = self._find_by_text(
-                ui_elements, element_text, stored_bounds, parent_path
-            )
+            match = self._find_by_text(index, element_text, stored_bounds, parent_path)
             if match.found:
                 return match
 
         # Strategy 4: Match by class + approximate bounds
         if element_class and stored_bounds:
-            match = self._find_by_class_and_bounds(
-                ui_elements, element_class, stored_bounds
-            )
+            match = self._find_by_class_and_bounds(index, element_class, stored_bounds)
             if match.found:
                 return match
 
@@ -128,31 +289,36 @@ class SmartElementFinder:
             found=False, message="Could not locate element with any strategy"
         )
 
+    def _collect(
+        self,
+        index: ElementIndex,
+        positions: List[int],
+        parent_path: Optional[str] = None,
+    ) -> List[Tuple[Dict, Optional[Dict]]]:
+        """Resolve indexed positions to (element, bounds), preferring parent_path matches"""
+        if parent_path:
+            parent_positions = [
+                i
+                for i in positions
+                if index.elements[i].get("parent_path") == parent_path
+            ]
+            if parent_positions:
+                positions = parent_positions
+        return [(index.elements[i], index.bounds(i)) for i in positions]
+
     def _find_by_resource_id(
         self,
-        ui_elements: List[Dict],
+        index: ElementIndex,
         resource_id: str,
         stored_bounds: Optional[Dict] = None,
         parent_path: Optional[str] = None,
     ) -> ElementMatch:
         """Find element by exact resource_id match (prefer closest to stored bounds if ambiguous)"""
-        matches = []
-        for elem in ui_elements:
-            if elem.get("resource_id") == resource_id:
-                bounds = self._extract_bounds(elem)
-                matches.append((elem, bounds))
-
-        if not matches:
+        positions = index.by_resource_id.get(resource_id)
+        if not positions:
             return ElementMatch(found=False)
 
-        if parent_path:
-            parent_matches = [
-                (elem, bounds)
-                for elem, bounds in matches
-                if elem.get("parent_path") == parent_path
-            ]
-            if parent_matches:
-                matches = parent_matches
+        matches = self._collect(index, positions, parent_path)
 
         if len(matches) == 1 or not stored_bounds:
             elem, bounds = matches[0]
@@ -183,33 +349,22 @@ class SmartElementFinder:
 
     def _find_by_text_and_class(
         self,
-        ui_elements: List[Dict],
+        index: ElementIndex,
         text: str,
         element_class: str,
         stored_bounds: Optional[Dict] = None,
         parent_path: Optional[str] = None,
     ) -> ElementMatch:
         """Find element by text content and class name (prefer closest to stored bounds if ambiguous)"""
-        matches = []
-        for elem in ui_elements:
-            elem_text = elem.get("text", "")
-            elem_class_value = elem.get("class", "")
-
-            if elem_text == text and elem_class_value == element_class:
-                bounds = self._extract_bounds(elem)
-                matches.append((elem, bounds))
-
-        if not matches:
+        positions = [
+            i
+            for i in index.by_text.get(text, ())
+            if index.elements[i].get("class", "") == element_class
+        ]
+        if not positions:
             return ElementMatch(found=False)
 
-        if parent_path:
-            parent_matches = [
-                (elem, bounds)
-                for elem, bounds in matches
-                if elem.get("parent_path") == parent_path
-            ]
-            if parent_matches:
-                matches = parent_matches
+        matches = self._collect(index, positions, parent_path)
 
         if len(matches) == 1 or not stored_bounds:
             elem, bounds = matches[0]
@@ -244,30 +399,17 @@ class SmartElementFinder:
 
     def _find_by_text(
         self,
-        ui_elements: List[Dict],
+        index: ElementIndex,
         text: str,
         stored_bounds: Optional[Dict] = None,
         parent_path: Optional[str] = None,
     ) -> ElementMatch:
         """Find element by text content only (prefer closest to stored bounds if ambiguous)"""
-        matches = []
-        for elem in ui_elements:
-            elem_text = elem.get("text", "")
-            if elem_text == text:
-                bounds = self._extract_bounds(elem)
-                matches.append((elem, bounds))
-
-        if not matches:
+        positions = index.by_text.get(text)
+        if not positions:
             return ElementMatch(found=False)
 
-        if parent_path:
-            parent_matches = [
-                (elem, bounds)
-                for elem, bounds in matches
-                if elem.get("parent_path") == parent_path
-            ]
-            if parent_matches:
-                matches = parent_matches
+        matches = self._collect(index, positions, parent_path)
 
         if len(matches) == 1 or not stored_bounds:
             elem, bounds = matches[0]
@@ -320,7 +462,7 @@ class SmartElementFinder:
         return ((x1 - x2) ** 2 + (y1 - y2) ** 2) ** 0.5
 
     def _find_by_class_and_bounds(
-        self, ui_elements: List[Dict], element_class: str, stored_bounds: Dict
+        self, index: ElementIndex, element_class: str, stored_bounds: Dict
     ) -> ElementMatch:
         """Find element by class and approximate bounds location"""
         stored_x = stored_bounds.get("x", 0)
@@ -329,11 +471,13 @@ class SmartElementFinder:
         best_match = None
         best_distance = float("inf")
 
-        for elem in ui_elements:
+        # Only elements whose origin falls near the stored origin can qualify
+        for i in index.near_origin(stored_x, stored_y, self.BOUNDS_TOLERANCE):
+            elem = index.elements[i]
             if elem.get("class") != element_class:
                 continue
 
-            bounds = self._extract_bounds(elem)
+            bounds = index.bounds(i)
             if not bounds:
                 continue
 
@@ -362,74 +506,25 @@ class SmartElementFinder:
 
         return ElementMatch(found=False)
 
-    def _find_by_path(self, ui_elements: List[Dict], element_path: str) -> ElementMatch:
+    def _find_by_path(self, index: ElementIndex, element_path: str) -> ElementMatch:
         """Find element by exact hierarchy path"""
-        for elem in ui_elements:
-            if elem.get("path") == element_path:
-                bounds = self._extract_bounds(elem)
-                logger.debug(f"[ElementFinder] Found by path: {element_path}")
-                return ElementMatch(
-                    found=True,
-                    element=elem,
-                    bounds=bounds,
-                    confidence=self.CONFIDENCE_PATH,
-                    method="path",
-                    message=f"Matched hierarchy path: {element_path}",
-                )
-        return ElementMatch(found=False)
+        i = index.by_path.get(element_path)
+        if i is None:
+            return ElementMatch(found=False)
+
+        logger.debug(f"[ElementFinder] Found by path: {element_path}")
+        return ElementMatch(
+            found=True,
+            element=index.elements[i],
+            bounds=index.bounds(i),
+            confidence=self.CONFIDENCE_PATH,
+            method="path",
+            message=f"Matched hierarchy path: {element_path}",
+        )
 
     def _extract_bounds(self, element: Dict) -> Optional[Dict]:
         """Extract bounds dict from element"""
-        bounds = element.get("bounds")
-        if not bounds:
-            return None
-
-        # Handle different bounds formats
-        if isinstance(bounds, dict):
-            return {
-                "x": bounds.get("x", bounds.get("left", 0)),
-                "y": bounds.get("y", bounds.get("top", 0)),
-                "width": bounds.get(
-                    "width", bounds.get("right", 0) - bounds.get("left", 0)
-                ),
-                "height": bounds.get(
-                    "height", bounds.get("bottom", 0) - bounds.get("top", 0)
-                ),
-            }
-        elif isinstance(bounds, (list, tuple)) and len(bounds) == 4:
-            # [left, top, right, bottom] format
-            return {
-                "x": bounds[0],
-                "y": bounds[1],
-                "width": bounds[2] - bounds[0],
-                "height": bounds[3] - bounds[1],
-            }
-        elif isinstance(bounds, str):
-            # Android-style "[x1,y1][x2,y2]" or "(x,y) WxH" formats
-            try:
-                import re
-
-                if "[" in bounds and "]" in bounds:
-                    nums = [int(n) for n in re.findall(r"\d+", bounds)]
-                    if len(nums) >= 4:
-                        return {
-                            "x": nums[0],
-                            "y": nums[1],
-                            "width": nums[2] - nums[0],
-                            "height": nums[3] - nums[1],
-                        }
-                nums = [int(n) for n in re.findall(r"\d+", bounds)]
-                if len(nums) == 4:
-                    return {
-                        "x": nums[0],
-                        "y": nums[1],
-                        "width": nums[2],
-                        "height": nums[3],
-                    }
-            except Exception:
-                return None
-
-        return None
+        return extract_element_bounds(element)
 
     def compare_bounds(self, bounds1: Dict, bounds2: Dict) -> Tuple[bool, float]:
         """
@@ -0,0 +1,199 @@
+"""
+Icon Index - In-memory index of cached app icon files
+
+The app icon endpoint is hit 100+ times at once when an app drawer renders.
+Instead of stat/glob calls per request, the cached icon directories are
+scanned once at startup into package -> file maps, kept current by the
+fetchers when they write or clear icons, and icon bytes are served from a
+small LRU together with a strong (content hash) ETag.
+
+Sources are ordered by quality: Play Store first, then APK extraction.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SOURCE_PLAYSTORE = "playstore"
+SOURCE_APK = "apk-extraction"
+SOURCE_ORDER = (SOURCE_PLAYSTORE, SOURCE_APK)
+
+# APK cache files are "{package}_{md5(package)}.png"
+_APK_SUFFIX_LENGTH = 32 + len(".png") + 1
+
+
+def compute_etag(data: bytes) -> str:
+    """Strong ETag for a response body"""
+    return f'"{hashlib.blake2b(data, digest_size=12).hexdigest()}"'
+
+
+def sniff_image_type(data: bytes) -> str:
+    """Media type from magic bytes (cached .png files may hold WebP/JPEG)"""
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    return "image/png"
+
+
+@dataclass(frozen=True)
+class IconEntry:
+    """A loaded icon ready to serve"""
+
+    package: str
+    source: str
+    path: Path
+    data: bytes
+    etag: str
+    media_type: str
+    mtime_ns: int
+
+
+class IconIndex:
+    """
+    package -> cached icon file, per source, plus an LRU of loaded icons
+
+    Thread-safe: fetchers record icons from worker threads while the event
+    loop looks them up.
+    """
+
+    def __init__(self, max_cached_bytes: int = 16 * 1024 * 1024):
+        self.max_cached_bytes = max_cached_bytes
+        self._paths: Dict[str, Dict[str, Path]] = {s: {} for s in SOURCE_ORDER}
+        self._loaded: "OrderedDict[Tuple[str, str], IconEntry]" = OrderedDict()
+        self._loaded_bytes = 0
+        self._lock = threading.Lock()
+
+    def build(self, playstore_dir: Path, apk_dir: Path):
+        """Scan the icon cache directories (once, at startup)"""
+        playstore: Dict[str, Path] = {}
+        apk: Dict[str, Path] = {}
+
+        for directory, target, parse in (
+            (Path(playstore_dir), playstore, lambda name: name[: -len(".png")]),
+            (Path(apk_dir), apk, lambda name: name[:-_APK_SUFFIX_LENGTH]),
+        ):
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(".png") and entry.is_file():
+                            package = parse(entry.name)
+                            if package:
+                                target[package] = Path(entry.path)
+            except FileNotFoundError:
+                continue
+
+        with self._lock:
+            self._paths[SOURCE_PLAYSTORE] = playstore
+            self._paths[SOURCE_APK] = apk
+            self._loaded.clear()
+            self._loaded_bytes = 0
+
+        logger.info(
+            f"[IconIndex] Indexed {len(playstore)} Play Store and {len(apk)} APK icons"
+        )
+
+    def record(self, source: str, package: str, path: Path):
+        """Register (or refresh) an icon file a fetcher just wrote"""
+        with self._lock:
+            self._paths.setdefault(source, {})[package] = Path(path)
+            self._evict((source, package))
+
+    def discard(self, source: str, package: Optional[str] = None):
+        """Forget one package's icon for a source, or all icons of the source"""
+        with self._lock:
+            if package is None:
+                self._paths[source] = {}
+                for key in [k for k in self._loaded if k[0] == source]:
+                    self._evict(key)
+            else:
+                self._paths.get(source, {}).pop(package, None)
+                self._evict((source, package))
+
+    def has_icon(self, package: str) -> bool:
+        with self._lock:
+            return any(package in self._paths.get(s, {}) for s in SOURCE_ORDER)
+
+    def get_cached(self, package: str) -> Optional[IconEntry]:
+        """Best already-loaded icon (no I/O); None if it must be loaded"""
+        with self._lock:
+            for source in SOURCE_ORDER:
+                if package not in self._paths.get(source, {}):
+                    continue
+                entry = self._loaded.get((source, package))
+                if entry is None:
+                    return None
+                self._loaded.move_to_end((source, package))
+                return entry
+        return None
+
+    def load(self, package: str) -> Optional[IconEntry]:
+        """Best icon for a package, reading the file if needed (blocking)"""
+        for source in SOURCE_ORDER:
+            with self._lock:
+                path = self._paths.get(source, {}).get(package)
+                entry = self._loaded.get((source, package))
+            if path is None:
+                continue
+            if entry is not None:
+                return entry
+
+            try:
+                mtime_ns = path.stat().st_mtime_ns
+                data = path.read_bytes()
+            except OSError:
+                # Deleted behind our back - drop it and try the next source
+                self.discard(source, package)
+                continue
+
+            entry = IconEntry(
+                package=package,
+                source=source,
+                path=path,
+                data=data,
+                etag=compute_etag(data),
+                media_type=sniff_image_type(data),
+                mtime_ns=mtime_ns,
+            )
+            with self._lock:
+                if self._paths.get(source, {}).get(package) == path:
+                    self._evict((source, package))
+                    self._loaded[(source, package)] = entry
+                    self._loaded_bytes += len(data)
+                    while self._loaded_bytes > self.max_cached_bytes and self._loaded:
+                        _, old = self._loaded.popitem(last=False)
+                        self._loaded_bytes -= len(old.data)
+            return entry
+        return None
+
+    def _evict(self, key: Tuple[str, str]):
+        entry = self._loaded.pop(key, None)
+        if entry is not None:
+            self._loaded_bytes -= len(entry.data)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "indexed": {s: len(p) for s, p in self._paths.items()},
+                "loaded_icons": len(self._loaded),
+                "loaded_bytes": self._loaded_bytes,
+            }
+
+
+# Singleton instance
+_icon_index = None
+
+
+def get_icon_index() -> IconIndex:
+    """Get global icon index instance"""
+    global _icon_index
+    if _icon_index is None:
+        _icon_index = IconIndex()
+    return _icon_index
@@ -0,0 +1,73 @@
+"""
+Keyword Matcher - Precompiled keyword lookup with a cheap fuzzy fallback
+
+Suggesters test every element against dozens of keyword lists. A
+KeywordMatcher compiles each list once into a single regex alternation for
+the exact substring check, and only falls back to difflib ratios for word
+pairs whose lengths make a match possible at all.
+"""
+
+import logging
+import re
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=65536)
+def _fuzzy_ratio_ok(keyword: str, word: str, threshold: float) -> bool:
+    """SequenceMatcher(None, keyword, word).ratio() >= threshold, cheapest checks first."""
+    # ratio = 2*M / (len(a) + len(b)) and M <= min(len(a), len(b))
+    shortest = min(len(keyword), len(word))
+    if 2.0 * shortest / (len(keyword) + len(word)) < threshold:
+        return False
+    matcher = SequenceMatcher(None, keyword, word)
+    if matcher.quick_ratio() < threshold:
+        return False
+    return matcher.ratio() >= threshold
+
+
+class KeywordMatcher:
+    """Matches text against a fixed keyword list (exact substring or fuzzy word)."""
+
+    def __init__(self, keywords: Iterable[str], min_fuzzy_length: int = 3):
+        self.keywords: Tuple[str, ...] = tuple(keywords)
+        # Longest first so the alternation prefers the most specific keyword
+        ordered = sorted(set(self.keywords), key=len, reverse=True)
+        self._pattern: Optional[re.Pattern] = (
+            re.compile("|".join(re.escape(k) for k in ordered)) if ordered else None
+        )
+        self._fuzzy_keywords = tuple(
+            k for k in self.keywords if len(k) >= min_fuzzy_length
+        )
+        self._min_fuzzy_length = min_fuzzy_length
+
+    def contains(self, text_lower: str) -> bool:
+        """True if any keyword is a substring of text_lower."""
+        return bool(self._pattern and self._pattern.search(text_lower))
+
+    def matches(
+        self, text_lower: str, threshold: float = 0.8, source: str = "KeywordMatcher"
+    ) -> bool:
+        """True if any keyword is a substring of, or fuzzy-matches a word of, text_lower."""
+        if self.contains(text_lower):
+            return True
+
+        for word in text_lower.split():
+            # Skip very short words for fuzzy matching
+            if len(word) < self._min_fuzzy_length:
+                continue
+            for keyword in self._fuzzy_keywords:
+                if _fuzzy_ratio_ok(keyword, word, threshold):
+                    logger.debug(f"[{source}] Fuzzy match: '{keyword}' ~ '{word}'")
+                    return True
+
+        return False
+
+
+@lru_cache(maxsize=256)
+def get_keyword_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    """Shared matcher for a keyword tuple (pattern tables are static)."""
+    return KeywordMatcher(keywords)
@@ -0,0 +1,142 @@
+"""
+Remote File - Seekable read-only file over ranged reads
+
+Lets zipfile (or anything expecting a file object) work on a file that lives
+on a device without copying it first. Reads are served from aligned blocks
+fetched through a caller-supplied fetch(offset, length) function, with a
+small read-ahead and an LRU of recent blocks, so opening an APK and reading
+one entry only transfers the end-of-central-directory, the central directory
+and that entry.
+"""
+
+import io
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+# fetch(offset, length) -> bytes; may return fewer bytes only at end of file
+RangeFetcher = Callable[[int, int], bytes]
+
+
+class RemoteRangeFile(io.RawIOBase):
+    """Read-only, seekable file backed by ranged fetches"""
+
+    def __init__(
+        self,
+        fetch: RangeFetcher,
+        size: int,
+        block_size: int = 64 * 1024,
+        read_ahead_blocks: int = 1,
+        max_cached_blocks: int = 64,
+    ):
+        """
+        Args:
+            fetch: Function returning `length` bytes starting at `offset`
+            size: Total file size in bytes
+            block_size: Fetch granularity (offsets are aligned to it)
+            read_ahead_blocks: Extra blocks fetched after each miss
+            max_cached_blocks: Blocks kept for re-reads (LRU)
+        """
+        super().__init__()
+        self._fetch = fetch
+        self.size = size
+        self.block_size = block_size
+        self.read_ahead_blocks = read_ahead_blocks
+        self.max_cached_blocks = max_cached_blocks
+
+        self._pos = 0
+        self._blocks: "OrderedDict[int, bytes]" = OrderedDict()
+        self._last_block = max(0, (size - 1) // block_size)
+
+        # Transfer accounting
+        self.bytes_fetched = 0
+        self.fetch_count = 0
+
+        # First fetch failure, kept because zipfile callers may swallow it
+        self.fetch_error: Optional[Exception] = None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise OSError(f"Negative seek position {pos}")
+        self._pos = pos
+        return pos
+
+    def readinto(self, buffer) -> int:
+        count = min(len(buffer), self.size - self._pos)
+        if count <= 0:
+            return 0
+
+        size = self.block_size
+        first = self._pos // size
+        last = (self._pos + count - 1) // size
+        blocks = self._load(first, last)
+
+        view = memoryview(buffer)
+        written = 0
+        pos = self._pos
+        for block in range(first, last + 1):
+            data = blocks.get(block, b"")
+            start = pos - block * size
+            chunk = data[start : start + count - written]
+            if not chunk:
+                self.fetch_error = OSError(f"Short read at offset {pos} of {self.size}")
+                raise self.fetch_error
+            view[written : written + len(chunk)] = chunk
+            written += len(chunk)
+            pos += len(chunk)
+
+        self._pos = pos
+        return written
+
+    def _load(self, first: int, last: int) -> Dict[int, bytes]:
+        """
+        Return blocks [first, last], fetching the missing ones (plus
+        read-ahead) in one call. Blocks past a short read are absent.
+        """
+        missing = [b for b in range(first, last + 1) if b not in self._blocks]
+        if missing:
+            start = missing[0]
+            end = min(max(missing[-1], last) + self.read_ahead_blocks, self._last_block)
+            size = self.block_size
+            try:
+                data = self._fetch(start * size, (end - start + 1) * size)
+            except Exception as e:
+                self.fetch_error = e
+                raise
+            self.bytes_fetched += len(data)
+            self.fetch_count += 1
+
+            for block in range(start, end + 1):
+                chunk = data[(block - start) * size : (block - start + 1) * size]
+                if not chunk:
+                    break
+                self._blocks[block] = chunk
+
+        # Collect before trimming so the LRU can't evict a block being read
+        blocks: Dict[int, bytes] = {}
+        for block in range(first, last + 1):
+            data = self._blocks.get(block)
+            if data is None:
+                break
+            blocks[block] = data
+            self._blocks.move_to_end(block)
+
+        while len(self._blocks) > self.max_cached_blocks:
+            self._blocks.popitem(last=False)
+        return blocks
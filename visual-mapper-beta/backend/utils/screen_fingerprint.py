@@ -0,0 +1,214 @@
+"""
+Screen Fingerprints - Compact perceptual signatures for screen-state checks
+
+A fingerprint summarises a screenshot as:
+- dHash: 64-bit gradient hash of a 9x8 grayscale reduction
+- pHash: 64-bit DCT hash of a 32x32 grayscale reduction
+- thumbnail: 16x16 grayscale pixels for a tie-breaking pixel comparison
+
+Fingerprints are computed once per expected screen (when flows are saved or
+screens are learned) and once per live frame, after which comparisons are a
+couple of XOR/popcounts instead of decoding and histogramming full images.
+"""
+
+import base64
+import io
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+THUMB_SIZE = 16
+_PHASH_SIZE = 32
+
+# Orthonormal DCT-II basis for the pHash reduction (computed once)
+_DCT = np.array(
+    [
+        [
+            np.cos(np.pi * (2 * n + 1) * k / (2 * _PHASH_SIZE))
+            for n in range(_PHASH_SIZE)
+        ]
+        for k in range(_PHASH_SIZE)
+    ],
+    dtype=np.float64,
+)
+_DCT[0] *= 1 / np.sqrt(2)
+_DCT *= np.sqrt(2 / _PHASH_SIZE)
+
+# Popcount lookup for vectorised Hamming distances
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _bits_to_int(bits: np.ndarray) -> int:
+    value = 0
+    for bit in bits.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+
+@dataclass(frozen=True)
+class ScreenFingerprint:
+    """Perceptual fingerprint of one screen."""
+
+    dhash: int
+    phash: int
+    thumbnail: bytes  # THUMB_SIZE x THUMB_SIZE grayscale pixels
+
+    def hamming(self, other: "ScreenFingerprint") -> int:
+        """Combined dHash + pHash Hamming distance (0-128)."""
+        return (self.dhash ^ other.dhash).bit_count() + (
+            self.phash ^ other.phash
+        ).bit_count()
+
+    def similarity(self, other: "ScreenFingerprint") -> float:
+        """
+        Similarity score (0.0-1.0) blending hash agreement with the mean
+        absolute difference of the thumbnails.
+        """
+        hash_score = 1.0 - self.hamming(other) / (2 * HASH_BITS)
+        thumb_a = np.frombuffer(self.thumbnail, dtype=np.uint8).astype(np.int16)
+        thumb_b = np.frombuffer(other.thumbnail, dtype=np.uint8).astype(np.int16)
+        if thumb_a.shape != thumb_b.shape:
+            return hash_score
+        thumb_score = 1.0 - float(np.mean(np.abs(thumb_a - thumb_b))) / 255.0
+        return (hash_score + thumb_score) / 2.0
+
+    def to_string(self) -> str:
+        """Serialize as 'dhash:phash:thumbnail' for storage in JSON models."""
+        thumb = base64.b64encode(self.thumbnail).decode("ascii")
+        return f"{self.dhash:016x}:{self.phash:016x}:{thumb}"
+
+    @classmethod
+    def from_string(cls, value: str) -> "ScreenFingerprint":
+        dhash, phash, thumb = value.split(":", 2)
+        return cls(int(dhash, 16), int(phash, 16), base64.b64decode(thumb))
+
+
+def compute_fingerprint(
+    image: Union[Image.Image, bytes, bytearray, str],
+) -> ScreenFingerprint:
+    """
+    Compute the fingerprint of a screenshot.
+
+    Args:
+        image: PIL image, encoded image bytes, or base64 encoded image
+
+    Returns:
+        ScreenFingerprint
+    """
+    if isinstance(image, str):
+        image = base64.b64decode(image)
+    if isinstance(image, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(image))
+
+    # One grayscale reduction feeds all three signatures
+    gray = image.convert("L")
+    if gray.size[0] > 4 * _PHASH_SIZE:
+        gray = gray.reduce(max(1, gray.size[0] // (4 * _PHASH_SIZE)))
+    small = gray.resize((_PHASH_SIZE, _PHASH_SIZE), Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.float64)
+
+    # dHash: is each pixel brighter than its right-hand neighbour?
+    dhash_src = np.asarray(small.resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    dhash = _bits_to_int(dhash_src[:, 1:] > dhash_src[:, :-1])
+
+    # pHash: low-frequency DCT coefficients above their median (DC excluded)
+    dct = _DCT @ pixels @ _DCT.T
+    low = dct[:8, :8].flatten()[1:]
+    phash = _bits_to_int(np.concatenate([[False], low > np.median(low)]))
+
+    thumbnail = small.resize((THUMB_SIZE, THUMB_SIZE), Image.BILINEAR).tobytes()
+    return ScreenFingerprint(dhash=dhash, phash=phash, thumbnail=thumbnail)
+
+
+def fingerprint_to_string(image: Union[Image.Image, bytes, str]) -> Optional[str]:
+    """Compute and serialize a fingerprint, returning None if decoding fails."""
+    try:
+        return compute_fingerprint(image).to_string()
+    except Exception as e:
+        logger.debug(f"[ScreenFingerprint] Could not fingerprint image: {e}")
+        return None
+
+
+class FingerprintIndex:
+    """
+    Nearest-neighbour index of screen fingerprints by Hamming distance.
+
+    Hashes are kept in uint64 arrays so a lookup is a vectorised XOR and
+    popcount over every known screen.
+    """
+
+    def __init__(self):
+        self._fingerprints: Dict[str, ScreenFingerprint] = {}
+        self._keys: List[str] = []
+        self._dhashes = np.zeros(0, dtype=np.uint64)
+        self._phashes = np.zeros(0, dtype=np.uint64)
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def add(self, key: str, fingerprint: ScreenFingerprint):
+        self._fingerprints[key] = fingerprint
+        self._dirty = True
+
+    def remove(self, key: str):
+        if self._fingerprints.pop(key, None) is not None:
+            self._dirty = True
+
+    def get(self, key: str) -> Optional[ScreenFingerprint]:
+        return self._fingerprints.get(key)
+
+    def _rebuild(self):
+        self._keys = list(self._fingerprints)
+        self._dhashes = np.array(
+            [self._fingerprints[k].dhash for k in self._keys], dtype=np.uint64
+        )
+        self._phashes = np.array(
+            [self._fingerprints[k].phash for k in self._keys], dtype=np.uint64
+        )
+        self._dirty = False
+
+    def nearest(
+        self,
+        fingerprint: ScreenFingerprint,
+        k: int = 1,
+        max_distance: Optional[int] = None,
+    ) -> List[Tuple[str, int, float]]:
+        """
+        Find the k closest known screens.
+
+        Args:
+            fingerprint: Fingerprint of the live frame
+            k: Number of neighbours to return
+            max_distance: Optional combined Hamming distance cut-off (0-128)
+
+        Returns:
+            List of (key, hamming_distance, similarity), closest first
+        """
+        if self._dirty:
+            self._rebuild()
+        if not self._keys:
+            return []
+
+        xor_d = self._dhashes ^ np.uint64(fingerprint.dhash)
+        xor_p = self._phashes ^ np.uint64(fingerprint.phash)
+        distances = _POPCOUNT[xor_d.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+        distances += _POPCOUNT[xor_p.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+        order = np.argsort(distances, kind="stable")[:k]
+        results = []
+        for idx in order:
+            distance = int(distances[idx])
+            if max_distance is not None and distance > max_distance:
+                break
+            key = self._keys[idx]
+            results.append(
+                (key, distance, fingerprint.similarity(self._fingerprints[key]))
+            )
+        return results
@@ -13,7 +13,9 @@ import re
 import logging
 from typing import List, Dict, Optional, Any
 from datetime import datetime
-from difflib import SequenceMatcher
+
+from utils.keyword_matcher import get_keyword_matcher
+from utils.spatial_grid import SpatialGrid
 
 logger = logging.getLogger(__name__)
 
@@ -428,6 +430,9 @@ class SensorSuggester:
         skipped_duplicate = 0
         analyzed = 0
 
+        # Built once per screen and shared by every label lookup below
+        label_index = self._build_label_index(elements)
+
         for element in elements:
             # Skip elements without any useful attributes
             text = element.get("text", "").strip()
@@ -475,6 +480,7 @@ class SensorSuggester:
                         extracted_value=match_result.get("value"),
                         extracted_unit=match_result.get("unit"),
                         all_elements=elements,
+                        label_index=label_index,
                     )
 
                     suggestions.append(suggestion)
@@ -710,8 +716,9 @@ class SensorSuggester:
         Check if text fuzzy-matches any keyword
 
         Supports:
-        - Exact substring match (fastest)
-        - Fuzzy matching using SequenceMatcher for typos/variations
+        - Exact substring match (fastest, one precompiled regex per keyword list)
+        - Fuzzy matching using SequenceMatcher for typos/variations, only for
+          word pairs whose lengths allow a match
 
         Args:
             text: Text to search in
@@ -721,27 +728,8 @@ class SensorSuggester:
         Returns:
             True if any keyword matches
         """
-        text_lower = text.lower()
-
-        for keyword in keywords:
-            # Exact substring match (fast path)
-            if keyword in text_lower:
-                return True
-
-            # Fuzzy match each word in the text
-            for word in text_lower.split():
-                # Skip very short words for fuzzy matching
-                if len(word) < 3 or len(keyword) < 3:
-                    continue
-
-                ratio = SequenceMatcher(None, keyword, word).ratio()
-                if ratio >= threshold:
-                    logger.debug(
-                        f"[SensorSuggester] Fuzzy match: '{keyword}' ~ '{word}' ({ratio:.2f})"
-                    )
-                    return True
-
-        return False
+        matcher = get_keyword_matcher(tuple(keywords))
+        return matcher.matches(text.lower(), threshold, source="SensorSuggester")
 
     def _create_suggestion(
         self,
@@ -752,6 +740,7 @@ class SensorSuggester:
         extracted_value: Optional[str] = None,
         extracted_unit: Optional[str] = None,
         all_elements: Optional[List[Dict[str, Any]]] = None,
+        label_index: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """
         Create a sensor suggestion from element and pattern match.
@@ -764,7 +753,7 @@ class SensorSuggester:
         label_candidates = []
         if all_elements:
             label_candidates = self._find_nearby_labels(
-                element, all_elements, max_candidates=3
+                element, all_elements, max_candidates=3, label_index=label_index
             )
 
         # Generate primary sensor name (use best label candidate if available)
@@ -846,11 +835,63 @@ class SensorSuggester:
             "suggested": True,  # User hasn't confirmed yet
         }
 
+    def _build_label_index(self, elements: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Build a per-screen index of potential label elements.
+
+        Only elements with text or content description and usable bounds are
+        kept. Geometry and _looks_like_label results are computed once, and
+        element bounds go into a SpatialGrid so that each value element
+        only checks the labels near it.
+        """
+        grid = SpatialGrid()
+        entries = []
+        for other in elements:
+            other_bounds = other.get("bounds", {})
+            if not other_bounds or "x" not in other_bounds or "y" not in other_bounds:
+                continue
+
+            other_text = other.get("text", "").strip()
+            other_content_desc = other.get("content_desc", "").strip()
+            if not other_text and not other_content_desc:
+                continue
+
+            other_width = other_bounds.get("width", 200)
+            other_height = other_bounds.get("height", 50)
+            label_text = other_text or other_content_desc
+            entry = {
+                "element": other,
+                "x": other_bounds["x"],
+                "width": other_width,
+                "center_x": other_bounds["x"] + other_width / 2,
+                "center_y": other_bounds["y"] + other_height / 2,
+                "text": other_text,
+                "content_desc": other_content_desc,
+                "label_text": label_text,
+                "is_label": self._looks_like_label(label_text),
+                "desc_is_label": bool(
+                    other_content_desc
+                    and other_content_desc != other_text
+                    and self._looks_like_label(other_content_desc)
+                ),
+            }
+            grid.insert(
+                len(entries),
+                other_bounds["x"],
+                other_bounds["y"],
+                other_bounds["x"] + other_width,
+                other_bounds["y"] + other_height,
+            )
+            entries.append(entry)
+
+        return {"grid": grid, "entries": entries}
+
     def _find_nearby_labels(
         self,
         element: Dict[str, Any],
         elements: List[Dict[str, Any]],
         max_candidates: int = 3,
+        label_index: Optional[Dict[str, Any]] = None,
     ) -> List[Dict[str, Any]]:
         """
         Find label elements spatially near this value element.
@@ -866,6 +907,7 @@ class SensorSuggester:
             element: The value element to find a label for
             elements: All UI elements to search through
             max_candidates: Maximum number of label candidates to return
+            label_index: Index from _build_label_index (built on demand if omitted)
 
         Returns:
             List of label candidates with text and score, sorted by score (best first)
@@ -886,40 +928,45 @@ class SensorSuggester:
         left_labels = []
         content_desc_labels = []
 
-        for other in elements:
-            # Skip self
-            if other is element:
-                continue
-
-            other_bounds = other.get("bounds", {})
-            if not other_bounds or "x" not in other_bounds or "y" not in other_bounds:
-                continue
+        if label_index is None:
+            label_index = self._build_label_index(elements)
+        entries = label_index["entries"]
+
+        # Only labels whose bounds can satisfy one of the checks below:
+        # above (<150px), below (<100px) or left (<250px) of this element
+        nearby_ids = label_index["grid"].query(
+            min(bounds["x"] - 250, element_center_x - 100),
+            element_center_y - 150,
+            max(bounds["x"] + element_width, element_center_x + 100),
+            element_center_y + 100,
+        )
 
-            other_text = other.get("text", "").strip()
-            other_content_desc = other.get("content_desc", "").strip()
+        for entry_id in nearby_ids:
+            entry = entries[entry_id]
 
-            # Skip if no text content
-            if not other_text and not other_content_desc:
+            # Skip self
+            if entry["element"] is element:
                 continue
 
-            other_width = other_bounds.get("width", 200)
-            other_height = other_bounds.get("height", 50)
-            other_center_x = other_bounds["x"] + other_width / 2
-            other_center_y = other_bounds["y"] + other_height / 2
+            other_x = entry["x"]
+            other_width = entry["width"]
+            other_text = entry["text"]
 
             # Calculate center distances
-            x_center_distance = abs(other_center_x - element_center_x)
-            y_distance = element_center_y - other_center_y  # Positive = other is above
+            x_center_distance = abs(entry["center_x"] - element_center_x)
+            y_distance = (
+                element_center_y - entry["center_y"]
+            )  # Positive = other is above
 
             # Use the text or content description
-            label_text = other_text or other_content_desc
+            label_text = entry["label_text"]
 
             # Check if this looks like a label (not a numeric value)
-            if self._looks_like_label(label_text):
+            if entry["is_label"]:
                 # Check vertical alignment (within 100px horizontally, or overlapping x-axis)
                 is_vertically_aligned = x_center_distance < 100 or (
-                    other_bounds["x"] < bounds["x"] + element_width
-                    and other_bounds["x"] + other_width > bounds["x"]
+                    other_x < bounds["x"] + element_width
+                    and other_x + other_width > bounds["x"]
                 )
 
                 # Check horizontal alignment (within 40px vertically)
@@ -949,7 +996,7 @@ class SensorSuggester:
 
                 # Element is to the LEFT on same row
                 elif is_horizontally_aligned:
-                    x_left_distance = bounds["x"] - (other_bounds["x"] + other_width)
+                    x_left_distance = bounds["x"] - (other_x + other_width)
                     if 0 < x_left_distance < 250:  # To the left, within 250px
                         left_labels.append(
                             {
@@ -962,17 +1009,16 @@ class SensorSuggester:
 
             # Also check content description even if element has numeric text
             # (some elements have descriptive content_desc)
-            if other_content_desc and other_content_desc != other_text:
-                if self._looks_like_label(other_content_desc):
-                    if x_center_distance < 50 and abs(y_distance) < 30:
-                        content_desc_labels.append(
-                            {
-                                "text": other_content_desc,
-                                "distance": abs(y_distance) + x_center_distance / 10,
-                                "x_offset": x_center_distance,
-                                "priority": 4,
-                            }
-                        )
+            if entry["desc_is_label"]:
+                if x_center_distance < 50 and abs(y_distance) < 30:
+                    content_desc_labels.append(
+                        {
+                            "text": entry["content_desc"],
+                            "distance": abs(y_distance) + x_center_distance / 10,
+                            "x_offset": x_center_distance,
+                            "priority": 4,
+                        }
+                    )
 
         # Collect all candidates and score them
         all_candidates = []
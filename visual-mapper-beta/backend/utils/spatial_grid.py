@@ -0,0 +1,53 @@
+"""
+Spatial Grid - Uniform grid index over UI element bounds
+
+Used for neighbour queries on dense screens ("which labels sit above/left of
+this value?") so each lookup only visits elements in nearby cells instead of
+scanning every element on the screen.
+"""
+
+from typing import Dict, List, Set, Tuple
+
+
+class SpatialGrid:
+    """
+    Uniform grid of rectangles keyed by integer item ids.
+
+    Each rectangle is registered in every cell it overlaps. Queries return
+    candidate ids in insertion order; callers still apply their exact
+    geometric checks to the candidates.
+    """
+
+    def __init__(self, cell_size: int = 128):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _cell_range(self, x0: float, y0: float, x1: float, y1: float):
+        size = self.cell_size
+        return (
+            range(int(x0 // size), int(x1 // size) + 1),
+            range(int(y0 // size), int(y1 // size) + 1),
+        )
+
+    def insert(self, item_id: int, x0: float, y0: float, x1: float, y1: float):
+        """Register item_id for the rectangle [x0, x1] x [y0, y1]."""
+        cols, rows = self._cell_range(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+        for cx in cols:
+            for cy in rows:
+                self._cells.setdefault((cx, cy), []).append(item_id)
+        self._count += 1
+
+    def query(self, x0: float, y0: float, x1: float, y1: float) -> List[int]:
+        """Ids of all rectangles that may intersect [x0, x1] x [y0, y1], sorted."""
+        found: Set[int] = set()
+        cols, rows = self._cell_range(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+        for cx in cols:
+            for cy in rows:
+                ids = self._cells.get((cx, cy))
+                if ids:
+                    found.update(ids)
+        return sorted(found)
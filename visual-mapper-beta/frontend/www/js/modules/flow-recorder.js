@@ -547,7 +547,7 @@ class FlowRecorder {
         }
         step.validate_state = true; // Enable state validation by default
         step.recovery_action = 'force_restart_app';
-        step.state_match_threshold = 0.80;
+        step.state_match_threshold = 0.90;
 
         await this.addStep(step);
 